@@ -1,19 +1,30 @@
 # This work is licensed under a Attribution-NonCommercial-ShareAlike 4.0 International (CC BY-NC-SA 4.0) https://creativecommons.org/licenses/by-nc-sa/4.0/
 # © LuxAlgo - Live FVG Screener with Gmail Alerts
 
-import MetaTrader5 as mt5
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
+from dataclasses import dataclass, field
 from typing import List, Optional, Tuple, Dict
 import logging
+import math
 import time
 import threading
 
+from fvg_engine import FVG, IncrementalFVGDetector, ThresholdState, detect_fvgs, is_approaching
+from fvg_report import (EMAIL_PAGE, EMAIL_ROW, EMAIL_SECTION, HTML_PAGE, HTML_ROW, HTML_SECTION,
+                        ReportRenderer, StatusSnapshot)
+from bar_cache import BarCache
+from market_snapshot import MarketSnapshot
+from latency_metrics import Metrics, MetricsExporter
+from mt5_common import TokenBucket, load_terminal, rates_to_frame, timeframe_seconds
+from scan_scheduler import ScanScheduler, tier_for
+from notifier import EmailNotifier, SmtpSettings
+
+# MetaTrader5 package, or the offline stand-in with MT5_BACKEND=fake
+mt5 = load_terminal()
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -22,15 +33,19 @@ logger = logging.getLogger(__name__)
 GMAIL_USER = "algotradingmike@gmail.com"  # Change this to your Gmail
 GMAIL_PASSWORD = "alxy xltn ahbn ikal"  # Use App Password, not regular password
 GMAIL_TO = "algotradingmike@gmail.com"  # Change this to recipient email
+SMTP_HOST = "smtp.gmail.com"
+SMTP_PORT = 587
 
 @dataclass
-class FVG:
-    """Fair Value Gap data structure"""
-    max_price: float
-    min_price: float
-    is_bull: bool
-    timestamp: datetime
-    bar_index: int
+class ScanResult:
+    """Outcome of scanning one symbol in a worker thread"""
+    symbol: str
+    price: Optional[float] = None
+    new_fvgs: List[FVG] = field(default_factory=list)  # Set by apply_scan_result
+    first_scan: bool = False
+    bars: Optional[pd.DataFrame] = None  # Closed bars not yet fed to the symbol's detector
+    latency: float = 0.0  # Seconds spent fetching
+    error: Optional[str] = None
 
 class LiveFVGScreener:
     """Live Fair Value Gap Screener with Gmail Alerts"""
@@ -40,36 +55,62 @@ class LiveFVGScreener:
                  threshold_percent: float = 0.0,
                  auto_threshold: bool = False,
                  lookback_days: int = 30,
-                 custom_symbols: Optional[List[str]] = None):
+                 custom_symbols: Optional[List[str]] = None,
+                 max_workers: int = 4,
+                 scan_timeout: float = 10.0,
+                 bar_cache_dir: Optional[str] = None,
+                 symbol_group: Optional[str] = None,
+                 scan_budget: float = 20.0):
         
         self.timeframe = timeframe
         self.threshold_percent = threshold_percent
         self.auto_threshold = auto_threshold
         self.lookback_days = lookback_days
         self.custom_symbols = custom_symbols
+        self.symbol_group = symbol_group  # MT5 group mask for auto-detection, e.g. "*,!*.ETF" (None = all)
+        self.unselected: set = set()  # Symbols to add to Market Watch before their first scan
         
         # Track all symbols and their FVGs
         self.symbol_data: Dict[str, List[FVG]] = {}
         self.last_prices: Dict[str, float] = {}
         self.alerted_fvgs: Dict[str, set] = {}  # Track which FVGs have been alerted for proximity
+        self.detectors: Dict[str, IncrementalFVGDetector] = {}  # Incremental FVG state per symbol
+        
+        # Latency spans per hot-path step (tick/bar fetch, detection, rendering, email),
+        # dumped as JSON histograms every minute (MT5_METRICS_* to configure)
+        self.metrics = Metrics.from_env()
+        self.metrics_exporter = MetricsExporter.from_env(self.metrics, 'fvg_screener_metrics.json').start()
         
         # Email management with rate limiting
         self.last_summary_sent = None  # Track when last summary was sent
         self.summary_cooldown = 600  # Increased to 10 minutes between summary emails
         self.active_alert_count = 0  # Track number of active alerts
-        self.email_sent_today = 0  # Track emails sent today
-        self.last_email_reset = datetime.now().date()  # Track when to reset daily counter
+        # Mail goes out from a background thread over one pooled SMTP session;
+        # a token bucket (80/day, bursts of 10) replaces the daily counter
+        self.notifier = EmailNotifier(SmtpSettings(SMTP_HOST, SMTP_PORT, GMAIL_USER, GMAIL_PASSWORD, GMAIL_USER, GMAIL_TO),
+                                      metrics=self.metrics)
         self.max_daily_emails = 80  # Conservative limit (Gmail allows 100/day for regular accounts)
-        self.email_disabled = False  # Flag to disable emails when limit is reached
         
         # HTML file management
         self.html_file_path = r"c:\Users\mike\OneDrive - Universitetet i Oslo\API\Algo v2\FVG_Live_Report.html"
         self.last_html_update = None  # Track when HTML was last updated
         self.html_update_interval = 300  # Update HTML every 5 minutes (300 seconds)
         
+        # One status snapshot per scan cycle, rendered through cached row templates
+        self.status: Optional[StatusSnapshot] = None
+        self.html_renderer = ReportRenderer(HTML_PAGE, HTML_SECTION, HTML_ROW)
+        self.email_renderer = ReportRenderer(EMAIL_PAGE, EMAIL_SECTION, EMAIL_ROW, summary=True)
+        
         # Proximity settings
         self.proximity_percent = 0.1  # Alert when price is within 0.1% of FVG zone
         
+        # Concurrent scanning
+        self.max_workers = max_workers  # Max symbols fetched/detected at the same time
+        self.scan_timeout = scan_timeout  # Seconds before a single symbol scan is given up for the cycle
+        self._scan_pool: Optional[ThreadPoolExecutor] = None
+        self._in_flight: set = set()  # Symbols whose worker scan has not finished (possibly past its timeout)
+        self.symbol_latency: Dict[str, float] = {}  # Last scan latency per symbol (seconds)
+        
         # Initialize MT5
         self.initialize_mt5()
         
@@ -80,6 +121,17 @@ class LiveFVGScreener:
         else:
             self.forex_symbols = self.get_forex_symbols()
             logger.info(f"Found {len(self.forex_symbols)} forex symbols")
+        
+        # One tick fetch per symbol per scan cycle, shared by all consumers
+        self.snapshot = MarketSnapshot(mt5, self.forex_symbols)
+        
+        # Symbols in or near a gap are scanned every few seconds, idle ones rarely,
+        # within scan_budget symbol scans per second for the whole universe
+        self.scheduler = ScanScheduler(self.forex_symbols, budget=scan_budget)
+        self.report_interval = 60  # Seconds between summary email/HTML checks and scheduler stats
+        
+        # Bars are cached on disk; only bars after the cached tail are requested from MT5
+        self.bar_cache = BarCache(mt5, bar_cache_dir)
     
     def initialize_mt5(self) -> bool:
         """Initialize MT5 connection"""
@@ -91,97 +143,53 @@ class LiveFVGScreener:
         return True
     
     def get_forex_symbols(self) -> List[str]:
-        """Get all available forex symbols from MT5"""
-        symbols = mt5.symbols_get()
+        """Get every fully tradable symbol from MT5 (FX, CFDs, indices, crypto), limited by symbol_group if set"""
+        symbols = mt5.symbols_get() if self.symbol_group is None else mt5.symbols_get(group=self.symbol_group)
         if symbols is None:
             logger.error("Failed to get symbols")
             return []
         
-        # Filter for forex symbols (usually contain USD, EUR, GBP, etc.)
+        # No cap and no name filter: the scan scheduler keeps the terminal load bounded
         forex_symbols = []
-        # Expanded list of forex currencies including exotic pairs
-        forex_currencies = ['USD', 'EUR', 'GBP', 'JPY', 'AUD', 'CAD', 'CHF', 'NZD', 
-                           'SEK', 'NOK', 'DKK', 'PLN', 'CZK', 'HUF', 'TRY', 'ZAR',
-                           'MXN', 'SGD', 'HKD', 'CNH', 'RUB', 'INR', 'BRL', 'KRW']
-        
         for symbol in symbols:
-            symbol_name = symbol.name
-            # Check if symbol contains forex currency pairs
-            if (any(curr in symbol_name for curr in forex_currencies) and 
-                len(symbol_name) == 6 and  # Standard forex pair length
-                symbol.trade_mode == mt5.SYMBOL_TRADE_MODE_FULL):
-                forex_symbols.append(symbol_name)
+            if symbol.trade_mode == mt5.SYMBOL_TRADE_MODE_FULL:
+                forex_symbols.append(symbol.name)
+                if not symbol.visible:
+                    self.unselected.add(symbol.name)
         
-        return sorted(forex_symbols[:50])  # Increased limit to 50 for more pairs
+        return sorted(forex_symbols)
     
-    def check_daily_email_limit(self) -> bool:
-        """Check and update daily email limit"""
-        current_date = datetime.now().date()
-        
-        # Reset counter if it's a new day
-        if current_date != self.last_email_reset:
-            self.email_sent_today = 0
-            self.last_email_reset = current_date
-            self.email_disabled = False
-            logger.info("Daily email counter reset")
+    @property
+    def max_daily_emails(self) -> int:
+        return self._max_daily_emails
+    
+    @max_daily_emails.setter
+    def max_daily_emails(self, value: int):
+        self._max_daily_emails = value
+        self.notifier.limiter = TokenBucket.per_day(value, burst=min(10, value))
+    
+    @property
+    def email_sent_today(self) -> int:
+        return self.notifier.sent_today
+    
+    @property
+    def email_disabled(self) -> bool:
+        """True while the provider's rate/daily limit has paused sending"""
+        return self.notifier.paused
+    
+    def send_gmail_alert(self, subject: str, message: str, is_html: bool = False, key: Optional[str] = None) -> bool:
+        """Queue a Gmail alert for the background sender; returns immediately.
         
-        # Check if we've hit the limit
-        if self.email_sent_today >= self.max_daily_emails:
-            if not self.email_disabled:
-                logger.warning(f"Daily email limit reached ({self.max_daily_emails}). Disabling emails until tomorrow.")
-                self.email_disabled = True
+        Pending alerts with the same ``key`` are replaced by the newest one, so a
+        backlog of summaries collapses to the latest. Returns False while sending
+        is paused by a provider limit.
+        """
+        if self.email_disabled:
+            logger.warning(f"Email not queued, sending paused ({self.notifier.last_error})")
             return False
-        
+        self.notifier.notify(subject, message, is_html, key)
         return True
     
-    def send_gmail_alert(self, subject: str, message: str, is_html: bool = False):
-        """Send Gmail alert with HTML support and rate limiting"""
-        # Check if emails are disabled due to rate limiting
-        if not self.check_daily_email_limit():
-            logger.warning(f"Email blocked due to daily limit. Emails sent today: {self.email_sent_today}")
-            return False
-        
-        try:
-            msg = MIMEMultipart()
-            msg['From'] = GMAIL_USER
-            msg['To'] = GMAIL_TO
-            msg['Subject'] = subject
-            
-            # Attach message as HTML or plain text
-            if is_html:
-                msg.attach(MIMEText(message, 'html'))
-            else:
-                msg.attach(MIMEText(message, 'plain'))
-            
-            server = smtplib.SMTP('smtp.gmail.com', 587)
-            server.starttls()
-            server.login(GMAIL_USER, GMAIL_PASSWORD)
-            text = msg.as_string()
-            server.sendmail(GMAIL_USER, GMAIL_TO, text)
-            server.quit()
-            
-            # Update counter on successful send
-            self.email_sent_today += 1
-            logger.info(f"Email sent: {subject} (Daily count: {self.email_sent_today}/{self.max_daily_emails})")
-            return True
-            
-        except Exception as e:
-            error_msg = str(e)
-            
-            # Check for specific Gmail rate limiting errors
-            if "Daily user sending limit exceeded" in error_msg or "5.4.5" in error_msg:
-                logger.error("Gmail daily sending limit exceeded. Disabling emails for today.")
-                self.email_disabled = True
-                self.email_sent_today = self.max_daily_emails  # Set to max to prevent further attempts
-                return False
-            elif "Message rate limit exceeded" in error_msg:
-                logger.error("Gmail rate limit exceeded. Waiting before retry...")
-                time.sleep(60)  # Wait 1 minute before allowing next email
-                return False
-            else:
-                logger.error(f"Failed to send email: {e}")
-                return False
-    
     def should_update_html_file(self) -> bool:
         """Check if HTML file should be updated (every 5 minutes)"""
         if self.last_html_update is None:
@@ -190,410 +198,52 @@ class LiveFVGScreener:
         now = datetime.now()
         return (now - self.last_html_update).total_seconds() >= self.html_update_interval
     
+    def update_status(self) -> StatusSnapshot:
+        """Classify every symbol once for this cycle; the HTML report and summary email render from it"""
+        indexes = {symbol: self.detectors[symbol].index for symbol in self.symbol_data}
+        self.status = StatusSnapshot.build(indexes, self.last_prices, self.proximity_percent)
+        return self.status
+    
     def generate_html_file(self):
         """Generate and save HTML file with live FVG data"""
         try:
-            current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            symbol_status = {}
-            
-            # Same logic as email generation but for HTML file
-            for symbol, fvgs in self.symbol_data.items():
-                if symbol not in self.last_prices:
-                    continue
-                
-                current_price = self.last_prices[symbol]
-                bull_count = 0
-                bear_count = 0
-                latest_time = None
-                state = "INGEN FVG"
-                state_detail = ""
-                
-                # Priority: AKTIV > NÆRMER > OVERVÅKET > INGEN FVG
-                for fvg in fvgs:
-                    if fvg.is_bull:
-                        bull_count += 1
-                        if current_price <= fvg.max_price:
-                            if latest_time is None or fvg.timestamp > latest_time:
-                                state = "BULL AKTIV"
-                                state_detail = f"{fvg.timestamp.strftime('%d/%m %H:%M')}"
-                                latest_time = fvg.timestamp
-                        elif self.is_approaching_fvg(current_price, fvg, True):
-                            if state != "BULL AKTIV" and (latest_time is None or fvg.timestamp > latest_time):
-                                state = "BULL NÆRMER"
-                                state_detail = f"{fvg.timestamp.strftime('%d/%m %H:%M')}"
-                                latest_time = fvg.timestamp
-                    else:
-                        bear_count += 1
-                        if current_price >= fvg.min_price:
-                            if latest_time is None or fvg.timestamp > latest_time:
-                                state = "BEAR AKTIV"
-                                state_detail = f"{fvg.timestamp.strftime('%d/%m %H:%M')}"
-                                latest_time = fvg.timestamp
-                        elif self.is_approaching_fvg(current_price, fvg, False):
-                            if state not in ("BULL AKTIV", "BEAR AKTIV") and (latest_time is None or fvg.timestamp > latest_time):
-                                state = "BEAR NÆRMER"
-                                state_detail = f"{fvg.timestamp.strftime('%d/%m %H:%M')}"
-                                latest_time = fvg.timestamp
-                
-                if bull_count > 0 or bear_count > 0:
-                    if state == "INGEN FVG":
-                        state = "OVERVÅKET"
-                
-                symbol_status[symbol] = {
-                    'state': state,
-                    'detail': state_detail,
-                    'bull': bull_count,
-                    'bear': bear_count,
-                    'total': bull_count + bear_count,
-                    'price': current_price
-                }
-            
-            # Group symbols by status
-            grupper = [
-                ("BULL AKTIV", [], "#28a745", "🟢"),
-                ("BEAR AKTIV", [], "#dc3545", "🔴"),
-                ("BULL NÆRMER", [], "#ffc107", "🟡"),
-                ("BEAR NÆRMER", [], "#fd7e14", "🟠"),
-                ("OVERVÅKET", [], "#6c757d", "⚪"),
-            ]
-            
-            for symbol, data in symbol_status.items():
-                for group, lst, color, icon in grupper:
-                    if data['state'] == group:
-                        lst.append((symbol, data))
-            
-            # Generate HTML content with auto-refresh
-            html_content = f"""<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <meta http-equiv="refresh" content="300">
-    <title>📊 Live FVG Screener - {current_time}</title>
-    <style>
-        body {{
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, Arial, sans-serif;
-            margin: 0;
-            padding: 10px;
-            background-color: #f8f9fa;
-            font-size: 14px;
-        }}
-        .container {{
-            max-width: 1200px;
-            margin: 0 auto;
-            background-color: white;
-            border-radius: 10px;
-            box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-            overflow: hidden;
-        }}
-        .header {{
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            padding: 15px;
-            text-align: center;
-        }}
-        .header h1 {{
-            margin: 0;
-            font-size: 24px;
-        }}
-        .header p {{
-            margin: 5px 0 0 0;
-            opacity: 0.9;
-            font-size: 14px;
-        }}
-        .content {{
-            padding: 15px;
-        }}
-        .alert-section {{
-            margin-bottom: 25px;
-        }}
-        .alert-header {{
-            display: flex;
-            align-items: center;
-            margin-bottom: 10px;
-            padding: 8px 12px;
-            border-radius: 5px;
-            font-weight: bold;
-            font-size: 16px;
-        }}
-        .alert-active {{
-            background-color: #d4edda;
-            color: #155724;
-        }}
-        .alert-approaching {{
-            background-color: #fff3cd;
-            color: #856404;
-        }}
-        .alert-monitored {{
-            background-color: #f8f9fa;
-            color: #6c757d;
-        }}
-        .symbol-table {{
-            width: 100%;
-            border-collapse: collapse;
-            margin-bottom: 15px;
-        }}
-        .symbol-table th {{
-            background-color: #f8f9fa;
-            padding: 8px 10px;
-            text-align: left;
-            border-bottom: 2px solid #dee2e6;
-            font-weight: 600;
-            font-size: 12px;
-        }}
-        .symbol-table td {{
-            padding: 6px 10px;
-            border-bottom: 1px solid #dee2e6;
-            font-size: 12px;
-        }}
-        .symbol-table tr:hover {{
-            background-color: #f8f9fa;
-        }}
-        .status-badge {{
-            padding: 3px 6px;
-            border-radius: 3px;
-            font-size: 10px;
-            font-weight: bold;
-            text-transform: uppercase;
-        }}
-        .status-bull-aktiv {{
-            background-color: #d4edda;
-            color: #155724;
-        }}
-        .status-bear-aktiv {{
-            background-color: #f8d7da;
-            color: #721c24;
-        }}
-        .status-bull-nærmer {{
-            background-color: #fff3cd;
-            color: #856404;
-        }}
-        .status-bear-nærmer {{
-            background-color: #fce4e0;
-            color: #975a16;
-        }}
-        .status-overvåket {{
-            background-color: #e2e3e5;
-            color: #383d41;
-        }}
-        .summary-box {{
-            background-color: #f8f9fa;
-            padding: 15px;
-            border-radius: 8px;
-            margin-top: 15px;
-        }}
-        .summary-stats {{
-            display: flex;
-            justify-content: space-between;
-            flex-wrap: wrap;
-            gap: 15px;
-        }}
-        .stat-item {{
-            text-align: center;
-            flex: 1;
-            min-width: 80px;
-        }}
-        .stat-value {{
-            font-size: 20px;
-            font-weight: bold;
-            color: #495057;
-        }}
-        .stat-label {{
-            font-size: 12px;
-            color: #6c757d;
-        }}
-        .footer {{
-            text-align: center;
-            padding: 15px;
-            background-color: #f8f9fa;
-            border-top: 1px solid #dee2e6;
-            font-size: 11px;
-            color: #6c757d;
-        }}
-        .live-indicator {{
-            display: inline-block;
-            width: 8px;
-            height: 8px;
-            background-color: #28a745;
-            border-radius: 50%;
-            margin-right: 5px;
-            animation: pulse 2s infinite;
-        }}
-        @keyframes pulse {{
-            0% {{ opacity: 1; }}
-            50% {{ opacity: 0.5; }}
-            100% {{ opacity: 1; }}
-        }}
-        
-        /* Mobile responsive */
-        @media (max-width: 768px) {{
-            .container {{
-                margin: 5px;
-                border-radius: 5px;
-            }}
-            .header h1 {{
-                font-size: 20px;
-            }}
-            .content {{
-                padding: 10px;
-            }}
-            .summary-stats {{
-                gap: 10px;
-            }}
-            .stat-item {{
-                min-width: 60px;
-            }}
-            .symbol-table th,
-            .symbol-table td {{
-                padding: 4px 6px;
-                font-size: 11px;
-            }}
-        }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1><span class="live-indicator"></span>📊 LIVE FVG SCREENER</h1>
-            <p>Sist oppdatert: {current_time} • Neste oppdatering: {(datetime.now() + timedelta(seconds=300)).strftime('%H:%M:%S')}</p>
-        </div>
-        
-        <div class="content">
-"""
-            
-            # Add tables for each group
-            for group, lst, color, icon in grupper:
-                if lst:
-                    css_class = group.lower().replace(' ', '-')
-                    
-                    if 'AKTIV' in group:
-                        section_class = 'alert-active'
-                    elif 'NÆRMER' in group:
-                        section_class = 'alert-approaching'
-                    else:
-                        section_class = 'alert-monitored'
-                    
-                    html_content += f"""
-            <div class="alert-section">
-                <div class="alert-header {section_class}">
-                    {icon} {group} ({len(lst)} symboler)
-                </div>
-                <table class="symbol-table">
-                    <thead>
-                        <tr>
-                            <th>Symbol</th>
-                            <th>Status</th>
-                            <th>Pris</th>
-                            <th>Tid</th>
-                            <th>FVG Info</th>
-                        </tr>
-                    </thead>
-                    <tbody>
-"""
-                    
-                    for symbol, data in sorted(lst):
-                        status_class = f"status-{css_class}"
-                        fvg_info = f"{data['total']} FVG"
-                        if data['bull'] > 0 and data['bear'] > 0:
-                            fvg_info += f" ({data['bull']}🟢 {data['bear']}🔴)"
-                        elif data['bull'] > 0:
-                            fvg_info += f" ({data['bull']}🟢)"
-                        elif data['bear'] > 0:
-                            fvg_info += f" ({data['bear']}🔴)"
-                        
-                        html_content += f"""
-                        <tr>
-                            <td><strong>{symbol}</strong></td>
-                            <td><span class="status-badge {status_class}">{data['state']}</span></td>
-                            <td>{data['price']:.5f}</td>
-                            <td>{data['detail']}</td>
-                            <td>{fvg_info}</td>
-                        </tr>
-"""
-                    
-                    html_content += """
-                    </tbody>
-                </table>
-            </div>
-"""
-            
-            # Add summary
-            antall = len(symbol_status)
-            total_fvg = sum(d['total'] for d in symbol_status.values())
-            total_bull = sum(d['bull'] for d in symbol_status.values())
-            total_bear = sum(d['bear'] for d in symbol_status.values())
-            aktive_alerts = sum(1 for d in symbol_status.values() if 'AKTIV' in d['state'])
-            nærmer_alerts = sum(1 for d in symbol_status.values() if 'NÆRMER' in d['state'])
-            
-            html_content += f"""
-            <div class="summary-box">
-                <h3 style="margin-top: 0;">📈 SAMMENDRAG</h3>
-                <div class="summary-stats">
-                    <div class="stat-item">
-                        <div class="stat-value">{antall}</div>
-                        <div class="stat-label">Symboler</div>
-                    </div>
-                    <div class="stat-item">
-                        <div class="stat-value">{total_fvg}</div>
-                        <div class="stat-label">Totalt FVG</div>
-                    </div>
-                    <div class="stat-item">
-                        <div class="stat-value">{total_bull}</div>
-                        <div class="stat-label">Bull FVG</div>
-                    </div>
-                    <div class="stat-item">
-                        <div class="stat-value">{total_bear}</div>
-                        <div class="stat-label">Bear FVG</div>
-                    </div>
-                    <div class="stat-item">
-                        <div class="stat-value">{aktive_alerts}</div>
-                        <div class="stat-label">Aktive Alerts</div>
-                    </div>
-                    <div class="stat-item">
-                        <div class="stat-value">{nærmer_alerts}</div>
-                        <div class="stat-label">Nærmer Seg</div>
-                    </div>
-                </div>
-                <div style="margin-top: 15px; padding-top: 15px; border-top: 1px solid #dee2e6; font-size: 12px; color: #6c757d;">
-                    📧 E-post: {self.email_sent_today}/{self.max_daily_emails} • 🌐 HTML: Auto-oppdatering hver 5. minutt
-                </div>
-            </div>
-        </div>
-        
-        <div class="footer">
-            <p>🔄 Siden oppdateres automatisk hver 5. minutt • 📱 Mobilvennlig • 💾 Lagret i OneDrive</p>
-            <p>Generert av Live FVG Screener • © LuxAlgo</p>
-        </div>
-    </div>
-</body>
-</html>
-"""
+            status = self.status or self.update_status()
+            now = datetime.now()
+            with self.metrics.span('report_render'):
+                html_content = self.html_renderer.render(
+                    status,
+                    current_time=now.strftime('%Y-%m-%d %H:%M:%S'),
+                    next_update=(now + timedelta(seconds=300)).strftime('%H:%M:%S'),
+                    emails_sent=self.email_sent_today,
+                    max_emails=self.max_daily_emails,
+                )
             
             # Write HTML file
             with open(self.html_file_path, 'w', encoding='utf-8') as f:
                 f.write(html_content)
             
             self.last_html_update = datetime.now()
-            logger.info(f"HTML file updated: {self.html_file_path}")
+            logger.info(f"HTML file updated: {self.html_file_path} ({self.html_renderer.rows_rendered} rows re-rendered)")
             
         except Exception as e:
             logger.error(f"Failed to generate HTML file: {e}")
     
-    def get_data(self, symbol: str, bars: int = None) -> pd.DataFrame:
-        """Get OHLC data from MT5"""
+    def lookback_bars(self) -> int:
+        """Number of bars covering lookback_days on the screener timeframe"""
+        return max(3, self.lookback_days * 86400 // timeframe_seconds(self.timeframe))
+    
+    def get_data(self, symbol: str, bars: int = None, start_pos: int = 0) -> pd.DataFrame:
+        """Get OHLC data from MT5 (start_pos=1 skips the forming bar)"""
         if bars is None:
-            bars = self.lookback_days * 6  # 6 bars per day for 4H timeframe
+            bars = self.lookback_bars()
         
         try:
-            rates = mt5.copy_rates_from_pos(symbol, self.timeframe, 0, bars)
+            with self.metrics.span('bar_fetch'):
+                rates = self.bar_cache.copy_rates_from_pos(symbol, self.timeframe, start_pos, bars)
             if rates is None:
                 return None
             
-            df = pd.DataFrame(rates)
-            df['time'] = pd.to_datetime(df['time'], unit='s')
-            df = df.set_index('time')
-            
-            return df
+            return rates_to_frame(rates)
         except Exception as e:
             logger.error(f"Error getting data for {symbol}: {e}")
             return None
@@ -601,9 +251,8 @@ class LiveFVGScreener:
     def calculate_threshold(self, df: pd.DataFrame) -> float:
         """Calculate dynamic threshold if auto mode is enabled"""
         if self.auto_threshold:
-            # Calculate cumulative average of (high - low) / low
-            hl_ratio = (df['high'] - df['low']) / df['low']
-            return hl_ratio.expanding().mean().iloc[-1]
+            # Cumulative average of (high - low) / low
+            return ThresholdState().extend(df['high'].to_numpy(), df['low'].to_numpy())[-1]
         else:
             return self.threshold_percent / 100
     
@@ -613,47 +262,13 @@ class LiveFVGScreener:
         if df is None or len(df) < 3:
             return []
         
-        fvgs = []
-        
-        # Process each bar for FVG detection
-        for i in range(2, len(df)):
-            current = df.iloc[i]
-            prev1 = df.iloc[i-1]
-            prev2 = df.iloc[i-2]
-            
-            threshold = self.calculate_threshold(df.iloc[:i+1])
-            
-            # Bullish FVG: low > high[2] and close[1] > high[2]
-            bull_fvg = (current['low'] > prev2['high'] and 
-                       prev1['close'] > prev2['high'] and
-                       (current['low'] - prev2['high']) / prev2['high'] > threshold)
-            
-            # Bearish FVG: high < low[2] and close[1] < low[2]
-            bear_fvg = (current['high'] < prev2['low'] and 
-                       prev1['close'] < prev2['low'] and
-                       (prev2['low'] - current['high']) / current['high'] > threshold)
-            
-            if bull_fvg:
-                fvg = FVG(
-                    max_price=current['low'],
-                    min_price=prev2['high'],
-                    is_bull=True,
-                    timestamp=current.name,
-                    bar_index=i
-                )
-                fvgs.append(fvg)
-            
-            elif bear_fvg:
-                fvg = FVG(
-                    max_price=prev2['low'],
-                    min_price=current['high'],
-                    is_bull=False,
-                    timestamp=current.name,
-                    bar_index=i
-                )
-                fvgs.append(fvg)
+        if self.auto_threshold:
+            # One running cumulative mean for all bars
+            threshold = ThresholdState().extend(df['high'].to_numpy(), df['low'].to_numpy())
+        else:
+            threshold = self.calculate_threshold(df)
         
-        return fvgs
+        return detect_fvgs(df, threshold)
     
     def check_price_alerts(self, symbol: str, current_price: float):
         """Check if current price hits FVG levels and update tracking data"""
@@ -665,43 +280,156 @@ class LiveFVGScreener:
     
     def is_approaching_fvg(self, current_price: float, fvg: FVG, is_bull: bool) -> bool:
         """Check if price is approaching FVG zone within proximity threshold"""
-        if is_bull:
-            # For bullish FVG, check if price is approaching from above
-            if current_price > fvg.max_price:
-                distance = current_price - fvg.max_price
-                proximity_threshold = fvg.max_price * (self.proximity_percent / 100)
-                return distance <= proximity_threshold
+        if is_bull != fvg.is_bull:
+            return False
+        return is_approaching(current_price, fvg, self.proximity_percent)
+    
+    def fetch_new_bars(self, symbol: str, server_time: int) -> Optional[pd.DataFrame]:
+        """Closed bars newer than the last bar the symbol's detector processed (None if none can have closed).
+        
+        Only reads the detector, so it is safe in a worker thread.
+        """
+        detector = self.detectors.get(symbol)
+        if detector is None or detector.last_bar_time is None:
+            # First pass: full lookback window of closed bars
+            bars = self.lookback_bars()
         else:
-            # For bearish FVG, check if price is approaching from below
-            if current_price < fvg.min_price:
-                distance = fvg.min_price - current_price
-                proximity_threshold = current_price * (self.proximity_percent / 100)
-                return distance <= proximity_threshold
+            # Only request bars that can have closed since the last processed one
+            bar_seconds = timeframe_seconds(self.timeframe)
+            elapsed = server_time - int(detector.last_bar_time.timestamp())
+            if elapsed < 2 * bar_seconds:
+                # The bar after last_bar_time is still forming
+                return None
+            bars = min(self.lookback_bars(), elapsed // bar_seconds + 1)
         
-        return False
+        return self.get_data(symbol, bars=bars, start_pos=1)
+    
+    def apply_bars(self, symbol: str, df: Optional[pd.DataFrame]) -> List[FVG]:
+        """Feed fetched closed bars into the symbol's detector (created on first use); returns the new FVGs"""
+        detector = self.detectors.get(symbol)
+        if detector is None:
+            detector = IncrementalFVGDetector(
+                threshold_percent=self.threshold_percent,
+                auto_threshold=self.auto_threshold,
+                lookback=timedelta(days=self.lookback_days)
+            )
+            self.detectors[symbol] = detector
+        with self.metrics.span('fvg_detection'):
+            return detector.update(df)
     
-    def scan_symbol(self, symbol: str):
-        """Scan single symbol for FVGs and check alerts"""
+    def update_fvgs_for_symbol(self, symbol: str, server_time: int) -> List[FVG]:
+        """Feed closed bars newer than the last processed bar into the symbol's detector"""
+        return self.apply_bars(symbol, self.fetch_new_bars(symbol, server_time))
+    
+    def fetch_symbol(self, symbol: str) -> ScanResult:
+        """Fetch new bars for one symbol and read its price from the snapshot; safe to run in a worker thread.
+        
+        Nothing is changed here, not even the symbol's detector: apply_scan_result
+        feeds the bars in on the calling thread, so a scan that misses its timeout
+        leaves no trace.
+        """
+        start = time.perf_counter()
+        result = ScanResult(symbol=symbol)
         try:
-            # Get current price
-            tick = mt5.symbol_info_tick(symbol)
-            if tick is None:
-                return
-            
-            current_price = (tick.bid + tick.ask) / 2
-            
-            # Initial FVG detection if not done yet
-            if symbol not in self.symbol_data:
-                logger.info(f"Initial FVG scan for {symbol}")
-                fvgs = self.detect_fvgs_for_symbol(symbol)
-                self.symbol_data[symbol] = fvgs
-                logger.info(f"{symbol}: Found {len(fvgs)} FVGs")
-            
-            # Check for price alerts
-            self.check_price_alerts(symbol, current_price)
-            
+            tick = self.snapshot.tick(symbol)
+            if tick is not None:
+                result.price = (tick.bid + tick.ask) / 2
+                result.first_scan = symbol not in self.detectors
+                result.bars = self.fetch_new_bars(symbol, tick.time)
         except Exception as e:
-            logger.error(f"Error scanning {symbol}: {e}")
+            result.error = str(e)
+        result.latency = time.perf_counter() - start
+        self.metrics.record('symbol_scan', result.latency)
+        return result
+    
+    def apply_scan_result(self, result: ScanResult):
+        """Merge one symbol's scan result into its detector and symbol_data/last_prices (dropped if it took too long)"""
+        symbol = result.symbol
+        self.symbol_latency[symbol] = result.latency
+        if result.latency > self.scan_timeout:
+            logger.warning(f"{symbol}: scan took {result.latency:.1f}s (timeout {self.scan_timeout}s), result dropped")
+            return
+        if result.error is not None:
+            logger.error(f"Error scanning {symbol}: {result.error}")
+            return
+        if result.price is None:
+            return
+        
+        result.new_fvgs = self.apply_bars(symbol, result.bars)
+        result.bars = None
+        self.symbol_data[symbol] = self.detectors[symbol].fvgs
+        if result.first_scan:
+            logger.info(f"{symbol}: Found {len(result.new_fvgs)} FVGs ({len(self.symbol_data.get(symbol, []))} unfilled)")
+        elif result.new_fvgs:
+            logger.info(f"{symbol}: {len(result.new_fvgs)} new FVG(s) on closed bars")
+        
+        # Check for price alerts
+        self.check_price_alerts(symbol, result.price)
+    
+    def select_symbols(self, symbols: List[str]):
+        """Add symbols that are not in Market Watch before their first tick and bar requests"""
+        for symbol in symbols:
+            if symbol in self.unselected:
+                self.unselected.discard(symbol)
+                if not mt5.symbol_select(symbol, True):
+                    logger.warning(f"{symbol}: could not be added to Market Watch")
+    
+    def scan_symbols(self, symbols: List[str]):
+        """Scan symbols concurrently on a bounded thread pool and merge results in symbol order"""
+        self.select_symbols(symbols)
+        with self.metrics.span('tick_fetch'):
+            self.snapshot.refresh(symbols)
+        
+        if self.max_workers <= 1:
+            for symbol in symbols:
+                self.apply_scan_result(self.fetch_symbol(symbol))
+        else:
+            if self._scan_pool is None:
+                self._scan_pool = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                     thread_name_prefix="fvg-scan")
+            # A scan still running from an earlier cycle (past its timeout) is not started twice
+            futures = {}
+            busy = []
+            for symbol in symbols:
+                if symbol in self._in_flight:
+                    busy.append(symbol)
+                    continue
+                self._in_flight.add(symbol)
+                future = self._scan_pool.submit(self.fetch_symbol, symbol)
+                future.add_done_callback(lambda _, symbol=symbol: self._in_flight.discard(symbol))
+                futures[future] = symbol
+            if busy:
+                logger.warning(f"Skipping {len(busy)} symbol(s) still being scanned: {', '.join(busy[:10])}")
+            # Enough time for every batch of workers to hit the per-call timeout
+            batch_timeout = self.scan_timeout * math.ceil(len(futures) / self.max_workers)
+            results: Dict[str, ScanResult] = {}
+            try:
+                for future in as_completed(futures, timeout=batch_timeout):
+                    result = future.result()
+                    results[result.symbol] = result
+            except FuturesTimeoutError:
+                # Unfinished scans run on, but their results are never applied
+                for future, symbol in futures.items():
+                    if not future.done():
+                        future.cancel()
+                        logger.warning(f"{symbol}: scan timed out after {self.scan_timeout}s")
+            
+            # Deterministic merge regardless of completion order
+            for symbol in symbols:
+                if symbol in results:
+                    self.apply_scan_result(results[symbol])
+    
+    def scan_due_symbols(self) -> int:
+        """Scan the symbols the scheduler has due now and requeue each by its new tier; returns how many"""
+        batch = self.scheduler.next_batch()
+        if not batch:
+            return 0
+        self.scan_symbols(batch)
+        for symbol in batch:
+            detector = self.detectors.get(symbol)
+            tier = tier_for(detector.index if detector else None, self.last_prices.get(symbol), self.proximity_percent)
+            self.scheduler.reschedule(symbol, tier)
+        return len(batch)
     
     def should_send_summary_email(self) -> bool:
         """Determine if a summary email should be sent based on conditions"""
@@ -729,24 +457,32 @@ class LiveFVGScreener:
         
         return False
 
-    def run_live_screening(self, scan_interval: int = 60):
-        """Run live FVG screening with intelligent summary email alerts"""
+    def run_live_screening(self, scan_interval: Optional[int] = None):
+        """Run live FVG screening with priority-tiered scans and intelligent summary email alerts.
+        
+        scan_interval overrides the interval of the monitored tier (open gaps away from price).
+        """
+        if scan_interval is not None:
+            self.scheduler.intervals['monitored'] = scan_interval
         logger.info(f"Starting live FVG screening for {len(self.forex_symbols)} symbols")
-        logger.info(f"Scan interval: {scan_interval} seconds")
+        logger.info(f"Scan interval per tier: {self.scheduler.intervals} (budget {self.scheduler.budget:g} scans/s)")
         
-        # Initial scan for all symbols
-        for symbol in self.forex_symbols:
-            self.scan_symbol(symbol)
-            time.sleep(0.5)  # Small delay between symbols
+        # Initial scan for all symbols, paced by the scan budget
+        initial_start = time.monotonic()
+        while self.scheduler.unscanned:
+            if not self.scan_due_symbols():
+                time.sleep(min(self.scheduler.wait_time(), 1.0))
+        self.update_status()
         
-        logger.info("Initial scan complete. Starting live monitoring...")
+        logger.info(f"Initial scan complete ({self.scheduler.report(time.monotonic() - initial_start)}). "
+                    f"Starting live monitoring...")
         
         # Send initial summary email
         try:
             subject, html_message = self.generate_fvg_summary_email()
-            if self.send_gmail_alert(subject, html_message, is_html=True):
+            if self.send_gmail_alert(subject, html_message, is_html=True, key='summary'):
                 self.last_summary_sent = datetime.now()
-                logger.info("Initial summary email sent successfully")
+                logger.info("Initial summary email queued")
             else:
                 logger.warning("Failed to send initial summary email")
         except Exception as e:
@@ -759,28 +495,34 @@ class LiveFVGScreener:
         except Exception as e:
             logger.error(f"Failed to create initial HTML file: {e}")
         
-        # Live monitoring loop
+        # Live monitoring loop: scans as symbols come due, emails/HTML/stats every report_interval
+        last_report = time.monotonic()
         while True:
             try:
-                # Scan all symbols
-                for symbol in self.forex_symbols:
-                    self.scan_symbol(symbol)
+                # Scan the symbols that are due
+                self.scan_due_symbols()
+                
+                now = time.monotonic()
+                if now - last_report < self.report_interval:
+                    time.sleep(min(self.scheduler.wait_time(), last_report + self.report_interval - now))
+                    continue
+                self.update_status()
                 
                 # Check if we should send a summary email
                 if self.should_send_summary_email():
                     subject, html_message = self.generate_fvg_summary_email()
-                    if self.send_gmail_alert(subject, html_message, is_html=True):
+                    if self.send_gmail_alert(subject, html_message, is_html=True, key='summary'):
                         self.last_summary_sent = datetime.now()
                         
                         if self.active_alert_count > 0:
-                            logger.info(f"Summary email sent successfully - {self.active_alert_count} active alerts detected")
+                            logger.info(f"Summary email queued - {self.active_alert_count} active alerts detected")
                         else:
-                            logger.info(f"Periodic summary email sent successfully (no active alerts)")
+                            logger.info(f"Periodic summary email queued (no active alerts)")
                     else:
-                        logger.warning("Failed to send summary email (likely rate limited)")
+                        logger.warning("Summary email not queued (sending paused by rate limit)")
                 else:
                     if self.email_disabled:
-                        logger.info(f"Scan complete - emails disabled due to daily limit ({self.email_sent_today}/{self.max_daily_emails})")
+                        logger.info(f"Scan complete - emails paused by rate limit ({self.email_sent_today}/{self.max_daily_emails} today)")
                     else:
                         logger.info(f"Scan complete - no email sent (cooldown active, no alerts)")
                 
@@ -792,8 +534,8 @@ class LiveFVGScreener:
                     except Exception as e:
                         logger.error(f"Failed to update HTML file: {e}")
                 
-                logger.info(f"Scanned {len(self.forex_symbols)} symbols. Next scan in {scan_interval}s")
-                time.sleep(scan_interval)
+                logger.info(f"Scheduler: {self.scheduler.report(now - last_report)}")
+                last_report = now
                 
             except KeyboardInterrupt:
                 logger.info("Live screening stopped by user")
@@ -823,331 +565,34 @@ class LiveFVGScreener:
     
     def close_mt5(self):
         """Close MT5 connection"""
+        if self._scan_pool is not None:
+            self._scan_pool.shutdown(wait=False, cancel_futures=True)
+            self._scan_pool = None
+        self.notifier.stop()  # Sends whatever is still queued
+        self.metrics_exporter.stop()  # Final dump
+        if self.metrics.enabled:
+            logger.info(f"Latency per span (us):\n{self.metrics.report()}")
         mt5.shutdown()
         logger.info("MT5 connection closed")
     
     def generate_fvg_summary_email(self) -> tuple[str, str]:
         """Generate a professional HTML-formatted FVG summary email"""
         current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        symbol_status = {}
-        
-        for symbol, fvgs in self.symbol_data.items():
-            if symbol not in self.last_prices:
-                continue
-            
-            current_price = self.last_prices[symbol]
-            bull_count = 0
-            bear_count = 0
-            latest_time = None
-            state = "INGEN FVG"
-            state_detail = ""
-            
-            # Priority: AKTIV > NÆRMER > OVERVÅKET > INGEN FVG
-            for fvg in fvgs:
-                if fvg.is_bull:
-                    bull_count += 1
-                    if current_price <= fvg.max_price:
-                        if latest_time is None or fvg.timestamp > latest_time:
-                            state = "BULL AKTIV"
-                            state_detail = f"{fvg.timestamp.strftime('%d/%m %H:%M')}"
-
-                            latest_time = fvg.timestamp
-                else:
-                    bear_count += 1
-                    if current_price >= fvg.min_price:
-                        if latest_time is None or fvg.timestamp > latest_time:
-                            state = "BEAR AKTIV"
-                            state_detail = f"{fvg.timestamp.strftime('%d/%m %H:%M')}"
-
-                            latest_time = fvg.timestamp
-            
-            if bull_count > 0 or bear_count > 0:
-                if state == "INGEN FVG":
-                    state = "OVERVÅKET"
-            
-            symbol_status[symbol] = {
-                'state': state,
-                'detail': state_detail,
-                'bull': bull_count,
-                'bear': bear_count,
-                'total': bull_count + bear_count,
-                'price': current_price
-            }
+        status = self.status or self.update_status()
         
-        # Gruppering med fargekoder
-        grupper = [
-            ("BULL AKTIV", [], "#28a745", "🟢"),
-            ("BEAR AKTIV", [], "#dc3545", "🔴"),
-            ("BULL NÆRMER", [], "#ffc107", "🟡"),
-            ("BEAR NÆRMER", [], "#fd7e14", "🟠"),
-            ("OVERVÅKET", [], "#6c757d", "⚪"),
-        ]
-        
-        for symbol, data in symbol_status.items():
-            for group, lst, color, icon in grupper:
-                if data['state'] == group:
-                    lst.append((symbol, data))
+        # Priority in the email: AKTIV > OVERVÅKET > INGEN FVG (no NÆRMER check)
+        aktive_alerts = status.counts(summary=True)['active_alerts']
         
         # Generer HTML e-post
         subject = f"📊 FVG OVERSIKT - {current_time}"
-        
-        html_message = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="UTF-8">
-            <style>
-                body {{
-                    font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, Arial, sans-serif;
-                    margin: 0;
-                    padding: 20px;
-                    background-color: #f8f9fa;
-                }}
-                .container {{
-                    max-width: 800px;
-                    margin: 0 auto;
-                    background-color: white;
-                    border-radius: 10px;
-                    box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-                    overflow: hidden;
-                }}
-                .header {{
-                    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                    color: white;
-                    padding: 20px;
-                    text-align: center;
-                }}
-                .header h1 {{
-                    margin: 0;
-                    font-size: 28px;
-                }}
-                .header p {{
-                    margin: 10px 0 0 0;
-                    opacity: 0.9;
-                }}
-                .content {{
-                    padding: 20px;
-                }}
-                .alert-section {{
-                    margin-bottom: 30px;
-                }}
-                .alert-header {{
-                    display: flex;
-                    align-items: center;
-                    margin-bottom: 15px;
-                    padding: 10px;
-                    border-radius: 5px;
-                    font-weight: bold;
-                    font-size: 16px;
-                }}
-                .alert-active {{
-                    background-color: #d4edda;
-                    color: #155724;
-                }}
-                .alert-approaching {{
-                    background-color: #fff3cd;
-                    color: #856404;
-                }}
-                .alert-monitored {{
-                    background-color: #f8f9fa;
-                    color: #6c757d;
-                }}
-                .symbol-table {{
-                    width: 100%;
-                    border-collapse: collapse;
-                    margin-bottom: 20px;
-                }}
-                .symbol-table th {{
-                    background-color: #f8f9fa;
-                    padding: 12px;
-                    text-align: left;
-                    border-bottom: 2px solid #dee2e6;
-                    font-weight: 600;
-                }}
-                .symbol-table td {{
-                    padding: 10px 12px;
-                    border-bottom: 1px solid #dee2e6;
-                }}
-                .symbol-table tr:hover {{
-                    background-color: #f8f9fa;
-                }}
-                .status-badge {{
-                    padding: 4px 8px;
-                    border-radius: 4px;
-                    font-size: 12px;
-                    font-weight: bold;
-                    text-transform: uppercase;
-                }}
-                .status-bull-aktiv {{
-                    background-color: #d4edda;
-                    color: #155724;
-                }}
-                .status-bear-aktiv {{
-                    background-color: #f8d7da;
-                    color: #721c24;
-                }}
-                .status-bull-nærmer {{
-                    background-color: #fff3cd;
-                    color: #856404;
-                }}
-                .status-bear-nærmer {{
-                    background-color: #fce4e0;
-                    color: #975a16;
-                }}
-                .status-overvåket {{
-                    background-color: #e2e3e5;
-                    color: #383d41;
-                }}
-                .summary-box {{
-                    background-color: #f8f9fa;
-                    padding: 20px;
-                    border-radius: 8px;
-                    margin-top: 20px;
-                }}
-                .summary-stats {{
-                    display: flex;
-                    justify-content: space-between;
-                    flex-wrap: wrap;
-                }}
-                .stat-item {{
-                    text-align: center;
-                    margin: 10px;
-                }}
-                .stat-value {{
-                    font-size: 24px;
-                    font-weight: bold;
-                    color: #495057;
-                }}
-                .stat-label {{
-                    font-size: 14px;
-                    color: #6c757d;
-                }}
-                .footer {{
-                    text-align: center;
-                    padding: 20px;
-                    background-color: #f8f9fa;
-                    border-top: 1px solid #dee2e6;
-                    font-size: 12px;
-                    color: #6c757d;
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <div class="header">
-                    <h1>📊 FVG SCREENER RAPPORT</h1>
-                    <p>Generert: {current_time}</p>
-                </div>
-                
-                <div class="content">
-        """
-        
-        # Lag tabeller for hver gruppe
-        for group, lst, color, icon in grupper:
-            if lst:
-                css_class = group.lower().replace(' ', '-')
-                
-                if 'AKTIV' in group:
-                    section_class = 'alert-active'
-                elif 'NÆRMER' in group:
-                    section_class = 'alert-approaching'
-                else:
-                    section_class = 'alert-monitored'
-                
-                html_message += f"""
-                    <div class="alert-section">
-                        <div class="alert-header {section_class}">
-                            {icon} {group} ({len(lst)} symboler)
-                        </div>
-                        <table class="symbol-table">
-                            <thead>
-                                <tr>
-                                    <th>Symbol</th>
-                                    <th>Status</th>
-                                    <th>Pris</th>
-                                    <th>Tid</th>
-                                    <th>FVG Info</th>
-                                </tr>
-                            </thead>
-                            <tbody>
-                """
-                
-                for symbol, data in sorted(lst):
-                    status_class = f"status-{css_class}"
-                    fvg_info = f"{data['total']} FVG"
-                    if data['bull'] > 0 and data['bear'] > 0:
-                        fvg_info += f" ({data['bull']}🟢 {data['bear']}🔴)"
-                    elif data['bull'] > 0:
-                        fvg_info += f" ({data['bull']}🟢)"
-                    elif data['bear'] > 0:
-                        fvg_info += f" ({data['bear']}🔴)"
-                    
-                    html_message += f"""
-                                <tr>
-                                    <td><strong>{symbol}</strong></td>
-                                    <td><span class="status-badge {status_class}">{data['state']}</span></td>
-                                    <td>{data['price']:.5f}</td>
-                                    <td>{data['detail']}</td>
-                                    <td>{fvg_info}</td>
-                                </tr>
-                    """
-                
-                html_message += """
-                            </tbody>
-                        </table>
-                    </div>
-                """
-        
-        # Sammendrag
-        antall = len(symbol_status)
-        total_fvg = sum(d['total'] for d in symbol_status.values())
-        total_bull = sum(d['bull'] for d in symbol_status.values())
-        total_bear = sum(d['bear'] for d in symbol_status.values())
-        aktive_alerts = sum(1 for d in symbol_status.values() if 'AKTIV' in d['state'])
-        nærmer_alerts = sum(1 for d in symbol_status.values() if 'NÆRMER' in d['state'])
-        
-        html_message += f"""
-                    <div class="summary-box">
-                        <h3 style="margin-top: 0;">📈 SAMMENDRAG</h3>
-                        <div class="summary-stats">
-                            <div class="stat-item">
-                                <div class="stat-value">{antall}</div>
-                                <div class="stat-label">Symboler</div>
-                            </div>
-                            <div class="stat-item">
-                                <div class="stat-value">{total_fvg}</div>
-                                <div class="stat-label">Totalt FVG</div>
-                            </div>
-                            <div class="stat-item">
-                                <div class="stat-value">{total_bull}</div>
-                                <div class="stat-label">Bull FVG</div>
-                            </div>
-                            <div class="stat-item">
-                                <div class="stat-value">{total_bear}</div>
-                                <div class="stat-label">Bear FVG</div>
-                            </div>
-                            <div class="stat-item">
-                                <div class="stat-value">{aktive_alerts}</div>
-                                <div class="stat-label">Aktive Alerts</div>
-                            </div>
-                            <div class="stat-item">
-                                <div class="stat-value">{nærmer_alerts}</div>
-                                <div class="stat-label">Nærmer Seg</div>
-                            </div>
-                        </div>
-                        <div style="margin-top: 15px; padding-top: 15px; border-top: 1px solid #dee2e6; font-size: 12px; color: #6c757d;">
-                            📧 E-post status: {self.email_sent_today}/{self.max_daily_emails} sendt i dag
-                        </div>
-                    </div>
-                </div>
-                
-                <div class="footer">
-                    <p>Automatisk rapport fra din FVG Screener • Neste oppdatering om {'30 minutter' if aktive_alerts > 0 else '10 minutter'}</p>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
+        with self.metrics.span('summary_render'):
+            html_message = self.email_renderer.render(
+                status,
+                current_time=current_time,
+                emails_sent=self.email_sent_today,
+                max_emails=self.max_daily_emails,
+                next_summary='30 minutter' if aktive_alerts > 0 else '10 minutter',
+            )
         
         # Oppdater aktivt antall for e-postlogikk
         self.active_alert_count = aktive_alerts
@@ -1168,8 +613,8 @@ def main():
     print("• Initial summary sent immediately")
     print("• Active alerts: every 30 minutes (reduced frequency)")
     print("• Periodic summaries: every 10 minutes when no alerts")
-    print("• Daily limit: 80 emails (auto-disabled when reached)")
-    print("• Smart error handling for Gmail rate limits")
+    print("• Daily limit: 80 emails (token bucket, bursts coalesced into digests)")
+    print("• Sent in the background over one reused Gmail session")
     print()
     print("🌐 HTML FILE BACKUP:")
     print("• Live HTML file updated every 5 minutes")
@@ -1199,7 +644,8 @@ def main():
         timeframe=mt5.TIMEFRAME_H4,
         threshold_percent=0.0,
         auto_threshold=False,
-        lookback_days=30
+        lookback_days=30,
+        scan_budget=20  # Symbol scans per second across the whole universe
         # custom_symbols=custom_pairs  # Commented out to use auto-detection
     )
     
@@ -1208,6 +654,7 @@ def main():
     screener.max_daily_emails = 80   # Conservative daily limit
     screener.html_update_interval = 300  # Update HTML every 5 minutes
     # screener.proximity_percent = 0.1  # Adjust proximity threshold if needed
+    # screener.max_workers = 4  # Symbols scanned concurrently (1 = serial)
     
     try:
         # Show initial summary
@@ -1224,7 +671,7 @@ def main():
         print("="*50)
         
         # Start live monitoring (will run indefinitely)
-        screener.run_live_screening(scan_interval=60)  # Scan every 60 seconds
+        screener.run_live_screening(scan_interval=60)  # Symbols with gaps away from price every 60 seconds
         
     except KeyboardInterrupt:
         print("\n\nLive screening stopped by user.")
@@ -1246,16 +693,16 @@ def test_email():
             "🧪 FVG Screener Test", 
             "This is a test email from your Live FVG Screener. If you receive this, your Gmail setup is working correctly!"
         )
-        if success:
+        if success and screener.notifier.flush(timeout=60) and screener.notifier.failed == 0:
             print("Basic test email sent successfully!")
         else:
-            print("Basic test email failed!")
+            print(f"Basic test email failed! ({screener.notifier.last_error})")
         
         # Test summary email format (if there's data available)
         if screener.symbol_data:
             subject, html_message = screener.generate_fvg_summary_email()
             success = screener.send_gmail_alert(subject, html_message, is_html=True)
-            if success:
+            if success and screener.notifier.flush(timeout=60) and screener.notifier.failed == 0:
                 print("Summary email test sent successfully!")
             else:
                 print("Summary email test failed!")
@@ -1265,6 +712,7 @@ def test_email():
         # Show current email status
         print(f"Daily email count: {screener.email_sent_today}/{screener.max_daily_emails}")
         print(f"Emails disabled: {screener.email_disabled}")
+        print(f"Notifier status: {screener.notifier.status()}")
         print(f"HTML file path: {screener.html_file_path}")
         
         # Test HTML file generation
@@ -0,0 +1,170 @@
+"""Persistent per-(symbol, timeframe) OHLC bar cache with delta fetches from the terminal.
+
+Bars are stored as raw ``RATES_DTYPE`` records (one file per symbol/timeframe)
+and read through read-only memory maps. An update only asks the terminal for
+the bars after the cached tail: the cached forming bar is overwritten in
+place, newer bars are appended. Cold starts read history from disk instead of
+downloading it again, and a symbol whose broker history is shorter than the
+request is not downloaded again on every call.
+
+Windows cannot replace a file while a mapping of it is open, so the cache
+drops its own map before rewriting a file, and ``copy_rates_from_pos`` hands
+out copies rather than views into the map.
+"""
+
+import logging
+import os
+import re
+import time
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from mt5_common import RATES_DTYPE, rates_to_frame
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bar_cache')
+
+# Largest delta request before falling back to a full re-download
+MAX_DELTA_BARS = 50_000
+# Seconds before a history found shorter than requested is asked for again
+# (the terminal may still have been loading it)
+SHORT_HISTORY_RECHECK = 3600.0
+
+
+class BarCache:
+    """On-disk bar cache; ``copy_rates_from_pos`` is a drop-in for the terminal call"""
+
+    def __init__(self, terminal, root: Optional[str] = None):
+        self.terminal = terminal  # MetaTrader5 module (or a stand-in with copy_rates_from_pos)
+        self.root = root or os.environ.get('MT5_BAR_CACHE') or DEFAULT_CACHE_DIR
+        os.makedirs(self.root, exist_ok=True)
+        self._views: Dict[Tuple[str, int], np.ndarray] = {}
+        self._short_history: Dict[Tuple[str, int], float] = {}  # key -> monotonic time the broker ran out of bars
+
+    def path(self, symbol: str, timeframe: int) -> str:
+        safe = re.sub(r'[^A-Za-z0-9._-]', '_', symbol)
+        return os.path.join(self.root, f"{safe}_{timeframe}.bin")
+
+    def cached(self, symbol: str, timeframe: int) -> np.ndarray:
+        """All cached bars (oldest first) as a read-only memory-mapped view; do not keep it across updates"""
+        key = (symbol, timeframe)
+        view = self._views.get(key)
+        if view is None:
+            view = self._map(key)
+        return view
+
+    def _map(self, key: Tuple[str, int]) -> np.ndarray:
+        path = self.path(*key)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        count = size // RATES_DTYPE.itemsize
+        if count == 0:
+            view = np.empty(0, dtype=RATES_DTYPE)
+        else:
+            view = np.memmap(path, dtype=RATES_DTYPE, mode='r', shape=(count,))
+        self._views[key] = view
+        return view
+
+    def _rewrite(self, key: Tuple[str, int], rates: np.ndarray):
+        path = self.path(*key)
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(rates.tobytes())
+        # Unmap first (the map closes with its last reference); Windows refuses to replace a mapped file
+        self._views.pop(key, None)
+        try:
+            os.replace(tmp, path)
+        except PermissionError:
+            # A view from cached() is still held elsewhere: a longer history can be written over the
+            # mapped file in place, a shorter one has to wait for the next update
+            if len(rates) * RATES_DTYPE.itemsize < os.path.getsize(path):
+                os.remove(tmp)
+                logger.warning(f"{path} is mapped elsewhere; rewrite postponed")
+                return
+            with open(path, 'r+b') as f:
+                f.write(rates.tobytes())
+            os.remove(tmp)
+        self._map(key)
+
+    def update(self, symbol: str, timeframe: int, count: int) -> int:
+        """Bring the cache up to date with at least ``count`` recent bars; returns the number of bars written"""
+        key = (symbol, timeframe)
+        cached = self.cached(symbol, timeframe)
+        n_cached = len(cached)
+        tail_time = cached['time'][-1] if n_cached else None
+        del cached  # No reference to the map may outlive a rewrite of its file
+
+        short = self._short_history.get(key)
+        if n_cached < count and (short is None or time.monotonic() - short > SHORT_HISTORY_RECHECK):
+            # Cold start, or more history requested than cached
+            rates = self.terminal.copy_rates_from_pos(symbol, timeframe, 0, count)
+            if rates is None or len(rates) == 0:
+                return 0
+            rates = np.asarray(rates).astype(RATES_DTYPE)
+            if len(rates) < count:
+                # The broker has no more bars; later calls fetch the delta only
+                self._short_history[key] = time.monotonic()
+            else:
+                self._short_history.pop(key, None)
+            if len(rates) > n_cached:
+                self._rewrite(key, rates)
+                return len(rates)
+        if tail_time is None:
+            return 0
+
+        request = 2
+        while True:
+            rates = self.terminal.copy_rates_from_pos(symbol, timeframe, 0, request)
+            if rates is None or len(rates) == 0:
+                return 0
+            if rates['time'][0] <= tail_time or len(rates) < request:
+                break
+            if request >= MAX_DELTA_BARS:
+                # Too far behind for a delta; download the window again
+                rates = self.terminal.copy_rates_from_pos(symbol, timeframe, 0, max(count, n_cached))
+                if rates is None or len(rates) == 0:
+                    return 0
+                self._rewrite(key, np.asarray(rates).astype(RATES_DTYPE))
+                return len(rates)
+            request *= 8
+
+        rates = np.asarray(rates).astype(RATES_DTYPE)
+        fresh = rates[rates['time'] >= tail_time]
+        if len(fresh) == 0:
+            return 0
+        if fresh['time'][0] != tail_time:
+            # History does not connect to the cached tail (e.g. the broker rebuilt it)
+            self._rewrite(key, rates)
+            return len(rates)
+
+        path = self.path(symbol, timeframe)
+        self._views.pop(key, None)
+        with open(path, 'r+b') as f:
+            # Repair the bar that was still forming when it was cached, then append the rest
+            f.seek((n_cached - 1) * RATES_DTYPE.itemsize)
+            f.write(fresh.tobytes())
+        self._map(key)
+        return len(fresh)
+
+    def copy_rates_from_pos(self, symbol: str, timeframe: int, start_pos: int, count: int) -> Optional[np.ndarray]:
+        """Same contract as ``mt5.copy_rates_from_pos``, served from the updated cache.
+
+        Returns a copy, so callers never keep the cache file mapped.
+        """
+        self.update(symbol, timeframe, start_pos + count)
+        cached = self.cached(symbol, timeframe)
+        if len(cached) == 0:
+            return None
+        end = len(cached) - start_pos
+        if end <= 0:
+            return None
+        return np.array(cached[max(0, end - count):end])
+
+    def frame(self, symbol: str, timeframe: int, count: int, start_pos: int = 0) -> Optional[pd.DataFrame]:
+        """Time-indexed OHLC DataFrame of the requested bars"""
+        rates = self.copy_rates_from_pos(symbol, timeframe, start_pos, count)
+        if rates is None:
+            return None
+        return rates_to_frame(rates)
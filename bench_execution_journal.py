@@ -0,0 +1,97 @@
+"""Benchmark: execution journal append cost and summary time over millions of records.
+
+Usage:
+    python bench_execution_journal.py [--records 5000000] [--appends 20000] [--path bench_executions.bin]
+
+A synthetic journal is written in bulk (same header and record layout as
+``ExecutionJournal``), then read back with ``read_journal`` and summarized.
+The per-order cost of ``ExecutionJournal.record`` is timed separately, and the
+summary's fill count and slippage median are checked against direct NumPy.
+"""
+
+import argparse
+import os
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from execution_journal import (EXECUTION_DTYPE, TRADE_RETCODE_DONE, ExecutionJournal, _header,
+                               read_journal, summarize)
+
+Result = namedtuple('Result', 'retcode deal order volume price')
+
+
+def synthetic_records(n: int, seed: int = 11) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    records = np.zeros(n, dtype=EXECUTION_DTYPE)
+    decision = 1_700_000_000_000_000_000 + np.cumsum(rng.integers(1_000_000, 50_000_000, n))
+    records['decision_ns'] = decision
+    records['send_ns'] = decision + rng.lognormal(np.log(300_000), 0.8, n).astype(np.int64)
+    records['fill_ns'] = records['send_ns'] + rng.lognormal(np.log(2_000_000), 0.6, n).astype(np.int64)
+    records['symbol'] = np.where(rng.random(n) < 0.5, b'BTCUSD', b'EURUSD')
+    records['side'] = np.where(rng.random(n) < 0.5, 1, -1)
+    records['retcode'] = np.where(rng.random(n) < 0.97, TRADE_RETCODE_DONE, 10004)
+    records['deviation'] = 20
+    records['volume'] = records['filled_volume'] = 0.1
+    records['point'] = 0.01
+    records['requested_price'] = 60_000 + rng.normal(0, 50, n).round(2)
+    slip_points = np.round(rng.normal(0.5, 3, n))
+    records['fill_price'] = records['requested_price'] + records['side'] * slip_points * 0.01
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--records', type=int, default=5_000_000)
+    parser.add_argument('--appends', type=int, default=20_000)
+    parser.add_argument('--path', default='bench_executions.bin')
+    args = parser.parse_args()
+
+    append_path = args.path + '.append'
+    for path in (args.path, append_path):
+        if os.path.exists(path):
+            os.remove(path)
+    try:
+        journal = ExecutionJournal(append_path)
+        request = {'symbol': 'BTCUSD', 'type': 0, 'volume': 0.1, 'price': 60_000.0, 'deviation': 20,
+                   'magic': 12345, 'type_filling': 1}
+        result = Result(TRADE_RETCODE_DONE, 1, 1, 0.1, 60_000.5)
+        start = time.perf_counter()
+        for _ in range(args.appends):
+            t = journal.clock()
+            journal.record(request, result, t, t, t, 0.01)
+        append_us = (time.perf_counter() - start) / args.appends * 1e6
+        journal.close()
+        assert len(read_journal(append_path)) == args.appends
+
+        records = synthetic_records(args.records)
+        with open(args.path, 'wb') as f:
+            f.write(_header())
+            records.tofile(f)
+
+        start = time.perf_counter()
+        journal_records = read_journal(args.path)
+        summary = summarize(journal_records)
+        summary_s = time.perf_counter() - start
+
+        done = records['retcode'] == TRADE_RETCODE_DONE
+        expected = np.median((records['fill_price'][done] - records['requested_price'][done])
+                             * records['side'][done] / 0.01)
+        if summary['slippage_points']['count'] != done.sum() or \
+                not np.isclose(summary['slippage_points']['p50'], expected):
+            raise SystemExit(f"Summary mismatch: {summary['slippage_points']} vs {done.sum()} fills, median {expected}")
+
+        size_mb = os.path.getsize(args.path) / 1e6
+        print(f"append: {append_us:.1f} us per order (record + flush)")
+        print(f"summary: {len(journal_records):,} records ({size_mb:.0f} MB) in {summary_s * 1000:.0f} ms")
+        print(f"slippage p50/p99 {summary['slippage_points']['p50']:.1f}/{summary['slippage_points']['p99']:.1f} points | "
+              f"round trip p50/p99 {summary['round_trip_us']['p50']:.0f}/{summary['round_trip_us']['p99']:.0f} us")
+    finally:
+        for path in (args.path, append_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Benchmark: per-bar iloc FVG loop vs. the vectorized fvg_engine on synthetic bars.
+
+Usage:
+    python bench_fvg_detection.py [--sizes 10000 100000 1000000] [--reference-max 100000] [--auto]
+
+The reference loop is a copy of the pre-vectorization ``detect_fvgs_for_symbol``
+body. It is skipped above ``--reference-max`` bars because it takes minutes at
+1M bars; for the sizes where both run, outputs are compared.
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from fvg_engine import FVG, ThresholdState, detect_fvgs
+
+
+def synthetic_ohlc(n: int, seed: int = 42) -> pd.DataFrame:
+    """Random-walk H4-like OHLC bars with enough gaps to exercise both branches"""
+    rng = np.random.default_rng(seed)
+    close = 1.1 * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+    open_ = np.empty(n)
+    open_[0] = close[0]
+    open_[1:] = close[:-1]
+    spread = np.abs(rng.normal(0, 0.0015, n)) * close
+    high = np.maximum(open_, close) + spread
+    low = np.minimum(open_, close) - spread
+    index = pd.date_range('2000-01-03', periods=n, freq='4h', name='time')
+    return pd.DataFrame({'open': open_, 'high': high, 'low': low, 'close': close}, index=index)
+
+
+def reference_detect(df: pd.DataFrame, threshold: float, auto_threshold: bool = False) -> list:
+    """Original per-bar detection loop"""
+    fvgs = []
+    for i in range(2, len(df)):
+        current = df.iloc[i]
+        prev1 = df.iloc[i-1]
+        prev2 = df.iloc[i-2]
+
+        if auto_threshold:
+            window = df.iloc[:i+1]
+            threshold = ((window['high'] - window['low']) / window['low']).expanding().mean().iloc[-1]
+
+        bull_fvg = (current['low'] > prev2['high'] and
+                    prev1['close'] > prev2['high'] and
+                    (current['low'] - prev2['high']) / prev2['high'] > threshold)
+
+        bear_fvg = (current['high'] < prev2['low'] and
+                    prev1['close'] < prev2['low'] and
+                    (prev2['low'] - current['high']) / current['high'] > threshold)
+
+        if bull_fvg:
+            fvgs.append(FVG(current['low'], prev2['high'], True, current.name, i))
+        elif bear_fvg:
+            fvgs.append(FVG(prev2['low'], current['high'], False, current.name, i))
+    return fvgs
+
+
+def timed(fn, *args, repeat: int = 1):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--reference-max', type=int, default=100_000)
+    parser.add_argument('--threshold', type=float, default=0.0, help='threshold in percent')
+    parser.add_argument('--auto', action='store_true',
+                        help='auto threshold (the reference loop is quadratic, keep --reference-max small)')
+    args = parser.parse_args()
+
+    def vectorized(df):
+        if args.auto:
+            return detect_fvgs(df, ThresholdState().extend(df['high'].to_numpy(), df['low'].to_numpy()))
+        return detect_fvgs(df, args.threshold / 100)
+
+    print(f"{'bars':>10} {'fvgs':>8} {'loop [s]':>10} {'vector [s]':>11} {'speedup':>9}")
+    for n in args.sizes:
+        df = synthetic_ohlc(n)
+        vec_time, vec_fvgs = timed(vectorized, df, repeat=3)
+
+        if n <= args.reference_max:
+            ref_time, ref_fvgs = timed(reference_detect, df, args.threshold / 100, args.auto)
+            if ref_fvgs != vec_fvgs:
+                raise SystemExit(f"Output mismatch at {n} bars: {len(ref_fvgs)} vs {len(vec_fvgs)} FVGs")
+            print(f"{n:>10} {len(vec_fvgs):>8} {ref_time:>10.3f} {vec_time:>11.4f} {ref_time / vec_time:>8.0f}x")
+        else:
+            print(f"{n:>10} {len(vec_fvgs):>8} {'-':>10} {vec_time:>11.4f} {'-':>9}")
+
+
+if __name__ == "__main__":
+    main()
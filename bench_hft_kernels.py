@@ -0,0 +1,136 @@
+"""Benchmark: per-tick Python loops vs. the hft_kernels NumPy kernels on synthetic ticks.
+
+Usage:
+    python bench_hft_kernels.py [--sizes 1000 10000 100000] [--repeat 5]
+
+The reference functions are copies of the pre-vectorization detector bodies
+from ``detect_algo_patterns`` / ``validate_pattern`` (with ``tick.last`` read
+as ``tick['last']``, which the structured tick records require). Outputs are
+compared for every size before timing is reported.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+import hft_kernels
+from mt5_common import TICKS_DTYPE
+
+
+def synthetic_ticks(n: int, seed: int = 7) -> np.ndarray:
+    """BTC-like ticks with repeated price levels and bursts of equal-sized trades"""
+    rng = np.random.default_rng(seed)
+    ticks = np.zeros(n, dtype=TICKS_DTYPE)
+    ticks['last'] = np.round(60_000 + np.cumsum(rng.normal(0, 0.15, n)), 2)
+    ticks['volume'] = rng.integers(1, 40, n)
+    bursts = rng.random(n) < 0.3
+    ticks['volume'][bursts] = 10
+    ticks['time_msc'] = 1_700_000_000_000 + np.arange(n) * 50
+    return ticks
+
+
+def synthetic_book(levels: int = 50, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    bids = [[60_000 - i * 0.5, float(rng.integers(1, 500))] for i in range(levels)]
+    asks = [[60_000.5 + i * 0.5, float(rng.integers(1, 500))] for i in range(levels)]
+    return bids, asks
+
+
+def reference_patterns(ticks, book):
+    """Original detector arithmetic; returns the numbers the decisions are made from"""
+    out = {}
+    mid_point = len(ticks) // 2
+    first_half_volume = sum(abs(tick['volume']) for tick in ticks[:mid_point])
+    second_half_volume = sum(abs(tick['volume']) for tick in ticks[mid_point:])
+    out['volume_increase'] = second_half_volume / first_half_volume if first_half_volume > 0 else 0
+    recent_prices = [tick['last'] for tick in ticks[-20:]]
+    out['price_change'] = (recent_prices[-1] - recent_prices[0]) / recent_prices[0] if recent_prices[0] != 0 else 0
+
+    out['iceberg'] = None
+    price_levels = {}
+    for tick in ticks[-100:]:
+        price = round(tick['last'], 1)
+        if price not in price_levels:
+            price_levels[price] = []
+        price_levels[price].append(abs(tick['volume']))
+    for price, amounts in price_levels.items():
+        if len(amounts) < 5:
+            continue
+        amounts = np.array(amounts)
+        mean_size = np.mean(amounts)
+        size_deviation = np.std(amounts) / mean_size if mean_size > 0 else 0
+        if size_deviation < 0.3 and len(amounts) >= 5:
+            out['iceberg'] = (float(price), len(amounts), float(mean_size), float(size_deviation))
+            break
+
+    recent_ticks = ticks[-30:]
+    recent_volume = sum(abs(tick['volume']) for tick in recent_ticks)
+    avg_trade_size = recent_volume / len(recent_ticks) if len(recent_ticks) > 0 else 0
+    out['large_trades'] = len([tick for tick in recent_ticks if abs(tick['volume']) > avg_trade_size * 3])
+    bid_volume = sum(b[1] for b in book[0][:5])
+    ask_volume = sum(a[1] for a in book[1][:5])
+    out['book_imbalance'] = (bid_volume - ask_volume) / (bid_volume + ask_volume) if (bid_volume + ask_volume) != 0 else 0
+
+    recent_volume = sum(abs(tick['volume']) for tick in ticks[-20:])
+    avg_volume = sum(abs(tick['volume']) for tick in ticks) / len(ticks)
+    out['volume_ratio'] = recent_volume / avg_volume if avg_volume > 0 else 0
+    return out
+
+
+def kernel_patterns(ticks, book):
+    out = {}
+    cum = hft_kernels.cumulative_volume(ticks)
+    out['volume_increase'] = hft_kernels.volume_acceleration(cum)
+    out['price_change'] = hft_kernels.price_change(ticks['last'], 20)
+    level = hft_kernels.iceberg_level(ticks, window=100, min_count=5, max_deviation=0.3)
+    out['iceberg'] = None if level is None else tuple(level)
+    out['large_trades'] = hft_kernels.large_trade_count(cum, ticks['volume'], window=30, factor=3)
+    out['book_imbalance'] = hft_kernels.book_imbalance(book[0], book[1], 5)
+    out['volume_ratio'] = hft_kernels.recent_volume_ratio(cum, 20)
+    return out
+
+
+def same(a: dict, b: dict) -> bool:
+    """Exact for counts and sums; iceberg statistics may differ in the last bits (summation order)"""
+    for key in a:
+        x, y = a[key], b[key]
+        if key == 'iceberg':
+            if (x is None) != (y is None):
+                return False
+            if x is not None and (x[:2] != y[:2] or not np.allclose(x[2:], y[2:], rtol=1e-12, atol=0)):
+                return False
+        elif float(x) != float(y):
+            return False
+    return True
+
+
+def timed(fn, *args, repeat: int = 1):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    book = synthetic_book()
+    print(f"{'ticks':>10} {'loop [ms]':>10} {'kernel [ms]':>12} {'speedup':>9}")
+    for n in args.sizes:
+        ticks = synthetic_ticks(n)
+        ref_time, ref = timed(reference_patterns, ticks, book, repeat=args.repeat)
+        vec_time, vec = timed(kernel_patterns, ticks, book, repeat=args.repeat)
+        if not same(ref, vec):
+            raise SystemExit(f"Output mismatch at {n} ticks:\n  loop   {ref}\n  kernel {vec}")
+        print(f"{n:>10} {ref_time * 1000:>10.2f} {vec_time * 1000:>12.3f} {ref_time / vec_time:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
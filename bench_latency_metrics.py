@@ -0,0 +1,77 @@
+"""Benchmark: per-span cost of latency_metrics and histogram accuracy vs. exact percentiles.
+
+Usage:
+    python bench_latency_metrics.py [--spans 1000000] [--samples 1000000]
+
+The overhead of ``with metrics.span(...)`` and ``start()``/``stop()`` is the
+loop time minus an empty loop, with recording enabled and disabled. Accuracy
+compares the histogram percentiles on log-normal latencies with
+``np.percentile``; every bucket's upper bound is within ``2 ** -SUB_BUCKET_BITS``
+of the values it holds.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from latency_metrics import SUB_BUCKET_BITS, LatencyHistogram, Metrics
+
+
+def loop_ns(fn, n: int) -> float:
+    start = time.perf_counter()
+    fn(n)
+    return (time.perf_counter() - start) / n * 1e9
+
+
+def empty(n: int):
+    for _ in range(n):
+        pass
+
+
+def spans(metrics: Metrics):
+    def run(n: int):
+        for _ in range(n):
+            with metrics.span('bench'):
+                pass
+    return run
+
+
+def start_stop(metrics: Metrics):
+    def run(n: int):
+        for _ in range(n):
+            t0 = metrics.start()
+            metrics.stop('bench', t0)
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--spans', type=int, default=1_000_000)
+    parser.add_argument('--samples', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    base = loop_ns(empty, args.spans)
+    print(f"{'recording':<22} {'enabled [ns]':>13} {'disabled [ns]':>14}")
+    for label, make in (('with span()', spans), ('start()/stop()', start_stop)):
+        on = loop_ns(make(Metrics(enabled=True)), args.spans) - base
+        off = loop_ns(make(Metrics(enabled=False)), args.spans) - base
+        print(f"{label:<22} {on:>13.0f} {off:>14.0f}")
+
+    rng = np.random.default_rng(3)
+    values = rng.lognormal(np.log(200_000), 1.2, args.samples).astype(np.int64)  # ~0.2 ms median
+    histogram = LatencyHistogram()
+    histogram.record_many(values)
+    bound = 2.0 ** -SUB_BUCKET_BITS
+    print(f"\n{'percentile':>10} {'exact [us]':>11} {'histogram [us]':>15} {'error':>8}")
+    for q in (50, 90, 99, 99.9, 100):
+        exact = np.percentile(values, q, method='inverted_cdf')
+        got = histogram.percentile(q)
+        error = (got - exact) / exact
+        print(f"{q:>10g} {exact / 1000:>11.1f} {got / 1000:>15.1f} {error:>8.2%}")
+        if not 0 <= error <= bound:
+            raise SystemExit(f"p{q:g} off by {error:.2%} (bound {bound:.2%})")
+
+
+if __name__ == "__main__":
+    main()
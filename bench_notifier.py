@@ -0,0 +1,211 @@
+"""Benchmark: EmailNotifier against a local SMTP stand-in, with injected server failures.
+
+Usage:
+    python bench_notifier.py [--messages 2000] [--drop-every 50] [--reject 1]
+    python bench_notifier.py --serve [--port 2525]    # Just the loopback server, prints what it receives
+
+``LoopbackSmtpServer`` speaks enough SMTP (EHLO/HELO, MAIL, RCPT, DATA, RSET,
+NOOP, QUIT) for ``smtplib`` and keeps the received messages in memory. It can
+drop the connection on every Nth ``MAIL`` (the notifier reconnects its pooled
+session) and answer the first N ``DATA`` with a temporary 451 error.
+
+The benchmark times ``notify()`` on the caller's thread, then compares one
+SMTP connection per email (the scripts' old ``send_email``) with the
+notifier's pooled session. The last part has the server reject the first
+delivery under a limiter of one token per day. The rejected email must still
+go out after the 5 s backoff, which only works if the failed attempt gave its
+token back.
+"""
+
+import argparse
+import email
+import smtplib
+import socketserver
+import threading
+import time
+from email.message import Message
+from email.mime.text import MIMEText
+from typing import List, Optional
+
+import numpy as np
+
+from mt5_common import TokenBucket
+from notifier import EmailNotifier, SmtpSettings
+
+
+class LoopbackSmtpServer:
+    """Minimal in-process SMTP server on localhost for tests and offline runs"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, drop_every: int = 0, reject: int = 0,
+                 echo: bool = False):
+        self.drop_every = drop_every  # Close the connection on every Nth MAIL (0 = never)
+        self.reject = reject  # Answer this many DATA with 451 before accepting
+        self.echo = echo
+        self.messages: List[Message] = []
+        self.connections = 0
+        self.mails = 0
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                server._serve(self)
+
+        self._server = socketserver.ThreadingTCPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self.address = self._server.server_address
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> 'LoopbackSmtpServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, name='smtp-loopback', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _serve(self, handler):
+        def reply(text: str):
+            handler.wfile.write((text + '\r\n').encode('ascii'))
+            handler.wfile.flush()
+
+        with self._lock:
+            self.connections += 1
+        reply('220 loopback ESMTP')
+        for raw in handler.rfile:
+            command = raw.decode('ascii', 'replace').strip()
+            verb = command[:4].upper()
+            if verb == 'EHLO':
+                reply('250-loopback')
+                reply('250 8BITMIME')
+            elif verb == 'MAIL':
+                with self._lock:
+                    self.mails += 1
+                    drop = self.drop_every and self.mails % self.drop_every == 0
+                if drop:
+                    return  # Hang up mid-session, like a server closing an idle connection
+                reply('250 OK')
+            elif verb == 'DATA':
+                reply('354 End data with <CR><LF>.<CR><LF>')
+                lines = []
+                for line in handler.rfile:
+                    if line in (b'.\r\n', b'.\n'):
+                        break
+                    lines.append(line[1:] if line.startswith(b'..') else line)
+                with self._lock:
+                    rejected = self.reject > 0
+                    if rejected:
+                        self.reject -= 1
+                    else:
+                        self.messages.append(email.message_from_bytes(b''.join(lines)))
+                if rejected:
+                    reply('451 4.3.0 Temporary failure, try again later')
+                    continue
+                if self.echo:
+                    print(f"{time.strftime('%H:%M:%S')} {self.messages[-1]['Subject']}")
+                reply('250 OK queued')
+            elif verb == 'QUIT':
+                reply('221 Bye')
+                return
+            elif verb in ('HELO', 'RCPT', 'RSET', 'NOOP'):
+                reply('250 OK')
+            else:
+                reply('502 Command not implemented')
+
+
+def settings(server: LoopbackSmtpServer) -> SmtpSettings:
+    host, port = server.address
+    return SmtpSettings(host, port, sender='bench@localhost', recipient='inbox@localhost', starttls=False)
+
+
+def send_per_connection(s: SmtpSettings, n: int) -> float:
+    """Seconds per email when every email opens its own SMTP connection"""
+    start = time.perf_counter()
+    for i in range(n):
+        msg = MIMEText(f"body {i}")
+        msg['From'], msg['To'], msg['Subject'] = s.sender, s.recipient, f"direct {i}"
+        with smtplib.SMTP(s.host, s.port, timeout=s.timeout) as smtp:
+            smtp.send_message(msg)
+    return (time.perf_counter() - start) / n
+
+
+def send_pooled(notifier: EmailNotifier, n: int) -> float:
+    """Seconds per email through the notifier's pooled session (one email per flush, no digests)"""
+    start = time.perf_counter()
+    for i in range(n):
+        notifier.notify(f"pooled {i}", f"body {i}")
+        notifier.flush()
+    return (time.perf_counter() - start) / n
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=2000)
+    parser.add_argument('--drop-every', type=int, default=50, help='server hangs up on every Nth MAIL')
+    parser.add_argument('--reject', type=int, default=1, help='451 replies before the refund check succeeds')
+    parser.add_argument('--serve', action='store_true', help='only run the loopback server')
+    parser.add_argument('--port', type=int, default=2525)
+    args = parser.parse_args()
+
+    if args.serve:
+        server = LoopbackSmtpServer(port=args.port, echo=True).start()
+        print(f"SMTP loopback on {server.address[0]}:{server.address[1]} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            server.stop()
+        return
+
+    n = args.messages
+    server = LoopbackSmtpServer(drop_every=args.drop_every).start()
+
+    # notify() cost: a queue put on the caller's thread; the burst goes out as a digest
+    notifier = EmailNotifier(settings(server), TokenBucket(1e9, 1e9))
+    times = np.empty(n)
+    for i in range(n):
+        t0 = time.perf_counter_ns()
+        notifier.notify(f"burst {i}", f"body {i}", key=f"k{i % 20}")
+        times[i] = time.perf_counter_ns() - t0
+    notifier.flush()
+    notifier.stop()
+    print(f"notify() on the caller's thread: p50 {np.percentile(times, 50) / 1000:.1f} us, "
+          f"p99 {np.percentile(times, 99) / 1000:.1f} us ({n} calls, {notifier.sent} email(s) sent, "
+          f"{notifier.coalesced} coalesced)")
+
+    notifier = EmailNotifier(settings(server), TokenBucket(1e9, 1e9), digest_window=0)
+
+    k = max(1, n // 10)
+    server.drop_every = 0  # smtplib alone does not reconnect
+    direct = send_per_connection(settings(server), k)
+    server.drop_every = args.drop_every
+    connections = server.connections
+    pooled = send_pooled(notifier, k)
+    print(f"\n{'send path':<22} {'per email [ms]':>15} {'connections':>12}")
+    print(f"{'connection per email':<22} {direct * 1000:>15.2f} {k:>12}")
+    print(f"{'pooled session':<22} {pooled * 1000:>15.2f} {server.connections - connections:>12}")
+    notifier.stop()
+    status = notifier.status()
+    if status['failed']:
+        raise SystemExit(f"{status['failed']} sends failed with drops every {args.drop_every} mails: "
+                         f"{status['last_error']}")
+
+    # A rejected email must not use up the only token of the day
+    server.reject = args.reject
+    received = len(server.messages)
+    notifier = EmailNotifier(settings(server), TokenBucket.per_day(1, burst=1), digest_window=0)
+    start = time.monotonic()
+    notifier.notify("refund check", "rejected first, then accepted")
+    done = notifier.flush(timeout=5 * 2 ** args.reject + 5)
+    delivered = len(server.messages) - received  # Before stop(), which sends regardless of the limiter
+    notifier.stop(timeout=1)
+    print(f"\nrejected {args.reject}x with 1 token/day: delivered {delivered} after "
+          f"{time.monotonic() - start:.1f}s, {notifier.failed} failed attempt(s)")
+    server.stop()
+    if not done or delivered != 1:
+        raise SystemExit("failed send kept its rate-limit token; the retry could not go out")
+
+
+if __name__ == "__main__":
+    main()
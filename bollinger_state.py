@@ -0,0 +1,125 @@
+"""Incremental Bollinger Band state per symbol.
+
+The closed-bar part of the window is kept as running (shifted) sums that change
+by one term when a bar closes; ticks only replace the forming bar's close. This
+gives the same mid band as ``close.rolling(period).mean().iloc[-1]`` over the
+last ``period`` bars (forming bar included) without rebuilding a DataFrame.
+"""
+
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Optional, Tuple
+
+import numpy as np
+
+from mt5_common import timeframe_seconds
+
+
+@dataclass
+class BandState:
+    """Running Bollinger window of one symbol"""
+    period: int
+    shift: float  # Sums are kept relative to this price to limit cancellation in the variance
+    closed: Deque[float] = field(default_factory=deque)  # Last period-1 closed closes
+    closed_sum: float = 0.0  # Sum of (close - shift) over closed
+    closed_sumsq: float = 0.0  # Sum of (close - shift)**2 over closed
+    forming_time: int = 0  # Open time of the forming bar (server seconds)
+    forming_close: float = 0.0
+    bars_since_resum: int = 0
+
+    def push_closed(self, close: float):
+        """Add a closed bar and drop the oldest one (O(1))"""
+        x = close - self.shift
+        self.closed.append(close)
+        self.closed_sum += x
+        self.closed_sumsq += x * x
+        if len(self.closed) > self.period - 1:
+            old = self.closed.popleft() - self.shift
+            self.closed_sum -= old
+            self.closed_sumsq -= old * old
+        self.bars_since_resum += 1
+        if self.bars_since_resum >= self.period:
+            self.resum()
+
+    def resum(self):
+        """Recompute the running sums from the window to stop floating-point drift"""
+        x = np.fromiter(self.closed, dtype=np.float64) - self.shift
+        self.closed_sum = float(x.sum())
+        self.closed_sumsq = float((x * x).sum())
+        self.bars_since_resum = 0
+
+    def stats(self, price: Optional[float] = None) -> Tuple[float, float]:
+        """Mean and population standard deviation of the window with ``price`` as forming close"""
+        x = (self.forming_close if price is None else price) - self.shift
+        n = len(self.closed) + 1
+        mean = (self.closed_sum + x) / n
+        var = max(0.0, (self.closed_sumsq + x * x) / n - mean * mean)
+        return mean + self.shift, var ** 0.5
+
+
+class BollingerCache:
+    """Per-symbol Bollinger state, updated once per tick and shared by every position on the symbol"""
+
+    def __init__(self, bar_source, timeframe: int, period: int = 20, deviations: float = 2.0):
+        self.bar_source = bar_source  # Anything with copy_rates_from_pos: the terminal or a BarCache
+        self.timeframe = timeframe
+        self.period = period
+        self.deviations = deviations
+        self.states: Dict[str, BandState] = {}
+        self._bar_seconds = timeframe_seconds(timeframe)
+
+    def _seed(self, symbol: str) -> Optional[BandState]:
+        rates = self.bar_source.copy_rates_from_pos(symbol, self.timeframe, 0, self.period)
+        if rates is None or len(rates) < self.period:
+            self.states.pop(symbol, None)
+            return None
+        closes = np.asarray(rates['close'], dtype=np.float64)
+        state = BandState(period=self.period, shift=float(closes[-1]))
+        state.closed.extend(float(c) for c in closes[:-1])
+        state.resum()
+        state.forming_time = int(rates['time'][-1])
+        state.forming_close = float(closes[-1])
+        self.states[symbol] = state
+        return state
+
+    def update(self, symbol: str, price: Optional[float] = None,
+               tick_time: Optional[int] = None) -> Optional[BandState]:
+        """Apply a tick (forming-bar close and server time) to the symbol's window.
+
+        Bars are only requested when the tick time shows that the forming bar has
+        closed; then the closed bar enters the window in O(1).
+        """
+        state = self.states.get(symbol)
+        if state is None:
+            state = self._seed(symbol)
+            if state is None:
+                return None
+        elif tick_time is not None and tick_time >= state.forming_time + self._bar_seconds:
+            rates = self.bar_source.copy_rates_from_pos(symbol, self.timeframe, 0, 2)
+            if rates is None or len(rates) < 2:
+                return state
+            if int(rates['time'][0]) == state.forming_time:
+                state.push_closed(float(rates['close'][0]))
+                state.forming_time = int(rates['time'][1])
+                state.forming_close = float(rates['close'][1])
+            elif int(rates['time'][1]) != state.forming_time:
+                # More than one bar passed since the last tick; rebuild the window
+                state = self._seed(symbol)
+                if state is None:
+                    return None
+
+        if price is not None:
+            state.forming_close = float(price)
+        return state
+
+    def midband(self, symbol: str) -> Optional[float]:
+        state = self.states.get(symbol)
+        return None if state is None else state.stats()[0]
+
+    def bands(self, symbol: str) -> Optional[Tuple[float, float, float]]:
+        """(lower, mid, upper) with the forming bar included, or None if not enough bars"""
+        state = self.states.get(symbol)
+        if state is None:
+            return None
+        mid, std = state.stats()
+        return mid - self.deviations * std, mid, mid + self.deviations * std
@@ -0,0 +1,132 @@
+"""Append-only columnar result store: one raw binary file per column.
+
+A store is a directory with ``schema.json`` (column names and NumPy dtypes)
+and one subdirectory per part holding a ``{column}.bin`` file per column.
+Every writer appends whole chunks to its own part, so the processes of a pool
+write side by side without locks. ``read_columns`` memory-maps only the
+columns asked for and concatenates the parts, so aggregating a few columns
+over millions of rows never reads the others.
+
+Strings are fixed-width bytes (``'S16'``); ``read_frame`` decodes them. With
+pyarrow installed, ``read_frame(root).to_parquet(...)`` exports a store.
+
+Usage:
+    python column_store.py sweep_results [--columns terminal_pnl trades] [--head 20]
+"""
+
+import argparse
+import json
+import os
+from typing import Dict, Iterable, List, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+SCHEMA_FILE = 'schema.json'
+
+
+def read_schema(root: str) -> Dict[str, np.dtype]:
+    with open(os.path.join(root, SCHEMA_FILE)) as f:
+        return {name: np.dtype(dtype) for name, dtype in json.load(f).items()}
+
+
+def _write_schema(root: str, schema: Dict[str, np.dtype]):
+    """Create ``schema.json``, or check that the existing one matches"""
+    wanted = {name: dtype.str for name, dtype in schema.items()}
+    path = os.path.join(root, SCHEMA_FILE)
+    if not os.path.exists(path):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(wanted, f, indent=1)
+        os.replace(tmp, path)  # Concurrent writers all write the same schema
+    existing = {name: dtype.str for name, dtype in read_schema(root).items()}
+    if existing != wanted:
+        raise ValueError(f"{root} holds columns {existing}, not {wanted}")
+
+
+class ColumnWriter:
+    """Appends chunks of equal-length columns to one part of a store"""
+
+    def __init__(self, root: str, schema: Mapping[str, object], part: str = 'part-0'):
+        self.root = root
+        self.schema = {name: np.dtype(dtype) for name, dtype in schema.items()}
+        self.rows = 0  # Appended by this writer
+        os.makedirs(os.path.join(root, part), exist_ok=True)
+        _write_schema(root, self.schema)
+        self._files = {name: open(os.path.join(root, part, f"{name}.bin"), 'ab') for name in self.schema}
+
+    def append(self, columns: Mapping[str, Iterable]) -> int:
+        """Append one chunk (every schema column, same length); returns its row count"""
+        arrays = {name: np.asarray(columns[name], dtype=dtype) for name, dtype in self.schema.items()}
+        lengths = {len(a) for a in arrays.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"Columns of one chunk differ in length: {lengths}")
+        for name, array in arrays.items():
+            self._files[name].write(np.ascontiguousarray(array).tobytes())
+        for f in self._files.values():
+            f.flush()
+        n = lengths.pop() if lengths else 0
+        self.rows += n
+        return n
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+        self._files = {}
+
+    def __enter__(self) -> 'ColumnWriter':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def parts(root: str) -> List[str]:
+    return sorted(name for name in os.listdir(root) if os.path.isdir(os.path.join(root, name)))
+
+
+def read_columns(root: str, columns: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+    """Columns of every part, concatenated (a single part stays a read-only memory map)"""
+    schema = read_schema(root)
+    names = list(schema) if columns is None else list(columns)
+    unknown = [name for name in names if name not in schema]
+    if unknown:
+        raise KeyError(f"{root} has no columns {unknown}")
+    chunks: Dict[str, List[np.ndarray]] = {name: [] for name in names}
+    for part in parts(root):
+        paths = {name: os.path.join(root, part, f"{name}.bin") for name in schema}
+        # Rows every column of the part holds completely (a writer may have died mid-chunk)
+        rows = min(os.path.getsize(p) // schema[name].itemsize if os.path.exists(p) else 0
+                   for name, p in paths.items())
+        if rows == 0:
+            continue
+        for name in names:
+            chunks[name].append(np.memmap(paths[name], dtype=schema[name], mode='r', shape=(rows,)))
+    return {name: (c[0] if len(c) == 1 else np.concatenate(c)) if c else np.empty(0, dtype=schema[name])
+            for name, c in chunks.items()}
+
+
+def read_frame(root: str, columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """``read_columns`` as a DataFrame, with byte-string columns decoded"""
+    frame = pd.DataFrame({name: np.asarray(values) for name, values in read_columns(root, columns).items()})
+    schema = read_schema(root)
+    for name in frame.columns:
+        if schema[name].kind == 'S':
+            frame[name] = frame[name].str.decode('utf-8')
+    return frame
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Print the rows of a column store')
+    parser.add_argument('root')
+    parser.add_argument('--columns', nargs='+')
+    parser.add_argument('--head', type=int, default=20)
+    args = parser.parse_args()
+
+    frame = read_frame(args.root, args.columns)
+    print(f"{len(frame):,} rows in {len(parts(args.root))} part(s)")
+    print(frame.head(args.head).to_string())
+
+
+if __name__ == "__main__":
+    main()
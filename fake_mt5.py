@@ -0,0 +1,921 @@
+"""Offline stand-in for the MetaTrader5 package, selected with ``MT5_BACKEND=fake``.
+
+Implements the part of the MetaTrader5 API the scripts use (initialize,
+symbols_get, symbol_info, symbol_info_tick, copy_rates_*, copy_ticks_*,
+positions_get, order_send, account_info, ...) on top of a simulated clock and
+either recorded ticks or a deterministic synthetic random walk. Call latency
+and fill behaviour are configurable, so the screener, the closer and the HFT
+loop can be profiled on Linux.
+
+Configuration comes from ``FAKE_MT5_*`` environment variables (see
+``FakeConfig.from_env``) or from ``configure(...)``. For reproducible runs set
+``FAKE_MT5_START`` (epoch seconds) and ``FAKE_MT5_SPEED=0``; the clock then only
+moves through ``advance()``/``set_time()`` and the configured latencies, and
+``next_tick_msc()`` tells a replay loop when the next tick is due.
+
+Recordings are ``{symbol}.npy`` tick arrays (``TICKS_DTYPE``) with an optional
+``{symbol}.json`` holding the symbol specification; create them on a machine
+with a terminal using::
+
+    python fake_mt5.py BTCUSD EURUSD --days 3 --out recordings
+"""
+
+import argparse
+import fnmatch
+import json
+import os
+import threading
+import time
+import zlib
+from collections import namedtuple
+from dataclasses import dataclass, fields
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from mt5_common import RATES_DTYPE, TICKS_DTYPE, timeframe_seconds
+
+# === Constants (same values as the MetaTrader5 package) ===
+TIMEFRAME_M1 = 1
+TIMEFRAME_M2 = 2
+TIMEFRAME_M3 = 3
+TIMEFRAME_M4 = 4
+TIMEFRAME_M5 = 5
+TIMEFRAME_M6 = 6
+TIMEFRAME_M10 = 10
+TIMEFRAME_M12 = 12
+TIMEFRAME_M15 = 15
+TIMEFRAME_M20 = 20
+TIMEFRAME_M30 = 30
+TIMEFRAME_H1 = 0x4000 | 1
+TIMEFRAME_H2 = 0x4000 | 2
+TIMEFRAME_H3 = 0x4000 | 3
+TIMEFRAME_H4 = 0x4000 | 4
+TIMEFRAME_H6 = 0x4000 | 6
+TIMEFRAME_H8 = 0x4000 | 8
+TIMEFRAME_H12 = 0x4000 | 12
+TIMEFRAME_D1 = 0x4000 | 24
+TIMEFRAME_W1 = 0x8000 | 1
+TIMEFRAME_MN1 = 0xC000 | 1
+
+COPY_TICKS_ALL = -1
+COPY_TICKS_INFO = 1
+COPY_TICKS_TRADE = 2
+
+TICK_FLAG_BID = 0x02
+TICK_FLAG_ASK = 0x04
+TICK_FLAG_LAST = 0x08
+TICK_FLAG_VOLUME = 0x10
+TICK_FLAG_BUY = 0x20
+TICK_FLAG_SELL = 0x40
+
+ORDER_TYPE_BUY = 0
+ORDER_TYPE_SELL = 1
+POSITION_TYPE_BUY = 0
+POSITION_TYPE_SELL = 1
+
+TRADE_ACTION_DEAL = 1
+TRADE_ACTION_PENDING = 5
+TRADE_ACTION_SLTP = 6
+
+ORDER_FILLING_FOK = 0
+ORDER_FILLING_IOC = 1
+ORDER_FILLING_RETURN = 2
+ORDER_TIME_GTC = 0
+
+SYMBOL_TRADE_MODE_DISABLED = 0
+SYMBOL_TRADE_MODE_LONGONLY = 1
+SYMBOL_TRADE_MODE_SHORTONLY = 2
+SYMBOL_TRADE_MODE_CLOSEONLY = 3
+SYMBOL_TRADE_MODE_FULL = 4
+
+TRADE_RETCODE_REQUOTE = 10004
+TRADE_RETCODE_REJECT = 10006
+TRADE_RETCODE_DONE = 10009
+TRADE_RETCODE_INVALID = 10013
+TRADE_RETCODE_INVALID_VOLUME = 10014
+TRADE_RETCODE_INVALID_PRICE = 10015
+TRADE_RETCODE_MARKET_CLOSED = 10018
+TRADE_RETCODE_NO_MONEY = 10019
+TRADE_RETCODE_POSITION_CLOSED = 10036
+
+RES_S_OK = 1
+RES_E_FAIL = -1
+RES_E_INVALID_PARAMS = -2
+RES_E_NOT_FOUND = -4
+RES_E_INTERNAL_FAIL_INIT = -10005
+
+# === Result types (field names as in the MetaTrader5 package) ===
+Tick = namedtuple('Tick', 'time bid ask last volume time_msc flags volume_real')
+SymbolInfo = namedtuple('SymbolInfo', 'name description path visible select trade_mode digits point spread '
+                                      'trade_contract_size volume_min volume_max volume_step '
+                                      'bid ask last time currency_base currency_profit')
+AccountInfo = namedtuple('AccountInfo', 'login trade_mode leverage trade_allowed balance credit profit equity '
+                                        'margin margin_free margin_level name server currency company')
+TradePosition = namedtuple('TradePosition', 'ticket time time_msc time_update time_update_msc type magic '
+                                            'identifier reason volume price_open sl tp price_current swap '
+                                            'profit symbol comment external_id')
+OrderSendResult = namedtuple('OrderSendResult', 'retcode deal order volume price bid ask comment '
+                                                'request_id retcode_external request')
+
+# name: (start price, digits, contract size, volatility per minute, spread in points, path)
+DEFAULT_SYMBOLS = {
+    'EURUSD': (1.08, 5, 100_000, 0.00012, 8, 'Forex\\Majors\\EURUSD'),
+    'GBPUSD': (1.27, 5, 100_000, 0.00014, 10, 'Forex\\Majors\\GBPUSD'),
+    'USDJPY': (150.0, 3, 100_000, 0.00013, 9, 'Forex\\Majors\\USDJPY'),
+    'USDCHF': (0.88, 5, 100_000, 0.00012, 11, 'Forex\\Majors\\USDCHF'),
+    'USDCAD': (1.36, 5, 100_000, 0.00010, 12, 'Forex\\Majors\\USDCAD'),
+    'AUDUSD': (0.66, 5, 100_000, 0.00014, 9, 'Forex\\Majors\\AUDUSD'),
+    'NZDUSD': (0.61, 5, 100_000, 0.00015, 14, 'Forex\\Majors\\NZDUSD'),
+    'EURGBP': (0.85, 5, 100_000, 0.00009, 12, 'Forex\\Crosses\\EURGBP'),
+    'EURJPY': (162.0, 3, 100_000, 0.00014, 15, 'Forex\\Crosses\\EURJPY'),
+    'GBPJPY': (190.0, 3, 100_000, 0.00016, 20, 'Forex\\Crosses\\GBPJPY'),
+    'USDNOK': (10.6, 5, 100_000, 0.00016, 250, 'Forex\\Exotics\\USDNOK'),
+    'USDSEK': (10.5, 5, 100_000, 0.00016, 250, 'Forex\\Exotics\\USDSEK'),
+    'XAUUSD': (2300.0, 2, 100, 0.00030, 20, 'Metals\\XAUUSD'),
+    'BTCUSD': (60_000.0, 2, 1, 0.00080, 1500, 'Crypto\\BTCUSD'),
+}
+
+_SPEC_KEYS = ('digits', 'point', 'trade_contract_size', 'volume_min', 'volume_max', 'volume_step', 'spread', 'path')
+
+
+@dataclass
+class FakeConfig:
+    """Data source, clock and execution behaviour of the fake terminal"""
+    data_dir: Optional[str] = None      # Recordings to replay; other symbols are synthetic
+    seed: int = 0
+    start: Optional[float] = None       # Clock start (epoch seconds); default: now, or inside the recording
+    speed: float = 1.0                  # Simulated seconds per wall-clock second; 0 = manual clock
+    history_days: int = 60              # Synthetic history before the clock start
+    tick_ms: int = 250                  # Synthetic tick interval
+    latency: float = 0.0                # Seconds added to every call
+    order_latency: float = 0.0          # Extra seconds added to order_send
+    fill_mode: str = 'fill'             # fill | reject | requote
+    fill_probability: float = 1.0       # Chance that an acceptable order fills (otherwise rejected)
+    slippage_points: int = 0            # Adverse slippage applied to every fill
+    spread_points: int = 0              # > 0: quote every tick at bid + spread (recorded ticks included)
+    balance: float = 10_000.0
+    leverage: int = 100
+    symbols: Tuple[str, ...] = ()       # Restrict the catalogue (default: all known and recorded symbols)
+
+    @classmethod
+    def from_env(cls) -> 'FakeConfig':
+        """Config from FAKE_MT5_DATA_DIR, FAKE_MT5_SEED, FAKE_MT5_START, FAKE_MT5_SPEED, ... (upper-case field names)"""
+        config = cls()
+        for f in fields(cls):
+            raw = os.environ.get(f"FAKE_MT5_{f.name.upper()}")
+            if raw is None or raw == '':
+                continue
+            if f.name == 'symbols':
+                value = tuple(s.strip() for s in raw.split(',') if s.strip())
+            elif f.name in ('data_dir', 'fill_mode'):
+                value = raw
+            elif f.name in ('seed', 'history_days', 'tick_ms', 'slippage_points', 'spread_points', 'leverage'):
+                value = int(raw)
+            else:
+                value = float(raw)
+            setattr(config, f.name, value)
+        return config
+
+
+class SimClock:
+    """Simulated server clock; runs at ``speed`` times wall time, or only moves on ``advance`` when speed is 0"""
+
+    def __init__(self, start: float, speed: float = 1.0):
+        self.start = float(start)
+        self.speed = speed
+        self._offset = 0.0
+        self._origin = time.perf_counter()
+
+    def now(self) -> float:
+        elapsed = (time.perf_counter() - self._origin) * self.speed if self.speed else 0.0
+        return self.start + elapsed + self._offset
+
+    def now_msc(self) -> int:
+        return int(self.now() * 1000)
+
+    def advance(self, seconds: float):
+        self._offset += seconds
+
+    def set_time(self, timestamp: float):
+        self._offset += timestamp - self.now()
+
+
+def _mix(k: np.ndarray, seed: int) -> np.ndarray:
+    """splitmix64 of an int64 array; deterministic pseudo-random bits per tick index"""
+    z = k.astype(np.uint64) + np.uint64((seed * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def _aggregate(minutes: np.ndarray, o, h, l, c, v, bar_seconds: int, spread: int) -> np.ndarray:
+    """Bars of ``bar_seconds`` from M1 columns (minute numbers since the epoch)"""
+    if len(minutes) == 0:
+        return np.empty(0, dtype=RATES_DTYPE)
+    if bar_seconds == 60:
+        # M1: one bar per minute, nothing to reduce
+        bars = np.zeros(len(minutes), dtype=RATES_DTYPE)
+        bars['time'] = minutes * 60
+        bars['open'], bars['high'], bars['low'], bars['close'], bars['tick_volume'] = o, h, l, c, v
+        bars['spread'] = spread
+        return bars
+    ids = minutes * 60 // bar_seconds
+    starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+    ends = np.r_[starts[1:], len(ids)] - 1
+    bars = np.zeros(len(starts), dtype=RATES_DTYPE)
+    bars['time'] = ids[starts] * bar_seconds
+    bars['open'] = o[starts]
+    bars['high'] = np.maximum.reduceat(h, starts)
+    bars['low'] = np.minimum.reduceat(l, starts)
+    bars['close'] = c[ends]
+    bars['tick_volume'] = np.add.reduceat(v, starts)
+    bars['spread'] = spread
+    return bars
+
+
+class _Feed:
+    """Price history of one symbol as M1 columns plus the ticks inside them"""
+
+    def __init__(self, name: str, spec: Dict):
+        self.name = name
+        self.spec = spec
+
+    @property
+    def first_msc(self) -> int:
+        raise NotImplementedError
+
+    def minutes(self, m0: int, m1: int):
+        """(minute, open, high, low, close, volume) columns of the closed minutes in [m0, m1)"""
+        raise NotImplementedError
+
+    def ticks(self, t0_msc: int, t1_msc: int) -> np.ndarray:
+        """All ticks with t0_msc <= time_msc < t1_msc"""
+        raise NotImplementedError
+
+    def last_tick(self, now_msc: int) -> Optional[np.void]:
+        raise NotImplementedError
+
+    def next_tick_msc(self, after_msc: int) -> Optional[int]:
+        """time_msc of the first tick after ``after_msc``, None past the end of the data"""
+        raise NotImplementedError
+
+    def set_spread(self, points: int):
+        self.spec['spread'] = points
+
+    def bars(self, bar_seconds: int, first_open: int, end_msc: int) -> np.ndarray:
+        """Bars opening at or after ``first_open`` up to ``end_msc``; the last one is cut at ``end_msc``"""
+        m_end = end_msc // 60000
+        m, o, h, l, c, v = self.minutes(first_open // 60, m_end)
+        # The minute in progress is built from the ticks seen so far
+        partial = self.ticks(m_end * 60000, end_msc + 1)
+        partial = partial[partial['bid'] > 0]
+        if len(partial):
+            bid = partial['bid']
+            open_ = c[-1] if len(c) and m[-1] == m_end - 1 else bid[0]
+            m = np.append(m, m_end)
+            o = np.append(o, open_)
+            h = np.append(h, max(open_, bid.max()))
+            l = np.append(l, min(open_, bid.min()))
+            c = np.append(c, bid[-1])
+            v = np.append(v, len(partial))
+        return _aggregate(m, o, h, l, c, v.astype(np.uint64), bar_seconds, self.spec['spread'])
+
+
+class _SyntheticFeed(_Feed):
+    """Seeded geometric random walk at M1 resolution with interpolated, noisy ticks every ``tick_ms``"""
+
+    def __init__(self, name: str, spec: Dict, start: float, seed: int, history_days: int, tick_ms: int):
+        super().__init__(name, spec)
+        self.tick_ms = tick_ms
+        self.seed = zlib.crc32(name.encode()) ^ seed
+        self.noise = spec['volatility'] * 0.25  # Tick noise around the minute path, relative
+        self.m_first = int(start // 60) - history_days * 1440
+        self._rng = np.random.default_rng([seed, zlib.crc32(name.encode())])
+        self._log_close = np.empty(0)
+        self._p0 = np.log(spec['price'])
+        self._extend(history_days * 1440 + 1440)
+
+    @property
+    def first_msc(self) -> int:
+        return (self.m_first + 1) * 60000
+
+    def _extend(self, count: int):
+        steps = self._rng.normal(0.0, self.spec['volatility'], count)
+        last = self._log_close[-1] if len(self._log_close) else self._p0
+        self._log_close = np.r_[self._log_close, last + np.cumsum(steps)]
+        self._close = np.round(np.exp(self._log_close), self.spec['digits'])
+
+    def _ensure(self, minute: int):
+        missing = minute - (self.m_first + len(self._close)) + 1
+        if missing > 0:
+            self._extend(max(missing, 1440))
+
+    def minutes(self, m0: int, m1: int):
+        # Minute m_first only provides the opening price of the next one
+        m0 = max(m0, self.m_first + 1)
+        if m1 <= m0:
+            empty = np.empty(0)
+            return np.empty(0, dtype=np.int64), empty, empty, empty, empty, np.empty(0, dtype=np.uint64)
+        self._ensure(m1)
+        i0, i1 = m0 - self.m_first, m1 - self.m_first
+        c = self._close[i0:i1]
+        o = self._close[i0 - 1:i1 - 1]
+        # Widest the rounded tick noise can reach, so every tick lies inside its M1 bar
+        band = np.maximum(o, c) * self.noise
+        point, digits = self.spec['point'], self.spec['digits']
+        h = np.round(np.ceil((np.maximum(o, c) + band) / point) * point, digits)
+        l = np.round(np.floor((np.minimum(o, c) - band) / point) * point, digits)
+        v = np.full(len(c), 60000 // self.tick_ms, dtype=np.uint64)
+        return np.arange(m0, m1, dtype=np.int64), o, h, l, c, v
+
+    def ticks(self, t0_msc: int, t1_msc: int) -> np.ndarray:
+        t0_msc = max(t0_msc, self.first_msc)
+        k = np.arange(-(-t0_msc // self.tick_ms), -(-t1_msc // self.tick_ms), dtype=np.int64)
+        out = np.zeros(len(k), dtype=TICKS_DTYPE)
+        if len(k) == 0:
+            return out
+        t = k * self.tick_ms
+        m = t // 60000
+        self._ensure(int(m[-1]))
+        i = m - self.m_first
+        o = self._close[i - 1]
+        c = self._close[i]
+        bits = _mix(k, self.seed)
+        u = (bits >> np.uint64(11)).astype(np.float64) / float(1 << 53) * 2.0 - 1.0
+        digits = self.spec['digits']
+        bid = np.round(o + (c - o) * ((t - m * 60000) / 60000.0) + u * o * self.noise, digits)
+        out['time'] = t // 1000
+        out['time_msc'] = t
+        out['bid'] = bid
+        out['ask'] = np.round(bid + self.spec['spread'] * self.spec['point'], digits)
+        out['last'] = bid
+        out['volume'] = 1 + (bits & np.uint64(7))
+        out['volume_real'] = out['volume']
+        out['flags'] = TICK_FLAG_BID | TICK_FLAG_ASK | TICK_FLAG_LAST | TICK_FLAG_VOLUME
+        return out
+
+    def last_tick(self, now_msc: int) -> Optional[np.void]:
+        at = now_msc // self.tick_ms * self.tick_ms
+        ticks = self.ticks(at, at + 1)
+        return ticks[0] if len(ticks) else None
+
+    def next_tick_msc(self, after_msc: int) -> Optional[int]:
+        return max(self.first_msc, (after_msc // self.tick_ms + 1) * self.tick_ms)
+
+
+class _RecordedFeed(_Feed):
+    """Replay of a recorded tick array; M1 bars are built from the bid"""
+
+    def __init__(self, name: str, spec: Dict, ticks: np.ndarray):
+        super().__init__(name, spec)
+        ticks = np.asarray(ticks)
+        if ticks.dtype != TICKS_DTYPE:
+            ticks = ticks.astype(TICKS_DTYPE)
+        if len(ticks) > 1 and (np.diff(ticks['time_msc']) < 0).any():
+            ticks = ticks[np.argsort(ticks['time_msc'], kind='stable')]
+        # Sorted TICKS_DTYPE arrays are used as they are (a sweep's shared-memory recording is read-only)
+        self.tick_data = ticks
+        # Contiguous copy for the per-call searches (a strided field view is copied by every searchsorted)
+        self.times = np.ascontiguousarray(self.tick_data['time_msc'])
+        quoted = self.tick_data[self.tick_data['bid'] > 0]
+        bid = quoted['bid']
+        minute = quoted['time_msc'] // 60000
+        starts = np.flatnonzero(np.r_[True, minute[1:] != minute[:-1]]) if len(minute) else np.empty(0, dtype=np.int64)
+        ends = np.r_[starts[1:], len(minute)] - 1
+        self.m1 = minute[starts]
+        self.m1_open = bid[starts]
+        self.m1_high = np.maximum.reduceat(bid, starts) if len(starts) else np.empty(0)
+        self.m1_low = np.minimum.reduceat(bid, starts) if len(starts) else np.empty(0)
+        self.m1_close = bid[ends]
+        self.m1_volume = np.diff(np.r_[starts, len(minute)]).astype(np.uint64)
+
+    @property
+    def first_msc(self) -> int:
+        return int(self.tick_data['time_msc'][0]) if len(self.tick_data) else 0
+
+    @property
+    def last_msc(self) -> int:
+        return int(self.tick_data['time_msc'][-1]) if len(self.tick_data) else 0
+
+    def minutes(self, m0: int, m1: int):
+        i0, i1 = np.searchsorted(self.m1, [m0, m1])
+        return (self.m1[i0:i1], self.m1_open[i0:i1], self.m1_high[i0:i1],
+                self.m1_low[i0:i1], self.m1_close[i0:i1], self.m1_volume[i0:i1])
+
+    def ticks(self, t0_msc: int, t1_msc: int) -> np.ndarray:
+        i0, i1 = np.searchsorted(self.times, [t0_msc, t1_msc])
+        return self.tick_data[i0:i1]
+
+    def last_tick(self, now_msc: int) -> Optional[np.void]:
+        i = np.searchsorted(self.times, now_msc, side='right')
+        return self.tick_data[i - 1] if i > 0 else None
+
+    def next_tick_msc(self, after_msc: int) -> Optional[int]:
+        i = np.searchsorted(self.times, after_msc, side='right')
+        return int(self.times[i]) if i < len(self.times) else None
+
+    def set_spread(self, points: int):
+        super().set_spread(points)
+        self.tick_data = self.tick_data.copy()  # Never re-quote the caller's array
+        quoted = self.tick_data['bid'] > 0
+        self.tick_data['ask'][quoted] = np.round(self.tick_data['bid'][quoted] + points * self.spec['point'],
+                                                 self.spec['digits'])
+
+
+def _timestamp(value) -> float:
+    """Epoch seconds of a datetime (naive = local time, as the MetaTrader5 package treats it) or a number"""
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return float(value)
+
+
+def _spec(name: str, overrides: Optional[Dict] = None) -> Dict:
+    price, digits, contract, volatility, spread, path = DEFAULT_SYMBOLS.get(
+        name, (100.0, 2, 1, 0.0002, 10, f"Other\\{name}"))
+    spec = {
+        'price': price, 'digits': digits, 'point': 10.0 ** -digits, 'trade_contract_size': contract,
+        'volatility': volatility, 'spread': spread, 'path': path,
+        'volume_min': 0.01, 'volume_max': 100.0, 'volume_step': 0.01,
+    }
+    spec.update(overrides or {})
+    return spec
+
+
+class _Terminal:
+    """State behind the module-level API: feeds, clock, account and open positions"""
+
+    def __init__(self, config: FakeConfig, recordings: Optional[Dict[str, Tuple[np.ndarray, Optional[Dict]]]] = None):
+        self.config = config
+        self.feeds: Dict[str, _Feed] = {}
+        self.positions: Dict[int, Dict] = {}
+        self.balance = config.balance
+        self.next_ticket = 1
+        self.rng = np.random.default_rng(config.seed)
+
+        recorded = self._load_recordings(config.data_dir) if config.data_dir else {}
+        for name, (ticks, overrides) in (recordings or {}).items():
+            recorded[name] = _RecordedFeed(name, _spec(name, overrides), ticks)
+        start = config.start
+        if start is None:
+            if recorded:
+                # Start inside the recording, after as much history as the other feeds get
+                start = max(min(f.first_msc + config.history_days * 86400_000,
+                                (f.first_msc + f.last_msc) // 2) for f in recorded.values()) / 1000
+            else:
+                start = time.time()
+        self.clock = SimClock(start, config.speed)
+
+        names = list(config.symbols) or list(dict.fromkeys([*DEFAULT_SYMBOLS, *recorded]))
+        for name in names:
+            if name in recorded:
+                self.feeds[name] = recorded[name]
+            else:
+                self.feeds[name] = _SyntheticFeed(name, _spec(name), start, config.seed,
+                                                  config.history_days, config.tick_ms)
+            if config.spread_points > 0:
+                self.feeds[name].set_spread(config.spread_points)
+
+    @staticmethod
+    def _load_recordings(root: str) -> Dict[str, _Feed]:
+        feeds = {}
+        for filename in sorted(os.listdir(root)):
+            if not filename.endswith('.npy'):
+                continue
+            name = filename[:-4]
+            overrides = None
+            meta = os.path.join(root, name + '.json')
+            if os.path.exists(meta):
+                with open(meta) as f:
+                    overrides = json.load(f)
+            feeds[name] = _RecordedFeed(name, _spec(name, overrides), np.load(os.path.join(root, filename)))
+        return feeds
+
+    # --- Market data ---
+    def tick(self, symbol: str) -> Optional[np.void]:
+        feed = self.feeds.get(symbol)
+        return None if feed is None else feed.last_tick(self.clock.now_msc())
+
+    def rates_until(self, symbol: str, timeframe: int, end_msc: int, count: int) -> Optional[np.ndarray]:
+        """The last ``count`` bars opening at or before ``end_msc``"""
+        feed = self.feeds.get(symbol)
+        if feed is None or count <= 0:
+            return None
+        bar_seconds = timeframe_seconds(timeframe)
+        end_msc = min(end_msc, self.clock.now_msc())
+        last_open = end_msc // 1000 // bar_seconds * bar_seconds
+        # Cut the last bar where it was at end_msc (the forming bar) or where it closed
+        cut = min(self.clock.now_msc(), (last_open + bar_seconds) * 1000 - 1)
+        span = count
+        while True:
+            first_open = last_open - (span - 1) * bar_seconds
+            bars = feed.bars(bar_seconds, first_open, cut)
+            bars = bars[bars['time'] <= last_open]
+            if len(bars) >= count or first_open * 1000 <= feed.first_msc:
+                return bars[-count:]
+            span *= 2  # Gaps in recorded data: look further back
+
+    def rates_from_pos(self, symbol: str, timeframe: int, start_pos: int, count: int) -> Optional[np.ndarray]:
+        rates = self.rates_until(symbol, timeframe, self.clock.now_msc(), start_pos + count)
+        if rates is None:
+            return None
+        end = len(rates) - start_pos
+        return rates[max(0, end - count):max(0, end)]
+
+    def rates_range(self, symbol: str, timeframe: int, date_from: float, date_to: float) -> Optional[np.ndarray]:
+        feed = self.feeds.get(symbol)
+        if feed is None:
+            return None
+        bar_seconds = timeframe_seconds(timeframe)
+        first_open = -(-int(date_from) // bar_seconds) * bar_seconds
+        last_open = int(date_to) // bar_seconds * bar_seconds
+        cut = min(self.clock.now_msc(), (last_open + bar_seconds) * 1000 - 1)
+        bars = feed.bars(bar_seconds, first_open, cut)
+        return bars[bars['time'] <= last_open]
+
+    def ticks_between(self, symbol: str, t0_msc: int, t1_msc: int, flags: int) -> Optional[np.ndarray]:
+        feed = self.feeds.get(symbol)
+        if feed is None:
+            return None
+        ticks = feed.ticks(t0_msc, min(t1_msc, self.clock.now_msc() + 1))
+        if flags == COPY_TICKS_INFO:
+            ticks = ticks[(ticks['flags'] & (TICK_FLAG_BID | TICK_FLAG_ASK)) != 0]
+        elif flags == COPY_TICKS_TRADE:
+            ticks = ticks[(ticks['flags'] & (TICK_FLAG_LAST | TICK_FLAG_VOLUME)) != 0]
+        return ticks
+
+    def symbol_info(self, symbol: str) -> Optional[SymbolInfo]:
+        feed = self.feeds.get(symbol)
+        if feed is None:
+            return None
+        spec = feed.spec
+        tick = feed.last_tick(self.clock.now_msc())
+        bid, ask, last, when = (0.0, 0.0, 0.0, 0) if tick is None else (
+            float(tick['bid']), float(tick['ask']), float(tick['last']), int(tick['time']))
+        return SymbolInfo(
+            name=symbol, description=symbol, path=spec['path'], visible=True, select=True,
+            trade_mode=SYMBOL_TRADE_MODE_FULL, digits=spec['digits'], point=spec['point'],
+            spread=spec['spread'], trade_contract_size=spec['trade_contract_size'],
+            volume_min=spec['volume_min'], volume_max=spec['volume_max'], volume_step=spec['volume_step'],
+            bid=bid, ask=ask, last=last, time=when,
+            currency_base=symbol[:3], currency_profit=symbol[3:6] or 'USD',
+        )
+
+    # --- Positions and orders ---
+    def _profit(self, position: Dict, price: float) -> float:
+        """Position profit in the symbol's profit currency (not converted to the account currency)"""
+        direction = 1 if position['type'] == POSITION_TYPE_BUY else -1
+        contract = self.feeds[position['symbol']].spec['trade_contract_size']
+        return (price - position['price_open']) * direction * position['volume'] * contract
+
+    def _close_price(self, position: Dict, tick) -> float:
+        return float(tick['bid'] if position['type'] == POSITION_TYPE_BUY else tick['ask'])
+
+    def check_stops(self):
+        """Close positions whose SL/TP is crossed by the current tick"""
+        for ticket, position in list(self.positions.items()):
+            tick = self.tick(position['symbol'])
+            if tick is None:
+                continue
+            price = self._close_price(position, tick)
+            is_buy = position['type'] == POSITION_TYPE_BUY
+            sl, tp = position['sl'], position['tp']
+            if sl and (price <= sl if is_buy else price >= sl):
+                self._settle(ticket, position['volume'], sl)
+            elif tp and (price >= tp if is_buy else price <= tp):
+                self._settle(ticket, position['volume'], tp)
+
+    def _settle(self, ticket: int, volume: float, price: float):
+        position = self.positions[ticket]
+        part = dict(position, volume=volume)
+        self.balance += self._profit(part, price)
+        position['volume'] = round(position['volume'] - volume, 8)
+        if position['volume'] <= 0:
+            del self.positions[ticket]
+
+    def position_tuples(self, symbol: Optional[str] = None, group: Optional[str] = None,
+                        ticket: Optional[int] = None) -> Tuple[TradePosition, ...]:
+        self.check_stops()
+        out = []
+        for position in self.positions.values():
+            if symbol is not None and position['symbol'] != symbol:
+                continue
+            if ticket is not None and position['ticket'] != ticket:
+                continue
+            if group is not None and not _match_group(position['symbol'], group):
+                continue
+            tick = self.tick(position['symbol'])
+            current = self._close_price(position, tick) if tick is not None else position['price_open']
+            out.append(TradePosition(
+                ticket=position['ticket'], time=position['time_msc'] // 1000, time_msc=position['time_msc'],
+                time_update=position['time_msc'] // 1000, time_update_msc=position['time_msc'],
+                type=position['type'], magic=position['magic'], identifier=position['ticket'], reason=3,
+                volume=position['volume'], price_open=position['price_open'], sl=position['sl'],
+                tp=position['tp'], price_current=current, swap=0.0, profit=self._profit(position, current),
+                symbol=position['symbol'], comment=position['comment'], external_id='',
+            ))
+        return tuple(out)
+
+    def account(self) -> AccountInfo:
+        self.check_stops()
+        profit = sum(p.profit for p in self.position_tuples())
+        margin = sum(p['volume'] * self.feeds[p['symbol']].spec['trade_contract_size'] * p['price_open']
+                     for p in self.positions.values()) / self.config.leverage
+        equity = self.balance + profit
+        return AccountInfo(
+            login=1, trade_mode=0, leverage=self.config.leverage, trade_allowed=True,
+            balance=self.balance, credit=0.0, profit=profit, equity=equity, margin=margin,
+            margin_free=equity - margin, margin_level=equity / margin * 100 if margin else 0.0,
+            name='Fake terminal', server='Fake-Server', currency='USD', company='fake_mt5',
+        )
+
+    def order_send(self, request: Dict) -> OrderSendResult:
+        self.check_stops()
+        symbol = request.get('symbol')
+        feed = self.feeds.get(symbol)
+        tick = self.tick(symbol) if feed is not None else None
+
+        def result(retcode, comment, price=0.0, volume=0.0, order=0):
+            bid = float(tick['bid']) if tick is not None else 0.0
+            ask = float(tick['ask']) if tick is not None else 0.0
+            return OrderSendResult(retcode=retcode, deal=order, order=order, volume=volume, price=price,
+                                   bid=bid, ask=ask, comment=comment, request_id=0,
+                                   retcode_external=0, request=dict(request))
+
+        if request.get('action') != TRADE_ACTION_DEAL:
+            return result(TRADE_RETCODE_INVALID, 'Only market deals are simulated')
+        if feed is None or tick is None:
+            return result(TRADE_RETCODE_MARKET_CLOSED, 'No prices')
+
+        spec = feed.spec
+        volume = float(request.get('volume', 0.0))
+        steps = volume / spec['volume_step']
+        if (volume < spec['volume_min'] or volume > spec['volume_max']
+                or abs(steps - round(steps)) > 1e-6):
+            return result(TRADE_RETCODE_INVALID_VOLUME, 'Invalid volume')
+
+        is_buy = request.get('type') == ORDER_TYPE_BUY
+        market = float(tick['ask'] if is_buy else tick['bid'])
+        wanted = request.get('price') or market
+        deviation = request.get('deviation', 0) * spec['point']
+        if self.config.fill_mode == 'requote' or abs(market - wanted) > deviation + spec['point'] / 2:
+            return result(TRADE_RETCODE_REQUOTE, 'Requote', price=market)
+        if self.config.fill_mode == 'reject' or self.rng.random() >= self.config.fill_probability:
+            return result(TRADE_RETCODE_REJECT, 'Request rejected')
+
+        slip = self.config.slippage_points * spec['point']
+        price = round(market + slip if is_buy else market - slip, spec['digits'])
+        ticket = self.next_ticket
+        self.next_ticket += 1
+
+        target = request.get('position')
+        if target:
+            position = self.positions.get(target)
+            if position is None:
+                return result(TRADE_RETCODE_POSITION_CLOSED, 'Position closed')
+            if volume > position['volume'] + 1e-9 or (position['type'] == POSITION_TYPE_BUY) == is_buy:
+                return result(TRADE_RETCODE_INVALID, 'Invalid close request')
+            self._settle(target, volume, price)
+            return result(TRADE_RETCODE_DONE, 'Request executed', price, volume, ticket)
+
+        margin = volume * spec['trade_contract_size'] * price / self.config.leverage
+        if margin > self.account().margin_free:
+            return result(TRADE_RETCODE_NO_MONEY, 'No money')
+        self.positions[ticket] = {
+            'ticket': ticket, 'symbol': symbol, 'volume': volume, 'price_open': price,
+            'type': POSITION_TYPE_BUY if is_buy else POSITION_TYPE_SELL,
+            'sl': float(request.get('sl') or 0.0), 'tp': float(request.get('tp') or 0.0),
+            'magic': request.get('magic', 0), 'comment': request.get('comment', ''),
+            'time_msc': self.clock.now_msc(),
+        }
+        return result(TRADE_RETCODE_DONE, 'Request executed', price, volume, ticket)
+
+
+def _match_group(name: str, group: str) -> bool:
+    """MT5 group filter: comma-separated wildcards, ``!`` excludes (later patterns win)"""
+    matched = False
+    for pattern in (p.strip() for p in group.split(',')):
+        if pattern.startswith('!'):
+            if fnmatch.fnmatchcase(name, pattern[1:]):
+                matched = False
+        elif pattern and fnmatch.fnmatchcase(name, pattern):
+            matched = True
+    return matched
+
+
+# === Module-level API ===
+_lock = threading.RLock()
+_terminal: Optional[_Terminal] = None
+_config: Optional[FakeConfig] = None
+_last_error: Tuple[int, str] = (RES_S_OK, 'Success')
+
+
+def _delay(seconds: float):
+    if seconds <= 0:
+        return
+    if _terminal is not None and _terminal.clock.speed == 0:
+        _terminal.clock.advance(seconds)
+    else:
+        time.sleep(seconds)
+
+
+def _api(call: str = 'call'):
+    """Run an API call under the lock with the configured latency; None while not initialized"""
+    def wrap(fn):
+        def inner(*args, **kwargs):
+            global _last_error
+            if _terminal is None:
+                _last_error = (RES_E_INTERNAL_FAIL_INIT, 'IPC initialize failed, MetaTrader 5 x64 not found')
+                return None
+            config = _terminal.config
+            _delay(config.latency + (config.order_latency if call == 'order_send' else 0.0))
+            with _lock:
+                result = fn(*args, **kwargs)
+            _last_error = (RES_S_OK, 'Success') if result is not None else (RES_E_FAIL, 'Terminal: Call failed')
+            return result
+        inner.__name__ = fn.__name__
+        inner.__doc__ = fn.__doc__
+        return inner
+    return wrap
+
+
+def configure(config: Optional[FakeConfig] = None,
+              recordings: Optional[Dict[str, Tuple[np.ndarray, Optional[Dict]]]] = None, **overrides) -> FakeConfig:
+    """Set the configuration (default: from the environment) and reset the terminal state.
+
+    ``recordings`` maps symbols to in-memory ``(ticks, spec)`` pairs, replayed
+    like ``{symbol}.npy``/``{symbol}.json`` files in ``data_dir``.
+    """
+    global _config, _terminal
+    with _lock:
+        _config = config or FakeConfig.from_env()
+        for key, value in overrides.items():
+            setattr(_config, key, value)
+        _terminal = _Terminal(_config, recordings)
+    return _config
+
+
+def initialize(path: Optional[str] = None, **kwargs) -> bool:
+    global _last_error
+    with _lock:
+        if _terminal is None:
+            configure(_config)
+    _last_error = (RES_S_OK, 'Success')
+    return True
+
+
+def login(login: int = 0, password: str = '', server: str = '', timeout: int = 60000) -> bool:
+    return _terminal is not None
+
+
+def shutdown():
+    global _terminal
+    with _lock:
+        _terminal = None
+
+
+def version():
+    return (500, 4000, '01 Jan 2024')
+
+
+def last_error() -> Tuple[int, str]:
+    return _last_error
+
+
+def now() -> float:
+    """Current simulated server time (epoch seconds)"""
+    return _terminal.clock.now()
+
+
+def advance(seconds: float):
+    """Move the simulated clock forward"""
+    _terminal.clock.advance(seconds)
+
+
+def set_time(timestamp: float):
+    """Jump the simulated clock to ``timestamp`` (epoch seconds or datetime)"""
+    _terminal.clock.set_time(_timestamp(timestamp))
+
+
+def next_tick_msc(symbol: str, after_msc: int) -> Optional[int]:
+    """time_msc of the first tick of ``symbol`` after ``after_msc`` (None past the data), for event-by-event replay"""
+    feed = _terminal.feeds.get(symbol)
+    return None if feed is None else feed.next_tick_msc(after_msc)
+
+
+@_api()
+def account_info() -> Optional[AccountInfo]:
+    return _terminal.account()
+
+
+@_api()
+def symbols_total() -> int:
+    return len(_terminal.feeds)
+
+
+@_api()
+def symbols_get(group: Optional[str] = None) -> Tuple[SymbolInfo, ...]:
+    names = [n for n in _terminal.feeds if group is None or _match_group(n, group)]
+    return tuple(_terminal.symbol_info(n) for n in names)
+
+
+@_api()
+def symbol_info(symbol: str) -> Optional[SymbolInfo]:
+    return _terminal.symbol_info(symbol)
+
+
+@_api()
+def symbol_select(symbol: str, enable: bool = True) -> Optional[bool]:
+    return True if symbol in _terminal.feeds else None
+
+
+@_api()
+def symbol_info_tick(symbol: str) -> Optional[Tick]:
+    tick = _terminal.tick(symbol)
+    return None if tick is None else Tick(*tick.tolist())
+
+
+@_api()
+def copy_rates_from(symbol: str, timeframe: int, date_from, count: int) -> Optional[np.ndarray]:
+    return _terminal.rates_until(symbol, timeframe, int(_timestamp(date_from) * 1000), count)
+
+
+@_api()
+def copy_rates_from_pos(symbol: str, timeframe: int, start_pos: int, count: int) -> Optional[np.ndarray]:
+    return _terminal.rates_from_pos(symbol, timeframe, start_pos, count)
+
+
+@_api()
+def copy_rates_range(symbol: str, timeframe: int, date_from, date_to) -> Optional[np.ndarray]:
+    return _terminal.rates_range(symbol, timeframe, _timestamp(date_from), _timestamp(date_to))
+
+
+@_api()
+def copy_ticks_from(symbol: str, date_from, count: int, flags: int) -> Optional[np.ndarray]:
+    t0 = int(_timestamp(date_from) * 1000)
+    ticks = _terminal.ticks_between(symbol, t0, _terminal.clock.now_msc() + 1, flags)
+    return None if ticks is None else ticks[:count]
+
+
+@_api()
+def copy_ticks_range(symbol: str, date_from, date_to, flags: int) -> Optional[np.ndarray]:
+    t0 = int(_timestamp(date_from) * 1000)
+    t1 = int(_timestamp(date_to) * 1000) + 1
+    return _terminal.ticks_between(symbol, t0, t1, flags)
+
+
+@_api()
+def positions_total() -> int:
+    return len(_terminal.position_tuples())
+
+
+@_api()
+def positions_get(symbol: Optional[str] = None, group: Optional[str] = None,
+                  ticket: Optional[int] = None) -> Tuple[TradePosition, ...]:
+    return _terminal.position_tuples(symbol, group, ticket)
+
+
+@_api('order_send')
+def order_send(request: Dict) -> Optional[OrderSendResult]:
+    return _terminal.order_send(request)
+
+
+def record(terminal, symbols: List[str], days: float, out: str) -> Dict[str, int]:
+    """Save the last ``days`` of ticks (and the symbol spec) of each symbol for replay; returns tick counts"""
+    os.makedirs(out, exist_ok=True)
+    date_to = datetime.now(timezone.utc)
+    date_from = date_to - timedelta(days=days)
+    counts = {}
+    for symbol in symbols:
+        info = terminal.symbol_info(symbol)
+        ticks = terminal.copy_ticks_range(symbol, date_from, date_to, terminal.COPY_TICKS_ALL)
+        if info is None or ticks is None or len(ticks) == 0:
+            print(f"{symbol}: no ticks ({terminal.last_error()})")
+            continue
+        np.save(os.path.join(out, f"{symbol}.npy"), np.asarray(ticks).astype(TICKS_DTYPE))
+        with open(os.path.join(out, f"{symbol}.json"), 'w') as f:
+            json.dump({key: getattr(info, key) for key in _SPEC_KEYS}, f, indent=2)
+        counts[symbol] = len(ticks)
+        print(f"{symbol}: {len(ticks)} ticks")
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Record ticks from a live terminal for fake_mt5 replay')
+    parser.add_argument('symbols', nargs='+')
+    parser.add_argument('--days', type=float, default=1.0)
+    parser.add_argument('--out', default='recordings')
+    args = parser.parse_args()
+
+    import MetaTrader5
+    if not MetaTrader5.initialize():
+        raise SystemExit(f"MT5 initialization failed: {MetaTrader5.last_error()}")
+    try:
+        record(MetaTrader5, args.symbols, args.days, args.out)
+    finally:
+        MetaTrader5.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,475 @@
+# This work is licensed under a Attribution-NonCommercial-ShareAlike 4.0 International (CC BY-NC-SA 4.0) https://creativecommons.org/licenses/by-nc-sa/4.0/
+# © LuxAlgo - Historical FVG outcome backtest
+
+"""Historical outcomes of the screener's FVGs: fill rate, time to fill and excursion.
+
+Every closed bar of years of history goes through the screener's detection
+rules (``fvg_engine.fvg_masks``, as in ``detect_fvgs_for_symbol``), and every
+gap is followed until it is filled, ages out of the screener's lookback
+(``max_age_days``) or the data ends. Per gap the outcome records the first bar
+inside the ``is_approaching`` band, the first bar trading into the gap, the
+fill bar and time, the deepest fill ratio and the largest excursion away from
+the gap before the fill.
+
+Bars are streamed in chunks, from the terminal (``copy_rates_range``) or from
+``BarCache`` files, so memory is bounded by one chunk plus the open gaps. Open
+gaps are matched against each block of bars with running minima/maxima and
+binary searches, not a scan per gap. Symbol/timeframe pairs are sharded across
+a process pool, and each task appends its outcomes to its own part of a
+``column_store`` directory.
+
+Usage:
+    python fvg_backtest.py --symbols EURUSD GBPUSD USDJPY --timeframes H4 H1 --start 2020-01-01 --out fvg_outcomes
+    python fvg_backtest.py --cache bar_cache --timeframes H4 --workers 8     # every symbol in the bar cache
+"""
+
+import argparse
+import logging
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from bar_cache import BarCache
+from column_store import ColumnWriter, read_frame
+from fvg_engine import ThresholdState, fvg_masks
+from mt5_common import RATES_DTYPE, load_terminal, parse_timeframe, timeframe_name, timeframe_seconds
+
+logger = logging.getLogger(__name__)
+
+# Gap status in the outcome store
+FILLED, EXPIRED, OPEN = 0, 1, 2
+
+OUTCOME_SCHEMA = {
+    'symbol': 'S16',
+    'timeframe': '<i4',
+    'is_bull': '?',
+    'time': '<i8',              # Open time of the bar completing the gap (epoch seconds)
+    'max_price': '<f8',
+    'min_price': '<f8',
+    'gap_pct': '<f8',           # Gap height in percent of min_price
+    'bars_to_approach': '<i8',  # First bar within the is_approaching band (or inside the gap); -1 never
+    'bars_to_touch': '<i8',     # First bar trading into the gap; -1 never
+    'bars_to_fill': '<i8',      # -1 if not filled
+    'seconds_to_fill': '<i8',   # -1 if not filled
+    'fill_ratio': '<f8',        # Deepest penetration (1 = filled)
+    'excursion_pct': '<f8',     # Largest move away from the gap edge before the fill, percent of the edge
+    'bars_observed': '<i8',     # Bars after the gap until its fill, expiry or the end of the data
+    'status': 'i1',             # FILLED, EXPIRED or OPEN (data ended)
+}
+
+BLOCK_BARS = 512  # Bars matched against the open gaps at once
+
+# Open gaps of one side, in "adverse" price space: bull gaps see the lows, bear gaps
+# the negated highs, so price reaching a gap is always a falling running minimum
+_OPEN_DTYPE = np.dtype([
+    ('born', '<i8'),            # Bar index of the gap bar
+    ('time', '<i8'),
+    ('deadline', '<i8'),        # Last bar open time the gap is followed
+    ('max_price', '<f8'),
+    ('min_price', '<f8'),
+    ('approach_level', '<f8'),
+    ('touch_level', '<f8'),     # Gap edge price reaches first
+    ('fill_level', '<f8'),      # Far gap edge
+    ('approach_at', '<i8'),
+    ('touch_at', '<i8'),
+    ('fill_at', '<i8'),
+    ('fill_time', '<i8'),
+    ('last_seen', '<i8'),       # Last bar index the gap was followed through
+    ('reach', '<f8'),           # Running minimum of the adverse series
+    ('extreme', '<f8'),         # Running maximum of the favourable series before the fill
+])
+_EVENTS = ('approach', 'touch', 'fill')
+
+
+class _GapSide:
+    """Open bull or bear gaps of one symbol and their progress"""
+
+    def __init__(self, is_bull: bool, proximity_percent: float):
+        self.is_bull = is_bull
+        self.ratio = 1 + proximity_percent / 100
+        self.open = np.zeros(0, dtype=_OPEN_DTYPE)
+
+    def series(self, high: np.ndarray, low: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(adverse, favourable) price series: price falls into a gap in the first and runs away in the second"""
+        return (low, high) if self.is_bull else (-high, -low)
+
+    def new(self, born: np.ndarray, times: np.ndarray, max_age: Optional[int],
+            max_price: np.ndarray, min_price: np.ndarray) -> np.ndarray:
+        gaps = np.zeros(len(born), dtype=_OPEN_DTYPE)
+        gaps['born'] = born
+        gaps['time'] = times
+        gaps['deadline'] = times + max_age if max_age else np.iinfo(np.int64).max
+        gaps['max_price'] = max_price
+        gaps['min_price'] = min_price
+        if self.is_bull:
+            # is_approaching: max_price < price <= max_price * (1 + proximity)
+            gaps['touch_level'] = max_price
+            gaps['fill_level'] = min_price
+            gaps['approach_level'] = max_price * self.ratio
+        else:
+            # is_approaching: min_price / (1 + proximity) <= price < min_price
+            gaps['touch_level'] = -min_price
+            gaps['fill_level'] = -max_price
+            gaps['approach_level'] = -min_price / self.ratio
+        for event in _EVENTS:
+            gaps[f'{event}_at'] = -1
+        gaps['fill_time'] = -1
+        gaps['last_seen'] = born
+        gaps['reach'] = np.inf
+        gaps['extreme'] = -np.inf
+        return gaps
+
+    def advance(self, adverse: np.ndarray, favourable: np.ndarray, times: np.ndarray, first: int) -> List[np.ndarray]:
+        """Follow the open gaps through one block of bars (bar ``first`` onwards); returns the finished ones"""
+        gaps = self.open
+        if len(gaps) == 0:
+            return []
+        reach = np.minimum.accumulate(adverse)
+        falling = -reach  # Ascending, for searchsorted
+        extreme = np.maximum.accumulate(favourable)
+        limit = np.searchsorted(times, gaps['deadline'], side='right')  # Bars of the block each gap still sees
+        hit_at = {}
+        for event in _EVENTS:
+            hit_at[event] = np.searchsorted(falling, -gaps[f'{event}_level'], side='left')
+            new_hit = (gaps[f'{event}_at'] < 0) & (hit_at[event] < limit)
+            gaps[f'{event}_at'][new_hit] = first + hit_at[event][new_hit]
+        fill = hit_at['fill']
+        filled = fill < limit
+        gaps['fill_time'][filled] = times[fill[filled]]
+        # The fill bar counts for the depth but not for the excursion before it
+        seen = np.where(filled, fill, limit - 1)
+        has = seen >= 0
+        gaps['reach'][has] = np.minimum(gaps['reach'][has], reach[seen[has]])
+        gaps['last_seen'][has] = first + seen[has]
+        before = seen - filled
+        has = before >= 0
+        gaps['extreme'][has] = np.maximum(gaps['extreme'][has], extreme[before[has]])
+        return self._finish(filled, ~filled & (limit < len(times)))
+
+    def add(self, gaps: np.ndarray, adverse: np.ndarray, favourable: np.ndarray, times: np.ndarray,
+            first: int) -> List[np.ndarray]:
+        """Follow gaps born inside a block through the rest of it, then keep the unfinished ones open"""
+        if len(gaps) == 0:
+            return []
+        cols = np.arange(len(times))
+        after = cols[None, :] > (gaps['born'] - first)[:, None]
+        limit = np.searchsorted(times, gaps['deadline'], side='right')
+        seen_mask = after & (cols[None, :] < limit[:, None])
+        hit_at = {}
+        for event in _EVENTS:
+            hit = seen_mask & (adverse[None, :] <= gaps[f'{event}_level'][:, None])
+            any_hit = hit.any(axis=1)
+            hit_at[event] = np.where(any_hit, hit.argmax(axis=1), len(times))
+            gaps[f'{event}_at'][any_hit] = first + hit_at[event][any_hit]
+        fill = hit_at['fill']
+        filled = fill < len(times)
+        gaps['fill_time'][filled] = times[fill[filled]]
+        seen = np.where(filled, fill, limit - 1)
+        gaps['reach'] = np.where(seen_mask & (cols[None, :] <= seen[:, None]), adverse[None, :], np.inf).min(axis=1)
+        before = seen + ~filled  # Bars before the fill, or all seen ones
+        gaps['extreme'] = np.where(seen_mask & (cols[None, :] < before[:, None]), favourable[None, :],
+                                   -np.inf).max(axis=1)
+        gaps['last_seen'] = np.maximum(gaps['born'], first + seen)
+        self.open = np.concatenate([self.open, gaps])
+        # The new gaps are the tail of the open set
+        tail = np.zeros(len(self.open), dtype=bool)
+        tail_filled, tail_expired = tail.copy(), tail.copy()
+        tail_filled[-len(gaps):] = filled
+        tail_expired[-len(gaps):] = ~filled & (limit < len(times))
+        return self._finish(tail_filled, tail_expired)
+
+    def _finish(self, filled: np.ndarray, expired: np.ndarray) -> List[np.ndarray]:
+        done = filled | expired
+        if not done.any():
+            return []
+        finished = [(self.open[filled], FILLED), (self.open[expired], EXPIRED)]
+        self.open = self.open[~done]
+        return [self.outcomes(gaps, status) for gaps, status in finished if len(gaps)]
+
+    def outcomes(self, gaps: np.ndarray, status: int) -> np.ndarray:
+        out = np.zeros(len(gaps), dtype=[(name, dtype) for name, dtype in OUTCOME_SCHEMA.items()])
+        out['is_bull'] = self.is_bull
+        out['time'] = gaps['time']
+        out['max_price'] = gaps['max_price']
+        out['min_price'] = gaps['min_price']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out['gap_pct'] = (gaps['max_price'] - gaps['min_price']) / gaps['min_price'] * 100
+            height = gaps['touch_level'] - gaps['fill_level']
+            out['fill_ratio'] = np.clip((gaps['touch_level'] - gaps['reach']) / height, 0.0, 1.0)
+            away = (gaps['extreme'] - gaps['touch_level']) / np.abs(gaps['touch_level']) * 100
+        out['excursion_pct'] = np.where(np.isfinite(away), np.maximum(away, 0.0), 0.0)
+        for event in _EVENTS:
+            at = gaps[f'{event}_at']
+            out[f'bars_to_{event}'] = np.where(at >= 0, at - gaps['born'], -1)
+        filled = gaps['fill_at'] >= 0
+        out['fill_ratio'][filled] = 1.0
+        out['seconds_to_fill'] = np.where(filled, gaps['fill_time'] - gaps['time'], -1)
+        out['bars_observed'] = gaps['last_seen'] - gaps['born']
+        out['status'] = status
+        return out
+
+
+class FVGOutcomeTracker:
+    """Detects gaps in streamed bar chunks of one symbol/timeframe and follows each one to its outcome"""
+
+    def __init__(self, threshold_percent: float = 0.0, auto_threshold: bool = False,
+                 proximity_percent: float = 0.1, max_age_days: float = 30.0):
+        self.threshold_percent = threshold_percent
+        self.auto_threshold = auto_threshold
+        self.max_age = int(max_age_days * 86400) if max_age_days else None
+        self.sides = (_GapSide(True, proximity_percent), _GapSide(False, proximity_percent))
+        self.threshold_state = ThresholdState()
+        self.bars = 0  # Bars processed
+        self.gaps = 0  # Gaps detected
+        self.last_time: Optional[int] = None
+        self._tail = np.zeros(0, dtype=RATES_DTYPE)  # Last two bars, the anchors of the next chunk's first gaps
+
+    def update(self, rates: np.ndarray) -> np.ndarray:
+        """Process a chunk of closed bars (oldest first); returns the outcomes of the gaps finished in it"""
+        if self.last_time is not None:
+            rates = rates[rates['time'] > self.last_time]
+        n = len(rates)
+        if n == 0:
+            return np.zeros(0, dtype=list(OUTCOME_SCHEMA.items()))
+        times = np.ascontiguousarray(rates['time'])
+        high = np.ascontiguousarray(rates['high'], dtype=np.float64)
+        low = np.ascontiguousarray(rates['low'], dtype=np.float64)
+
+        tail_len = len(self._tail)
+        window = np.concatenate([self._tail, rates]) if tail_len else rates
+        if self.auto_threshold:
+            threshold = np.concatenate([np.full(tail_len, np.nan), self.threshold_state.extend(high, low)])
+        else:
+            threshold = self.threshold_percent / 100
+        w_high, w_low = window['high'].astype(np.float64), window['low'].astype(np.float64)
+        bull, bear = fvg_masks(w_high, w_low, window['close'].astype(np.float64), threshold)
+        # Bull gap spans high[i-2]..low[i], bear gap spans high[i]..low[i-2]
+        new = {}
+        for side, mask in zip(self.sides, (bull, bear)):
+            hits = np.flatnonzero(mask)
+            at = hits - tail_len  # Chunk positions
+            max_price = w_low[hits] if side.is_bull else w_low[hits - 2]
+            min_price = w_high[hits - 2] if side.is_bull else w_high[hits]
+            new[side.is_bull] = side.new(self.bars + at, times[at], self.max_age, max_price, min_price)
+            self.gaps += len(hits)
+
+        finished: List[np.ndarray] = []
+        for start in range(0, n, BLOCK_BARS):
+            stop = min(n, start + BLOCK_BARS)
+            first = self.bars + start
+            for side in self.sides:
+                adverse, favourable = side.series(high[start:stop], low[start:stop])
+                finished += side.advance(adverse, favourable, times[start:stop], first)
+                born = new[side.is_bull]
+                in_block = born[(born['born'] >= first) & (born['born'] < first + stop - start)]
+                finished += side.add(in_block, adverse, favourable, times[start:stop], first)
+
+        self._tail = window[-2:].copy()
+        self.bars += n
+        self.last_time = int(times[-1])
+        return self._concat(finished)
+
+    def finish(self) -> np.ndarray:
+        """Outcomes of the gaps still open when the data ends"""
+        finished = [side.outcomes(side.open, OPEN) for side in self.sides if len(side.open)]
+        for side in self.sides:
+            side.open = side.open[:0]
+        return self._concat(finished)
+
+    @staticmethod
+    def _concat(parts: List[np.ndarray]) -> np.ndarray:
+        if not parts:
+            return np.zeros(0, dtype=list(OUTCOME_SCHEMA.items()))
+        out = np.concatenate(parts)
+        return out[np.argsort(out['time'], kind='stable')]
+
+    @property
+    def open_gaps(self) -> int:
+        return sum(len(side.open) for side in self.sides)
+
+
+# === Bar sources ===
+def terminal_chunks(terminal, symbol: str, timeframe: int, start: float, end: float,
+                    chunk_bars: int) -> Iterator[np.ndarray]:
+    """Closed bars opening in [start, end) from ``copy_rates_range``, ``chunk_bars`` worth of time per request"""
+    bar_seconds = timeframe_seconds(timeframe)
+    step = chunk_bars * bar_seconds
+    t = int(start)
+    while t < end:
+        t_next = int(min(end, t + step))
+        rates = terminal.copy_rates_range(symbol, timeframe, datetime.fromtimestamp(t, timezone.utc),
+                                          datetime.fromtimestamp(t_next - 1, timezone.utc))
+        if rates is not None and len(rates):
+            rates = rates[rates['time'] + bar_seconds <= end]
+            if len(rates):
+                yield rates
+        t = t_next
+
+
+def cache_chunks(cache: BarCache, symbol: str, timeframe: int, start: float, end: float,
+                 chunk_bars: int) -> Iterator[np.ndarray]:
+    """Closed bars opening in [start, end) from a bar cache file, read chunk by chunk from its memory map"""
+    bars = cache.cached(symbol, timeframe)
+    times = bars['time']
+    bar_seconds = timeframe_seconds(timeframe)
+    i0 = int(np.searchsorted(times, start, side='left'))
+    i1 = int(np.searchsorted(times, end - bar_seconds, side='right'))
+    for i in range(i0, i1, chunk_bars):
+        yield np.array(bars[i:min(i1, i + chunk_bars)])
+
+
+def cached_symbols(root: str, timeframe: int) -> List[str]:
+    """Symbols with a bar cache file for ``timeframe`` (file names as ``BarCache.path`` writes them)"""
+    suffix = f"_{timeframe}.bin"
+    return sorted(name[:-len(suffix)] for name in os.listdir(root) if name.endswith(suffix))
+
+
+# === Process pool ===
+_worker: Dict[str, object] = {}
+
+
+def _init_worker(cache_dir: Optional[str]):
+    """Pool initializer: one terminal connection (or bar cache reader) per process"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if cache_dir:
+        _worker['cache'] = BarCache(None, cache_dir)
+    else:
+        terminal = load_terminal()
+        if not terminal.initialize():
+            raise RuntimeError(f"MT5 initialization failed: {terminal.last_error()}")
+        _worker['terminal'] = terminal
+
+
+def _part_name(symbol: str, timeframe: int) -> str:
+    return f"{re.sub(r'[^A-Za-z0-9._-]', '_', symbol)}_{timeframe_name(timeframe)}"
+
+
+def backtest_symbol(symbol: str, timeframe: int, start: float, end: float, out: str,
+                    threshold_percent: float = 0.0, auto_threshold: bool = False,
+                    proximity_percent: float = 0.1, max_age_days: float = 30.0,
+                    chunk_bars: int = 50_000) -> Dict[str, object]:
+    """Stream one symbol/timeframe through a tracker into its own part of the outcome store"""
+    tracker = FVGOutcomeTracker(threshold_percent, auto_threshold, proximity_percent, max_age_days)
+    if 'cache' in _worker:
+        chunks = cache_chunks(_worker['cache'], symbol, timeframe, start, end, chunk_bars)
+    else:
+        chunks = terminal_chunks(_worker['terminal'], symbol, timeframe, start, end, chunk_bars)
+
+    started = time.perf_counter()
+    outcomes = 0
+    with ColumnWriter(out, OUTCOME_SCHEMA, part=_part_name(symbol, timeframe)) as writer:
+        def write(rows: np.ndarray):
+            if len(rows):
+                rows['symbol'] = symbol.encode()[:16]
+                rows['timeframe'] = timeframe
+                writer.append({name: rows[name] for name in OUTCOME_SCHEMA})
+
+        for rates in chunks:
+            write(tracker.update(rates))
+        write(tracker.finish())
+        outcomes = writer.rows
+    return {'symbol': symbol, 'timeframe': timeframe_name(timeframe), 'bars': tracker.bars,
+            'gaps': outcomes, 'seconds': time.perf_counter() - started}
+
+
+def run_backtest(tasks: List[Tuple[str, int]], start: float, end: float, out: str, workers: Optional[int] = None,
+                 cache_dir: Optional[str] = None, **options) -> pd.DataFrame:
+    """Run every (symbol, timeframe) task on a process pool; one row of counts per task"""
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1, initializer=_init_worker,
+                             initargs=(cache_dir,)) as pool:
+        futures = {pool.submit(backtest_symbol, symbol, timeframe, start, end, out, **options): (symbol, timeframe)
+                   for symbol, timeframe in tasks}
+        for done, future in enumerate(as_completed(futures), 1):
+            symbol, timeframe = futures[future]
+            try:
+                row = future.result()
+            except Exception as e:
+                logger.error(f"{symbol} {timeframe_name(timeframe)}: {e}")
+                continue
+            rows.append(row)
+            logger.info(f"[{done}/{len(tasks)}] {row['symbol']} {row['timeframe']}: {row['bars']:,} bars, "
+                        f"{row['gaps']:,} gaps ({row['seconds']:.1f} s)")
+    return pd.DataFrame(rows)
+
+
+def summarize(out: str) -> pd.DataFrame:
+    """Fill rate, time to fill and excursion per symbol and timeframe of an outcome store"""
+    df = read_frame(out, ['symbol', 'timeframe', 'status', 'bars_to_touch', 'bars_to_fill', 'seconds_to_fill',
+                          'fill_ratio', 'excursion_pct'])
+    df['timeframe'] = df['timeframe'].map(timeframe_name)
+    df['filled'] = df['status'] == FILLED
+    df['touched'] = df['bars_to_touch'] >= 0
+    df['hours_to_fill'] = df['seconds_to_fill'].where(df['filled']) / 3600
+    df['bars_to_fill'] = df['bars_to_fill'].where(df['filled'])
+    return df.groupby(['symbol', 'timeframe']).agg(
+        gaps=('filled', 'size'),
+        fill_rate=('filled', 'mean'),
+        touch_rate=('touched', 'mean'),
+        median_bars_to_fill=('bars_to_fill', 'median'),
+        median_hours_to_fill=('hours_to_fill', 'median'),
+        mean_fill_ratio=('fill_ratio', 'mean'),
+        median_excursion_pct=('excursion_pct', 'median'),
+    )
+
+
+def _epoch(text: str) -> float:
+    return datetime.strptime(text, '%Y-%m-%d').replace(tzinfo=timezone.utc).timestamp()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Historical FVG outcomes per symbol and timeframe')
+    parser.add_argument('--symbols', nargs='+', help='Symbols (default with --cache: every cached symbol)')
+    parser.add_argument('--timeframes', nargs='+', default=['H4'], help='M1..M30, H1..H12, D1, W1')
+    parser.add_argument('--start', help='First bar date YYYY-MM-DD (UTC, default: 2 years back)')
+    parser.add_argument('--end', help='End date YYYY-MM-DD (UTC, default: now)')
+    parser.add_argument('--cache', help='Read bars from this bar cache directory instead of the terminal')
+    parser.add_argument('--threshold', type=float, default=0.0, help='Minimum gap size in percent')
+    parser.add_argument('--auto-threshold', action='store_true')
+    parser.add_argument('--proximity', type=float, default=0.1, help='is_approaching band in percent')
+    parser.add_argument('--max-age-days', type=float, default=30.0,
+                        help='Follow gaps this long, as the screener lookback (0 = until the data ends)')
+    parser.add_argument('--chunk-bars', type=int, default=50_000)
+    parser.add_argument('--workers', type=int, help='Worker processes (default: all cores)')
+    parser.add_argument('--out', default='fvg_outcomes', help='Column store directory for the per-gap outcomes')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if os.path.exists(args.out):
+        parser.error(f"{args.out} exists; choose another --out")
+    try:
+        timeframes = [parse_timeframe(name) for name in args.timeframes]
+    except ValueError as e:
+        parser.error(str(e))
+    if not args.symbols and not args.cache:
+        parser.error('--symbols is required when reading from the terminal')
+    end = _epoch(args.end) if args.end else time.time()
+    start = _epoch(args.start) if args.start else end - 2 * 365 * 86400
+
+    tasks = [(symbol, timeframe) for timeframe in timeframes
+             for symbol in (args.symbols or cached_symbols(args.cache, timeframe))]
+    started = time.perf_counter()
+    counts = run_backtest(tasks, start, end, args.out, args.workers, args.cache,
+                          threshold_percent=args.threshold, auto_threshold=args.auto_threshold,
+                          proximity_percent=args.proximity, max_age_days=args.max_age_days,
+                          chunk_bars=args.chunk_bars)
+    elapsed = time.perf_counter() - started
+    if counts.empty:
+        print("No bars processed")
+        return
+
+    print(f"\n{counts['bars'].sum():,} bars, {counts['gaps'].sum():,} gaps in {len(counts)} symbol/timeframe(s) "
+          f"in {elapsed:.1f} s ({counts['bars'].sum() / elapsed:,.0f} bars/s)")
+    with pd.option_context('display.width', 200, 'display.float_format', '{:.3f}'.format):
+        print(summarize(args.out).to_string())
+    print(f"Per-gap outcomes in {args.out}/ (column_store.read_frame)")
+
+
+if __name__ == "__main__":
+    main()
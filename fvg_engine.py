@@ -0,0 +1,378 @@
+# This work is licensed under a Attribution-NonCommercial-ShareAlike 4.0 International (CC BY-NC-SA 4.0) https://creativecommons.org/licenses/by-nc-sa/4.0/
+# © LuxAlgo - Vectorized FVG detection engine
+
+import bisect
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass
+class FVG:
+    """Fair Value Gap data structure"""
+    max_price: float
+    min_price: float
+    is_bull: bool
+    timestamp: datetime
+    bar_index: int
+    fill_ratio: float = 0.0  # Deepest wick penetration into the gap (0 = untouched, 1 = filled)
+    filled_time: Optional[datetime] = None  # Bar time at which the gap was fully filled
+
+    @property
+    def is_filled(self) -> bool:
+        return self.fill_ratio >= 1.0
+
+
+def is_approaching(current_price: float, fvg: FVG, proximity_percent: float) -> bool:
+    """Check if price is approaching FVG zone within proximity threshold"""
+    if fvg.is_bull:
+        # For bullish FVG, check if price is approaching from above
+        if current_price > fvg.max_price:
+            return current_price - fvg.max_price <= fvg.max_price * (proximity_percent / 100)
+    else:
+        # For bearish FVG, check if price is approaching from below
+        if current_price < fvg.min_price:
+            return fvg.min_price - current_price <= current_price * (proximity_percent / 100)
+    return False
+
+
+@dataclass
+class ThresholdState:
+    """Running sum of (high - low) / low backing the auto threshold of one symbol.
+
+    The auto threshold at bar ``i`` is the cumulative mean of the high/low range
+    ratio over all bars up to and including ``i``. Keeping the sum and count means
+    a new bar adds one term instead of recomputing the expanding mean.
+    """
+    hl_sum: float = 0.0
+    count: int = 0
+
+    def extend(self, high: np.ndarray, low: np.ndarray) -> np.ndarray:
+        """Add bars to the running sum and return the threshold after each of them"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            hl_ratio = (np.asarray(high, dtype=np.float64) - low) / low
+        # NaN ratios are skipped, like pandas' expanding().mean()
+        valid = ~np.isnan(hl_ratio)
+        sums = self.hl_sum + np.cumsum(np.where(valid, hl_ratio, 0.0))
+        counts = self.count + np.cumsum(valid)
+        if len(hl_ratio):
+            self.hl_sum = float(sums[-1])
+            self.count = int(counts[-1])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return sums / counts
+
+    @property
+    def value(self) -> float:
+        """Current threshold (NaN before the first valid bar)"""
+        return self.hl_sum / self.count if self.count else float('nan')
+
+
+def fvg_masks(high: np.ndarray,
+              low: np.ndarray,
+              close: np.ndarray,
+              threshold: Union[float, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """Return bull/bear FVG masks for every bar of an OHLC array.
+
+    Element ``i`` of each mask refers to the bar closing the gap (``current`` in
+    the original loop), ``i-1`` is the impulse bar and ``i-2`` the anchor bar.
+    ``threshold`` is either a scalar or one value per bar.
+    """
+    n = len(high)
+    bull = np.zeros(n, dtype=bool)
+    bear = np.zeros(n, dtype=bool)
+    if n < 3:
+        return bull, bear
+
+    cur_high, cur_low = high[2:], low[2:]
+    prev1_close = close[1:-1]
+    prev2_high, prev2_low = high[:-2], low[:-2]
+    thr = threshold[2:] if np.ndim(threshold) else threshold
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Bullish FVG: low > high[2] and close[1] > high[2]
+        bull[2:] = ((cur_low > prev2_high) &
+                    (prev1_close > prev2_high) &
+                    ((cur_low - prev2_high) / prev2_high > thr))
+
+        # Bearish FVG: high < low[2] and close[1] < low[2]
+        bear[2:] = ((cur_high < prev2_low) &
+                    (prev1_close < prev2_low) &
+                    ((prev2_low - cur_high) / cur_high > thr))
+
+    # A bar is never both; the original loop gave bull precedence
+    bear &= ~bull
+    return bull, bear
+
+
+def detect_fvgs(df: pd.DataFrame, threshold: Union[float, np.ndarray]) -> List[FVG]:
+    """Detect all FVGs in a time-indexed OHLC DataFrame (as returned by ``get_data``)"""
+    if df is None or len(df) < 3:
+        return []
+
+    high = df['high'].to_numpy(dtype=np.float64)
+    low = df['low'].to_numpy(dtype=np.float64)
+    close = df['close'].to_numpy(dtype=np.float64)
+    bull, bear = fvg_masks(high, low, close, threshold)
+
+    hits = np.flatnonzero(bull | bear)
+    is_bull = bull[hits]
+    # Bull gap spans high[i-2]..low[i], bear gap spans high[i]..low[i-2]
+    max_prices = np.where(is_bull, low[hits], low[hits - 2])
+    min_prices = np.where(is_bull, high[hits - 2], high[hits])
+    timestamps = df.index[hits]
+
+    return [
+        FVG(max_price=max_p, min_price=min_p, is_bull=bool(b), timestamp=ts, bar_index=int(i))
+        for max_p, min_p, b, ts, i in zip(max_prices, min_prices, is_bull, timestamps, hits)
+    ]
+
+
+class FVGIndex:
+    """Price-sorted index of the active FVGs of one symbol.
+
+    Bull gaps are keyed by ``max_price`` and bear gaps by ``min_price``, the edge
+    price reaches first when it comes back to the gap. Zone and proximity queries
+    are binary searches, so thousands of tracked gaps stay cheap to classify.
+    """
+
+    def __init__(self, fvgs: Iterable[FVG] = ()):
+        self._bull_keys: List[float] = []
+        self._bull: List[FVG] = []
+        self._bear_keys: List[float] = []
+        self._bear: List[FVG] = []
+        for fvg in fvgs:
+            self.add(fvg)
+
+    def __len__(self) -> int:
+        return len(self._bull) + len(self._bear)
+
+    @property
+    def bull_count(self) -> int:
+        return len(self._bull)
+
+    @property
+    def bear_count(self) -> int:
+        return len(self._bear)
+
+    def _side(self, fvg: FVG) -> Tuple[List[float], List[FVG], float]:
+        if fvg.is_bull:
+            return self._bull_keys, self._bull, fvg.max_price
+        return self._bear_keys, self._bear, fvg.min_price
+
+    def add(self, fvg: FVG):
+        keys, items, key = self._side(fvg)
+        pos = bisect.bisect_right(keys, key)
+        keys.insert(pos, key)
+        items.insert(pos, fvg)
+
+    def remove(self, fvg: FVG) -> bool:
+        keys, items, key = self._side(fvg)
+        for pos in range(bisect.bisect_left(keys, key), bisect.bisect_right(keys, key)):
+            if items[pos] is fvg:
+                del keys[pos], items[pos]
+                return True
+        return False
+
+    def bulls_above(self, price: float) -> List[FVG]:
+        """Bull gaps whose upper edge is above price (price has traded into them)"""
+        return self._bull[bisect.bisect_right(self._bull_keys, price):]
+
+    def bears_below(self, price: float) -> List[FVG]:
+        """Bear gaps whose lower edge is below price (price has traded into them)"""
+        return self._bear[:bisect.bisect_left(self._bear_keys, price)]
+
+    def active(self, price: float) -> Tuple[List[FVG], List[FVG]]:
+        """Bull gaps with price <= max_price and bear gaps with price >= min_price"""
+        return (self._bull[bisect.bisect_left(self._bull_keys, price):],
+                self._bear[:bisect.bisect_right(self._bear_keys, price)])
+
+    def approaching(self, price: float, proximity_percent: float) -> Tuple[List[FVG], List[FVG]]:
+        """Gaps that ``is_approaching`` reports for price, found by binary search"""
+        ratio = 1 + proximity_percent / 100
+        # Slightly widened search bounds; the exact rule is applied to the slice
+        lo = bisect.bisect_left(self._bull_keys, price / ratio * (1 - 1e-12))
+        hi = bisect.bisect_left(self._bull_keys, price)
+        bulls = [fvg for fvg in self._bull[lo:hi] if is_approaching(price, fvg, proximity_percent)]
+        lo = bisect.bisect_right(self._bear_keys, price)
+        hi = bisect.bisect_right(self._bear_keys, price * ratio * (1 + 1e-12))
+        bears = [fvg for fvg in self._bear[lo:hi] if is_approaching(price, fvg, proximity_percent)]
+        return bulls, bears
+
+    def classify(self,
+                 price: float,
+                 proximity_percent: float,
+                 include_approaching: bool = True) -> Tuple[Optional[str], Optional[FVG]]:
+        """Return the report state for price and the FVG that set it.
+
+        Same result as walking every gap in bar order with the report priority
+        (AKTIV > NÆRMER, latest gap wins), but only the gaps matched by the index
+        are visited. Returns ``(None, None)`` if price is not in or near any gap.
+        """
+        bull_active, bear_active = self.active(price)
+        candidates = [(fvg, "BULL AKTIV") for fvg in bull_active]
+        candidates += [(fvg, "BEAR AKTIV") for fvg in bear_active]
+        if include_approaching:
+            bull_near, bear_near = self.approaching(price, proximity_percent)
+            candidates += [(fvg, "BULL NÆRMER") for fvg in bull_near]
+            candidates += [(fvg, "BEAR NÆRMER") for fvg in bear_near]
+        candidates.sort(key=lambda c: c[0].timestamp)
+
+        state = None
+        state_fvg = None
+        latest_time = None
+        for fvg, kind in candidates:
+            if latest_time is not None and fvg.timestamp <= latest_time:
+                continue
+            if kind == "BULL NÆRMER" and state == "BULL AKTIV":
+                continue
+            if kind == "BEAR NÆRMER" and state in ("BULL AKTIV", "BEAR AKTIV"):
+                continue
+            state, state_fvg, latest_time = kind, fvg, fvg.timestamp
+        return state, state_fvg
+
+
+def _first_index(mask_at, start: int, stop: int) -> int:
+    """First index in [start, stop) where ``mask_at(lo, hi)`` is true, scanning in growing windows.
+
+    Fills usually happen within a few bars, so this avoids a full-length comparison
+    per gap. Returns ``stop`` if there is no hit.
+    """
+    lo, width = start, 16
+    while lo < stop:
+        hi = min(stop, lo + width)
+        hits = np.flatnonzero(mask_at(lo, hi))
+        if len(hits):
+            return lo + int(hits[0])
+        lo, width = hi, width * 8
+    return stop
+
+
+class IncrementalFVGDetector:
+    """Bar-close-driven FVG state for one symbol.
+
+    Keeps the last two closed bars and the running threshold so each update only
+    looks at bars newer than the last processed one. Every processed bar is also
+    checked against the tracked gaps: wicks into a gap raise its ``fill_ratio`` and
+    fully filled gaps are dropped (they are reported in ``last_filled``). FVGs older
+    than ``lookback`` (relative to the newest processed bar) are aged out.
+    ``bar_index`` of detected FVGs counts closed bars since the detector was created.
+    """
+
+    def __init__(self,
+                 threshold_percent: float = 0.0,
+                 auto_threshold: bool = False,
+                 lookback: Optional[timedelta] = None):
+        self.threshold_percent = threshold_percent
+        self.auto_threshold = auto_threshold
+        self.lookback = lookback
+
+        self.fvgs: List[FVG] = []  # Active (not fully filled) gaps in bar order
+        self.index = FVGIndex()
+        self.last_filled: List[FVG] = []  # Gaps filled by the last update
+        self.threshold_state = ThresholdState()
+        self.last_bar_time: Optional[pd.Timestamp] = None
+        self.bars_processed = 0
+        self._tail: Optional[pd.DataFrame] = None  # Last two closed bars
+
+    def update(self, df: Optional[pd.DataFrame]) -> List[FVG]:
+        """Process closed bars from a time-indexed OHLC DataFrame and return the new FVGs.
+
+        Bars at or before ``last_bar_time`` are ignored, so overlapping fetches are safe.
+        """
+        self.last_filled = []
+        if df is None or df.empty:
+            return []
+        if self.last_bar_time is not None:
+            df = df[df.index > self.last_bar_time]
+            if df.empty:
+                return []
+
+        bars = df[['high', 'low', 'close']]
+        tail_len = 0 if self._tail is None else len(self._tail)
+        window = bars if tail_len == 0 else pd.concat([self._tail, bars])
+
+        if self.auto_threshold:
+            threshold = np.concatenate([
+                np.full(tail_len, np.nan),
+                self.threshold_state.extend(bars['high'].to_numpy(), bars['low'].to_numpy())
+            ])
+        else:
+            threshold = self.threshold_percent / 100
+
+        times = bars.index
+        high = bars['high'].to_numpy(dtype=np.float64)
+        low = bars['low'].to_numpy(dtype=np.float64)
+
+        # Existing gaps see the whole batch
+        self._mitigate(self.index.bulls_above(low.min()), times, high, low, 0)
+        self._mitigate(self.index.bears_below(high.max()), times, high, low, 0)
+
+        new_fvgs = detect_fvgs(window, threshold)
+        offset = self.bars_processed - tail_len
+        if new_fvgs:
+            # New gaps only see the bars after their own
+            low_after = np.minimum.accumulate(low[::-1])[::-1]
+            high_after = np.maximum.accumulate(high[::-1])[::-1]
+            for fvg in new_fvgs:
+                start = fvg.bar_index - tail_len + 1
+                fvg.bar_index += offset
+                if start < len(bars):
+                    edge = low_after[start] if fvg.is_bull else high_after[start]
+                    self._mitigate([fvg], times, high, low, start, edge)
+                if not fvg.is_filled:
+                    self.fvgs.append(fvg)
+                    self.index.add(fvg)
+
+        if self.last_filled:
+            for fvg in self.last_filled:
+                self.index.remove(fvg)
+            # Update in place so callers holding the list see the change
+            self.fvgs[:] = [fvg for fvg in self.fvgs if not fvg.is_filled]
+
+        self._tail = window.iloc[-2:]
+        self.bars_processed += len(bars)
+        self.last_bar_time = times[-1]
+        self.expire()
+        return new_fvgs
+
+    def _mitigate(self, fvgs: List[FVG], times, high: np.ndarray, low: np.ndarray,
+                  start: int, edge: Optional[float] = None):
+        """Raise fill ratios from the extreme price reached in bars[start:] (``edge``)"""
+        for fvg in fvgs:
+            if fvg.is_bull:
+                reached = low[start:].min() if edge is None else edge
+                depth = fvg.max_price - reached
+            else:
+                reached = high[start:].max() if edge is None else edge
+                depth = reached - fvg.min_price
+            if depth <= 0:
+                continue
+            height = fvg.max_price - fvg.min_price
+            ratio = min(1.0, float(depth / height)) if height > 0 else 1.0
+            if ratio <= fvg.fill_ratio:
+                continue
+            fvg.fill_ratio = ratio
+            if fvg.is_filled:
+                if fvg.is_bull:
+                    pos = _first_index(lambda lo, hi: low[lo:hi] <= fvg.min_price, start, len(low))
+                else:
+                    pos = _first_index(lambda lo, hi: high[lo:hi] >= fvg.max_price, start, len(high))
+                fvg.filled_time = times[pos]
+                self.last_filled.append(fvg)
+
+    def expire(self) -> int:
+        """Drop FVGs older than the lookback window and return how many were removed"""
+        if self.lookback is None or self.last_bar_time is None:
+            return 0
+        cutoff = self.last_bar_time - self.lookback
+        # FVGs are appended in bar order, so the expired ones are a prefix
+        removed = 0
+        while removed < len(self.fvgs) and self.fvgs[removed].timestamp < cutoff:
+            self.index.remove(self.fvgs[removed])
+            removed += 1
+        if removed:
+            del self.fvgs[:removed]
+        return removed
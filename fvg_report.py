@@ -0,0 +1,685 @@
+"""Per-cycle FVG status snapshot and cached rendering of the HTML report and summary email.
+
+The screener classifies every symbol once per scan cycle into an immutable
+``StatusSnapshot``; the HTML file and the summary email both render from it.
+Table rows are ``string.Template`` fragments cached per symbol and only
+rebuilt when the symbol's state, FVG counts or price bucket change, so a
+render costs the number of changed rows rather than the universe size.
+"""
+
+import math
+from dataclasses import dataclass
+from datetime import datetime
+from string import Template
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from fvg_engine import FVGIndex
+
+# Report groups in display order: (state, icon, section CSS class)
+GROUPS = (
+    ("BULL AKTIV", "🟢", "alert-active"),
+    ("BEAR AKTIV", "🔴", "alert-active"),
+    ("BULL NÆRMER", "🟡", "alert-approaching"),
+    ("BEAR NÆRMER", "🟠", "alert-approaching"),
+    ("OVERVÅKET", "⚪", "alert-monitored"),
+)
+
+
+@dataclass(frozen=True)
+class SymbolStatus:
+    """Report state of one symbol at the end of a scan cycle"""
+    symbol: str
+    price: float
+    bull: int
+    bear: int
+    state: str           # AKTIV > NÆRMER > OVERVÅKET > INGEN FVG (HTML report)
+    detail: str          # Time of the FVG that set the state
+    summary_state: str   # AKTIV > OVERVÅKET > INGEN FVG (summary email, no proximity check)
+    summary_detail: str
+
+    @property
+    def total(self) -> int:
+        return self.bull + self.bear
+
+    def view(self, summary: bool = False) -> Tuple[str, str]:
+        """(state, detail) as shown in the summary email or the HTML report"""
+        return (self.summary_state, self.summary_detail) if summary else (self.state, self.detail)
+
+
+def classify_symbol(index: FVGIndex, price: float, proximity_percent: float,
+                    include_approaching: bool = True) -> Tuple[str, str]:
+    """Report state of a symbol and the time of the FVG that set it"""
+    state, state_fvg = index.classify(price, proximity_percent, include_approaching)
+    detail = state_fvg.timestamp.strftime('%d/%m %H:%M') if state_fvg else ""
+    if state is None:
+        state = "OVERVÅKET" if index.bull_count > 0 or index.bear_count > 0 else "INGEN FVG"
+    return state, detail
+
+
+@dataclass(frozen=True)
+class StatusSnapshot:
+    """Status of every priced symbol after one scan cycle, shared by all renderers"""
+    created: datetime
+    symbols: Tuple[SymbolStatus, ...]  # Sorted by symbol
+
+    @classmethod
+    def build(cls,
+              indexes: Mapping[str, FVGIndex],
+              prices: Mapping[str, float],
+              proximity_percent: float,
+              created: Optional[datetime] = None) -> 'StatusSnapshot':
+        statuses = []
+        for symbol in sorted(indexes):
+            if symbol not in prices:
+                continue
+            index = indexes[symbol]
+            price = prices[symbol]
+            state, detail = classify_symbol(index, price, proximity_percent)
+            summary_state, summary_detail = classify_symbol(index, price, proximity_percent,
+                                                            include_approaching=False)
+            statuses.append(SymbolStatus(symbol, price, index.bull_count, index.bear_count,
+                                         state, detail, summary_state, summary_detail))
+        return cls(created or datetime.now(), tuple(statuses))
+
+    def grouped(self, summary: bool = False) -> List[Tuple[str, str, str, List[SymbolStatus]]]:
+        """(state, icon, section class, symbols) for every group, in display order"""
+        members: Dict[str, List[SymbolStatus]] = {state: [] for state, _, _ in GROUPS}
+        for status in self.symbols:
+            state = status.view(summary)[0]
+            if state in members:
+                members[state].append(status)
+        return [(state, icon, section_class, members[state]) for state, icon, section_class in GROUPS]
+
+    def counts(self, summary: bool = False) -> Dict[str, int]:
+        """Summary box figures"""
+        states = [status.view(summary)[0] for status in self.symbols]
+        return {
+            'symbol_count': len(self.symbols),
+            'total_fvg': sum(s.total for s in self.symbols),
+            'total_bull': sum(s.bull for s in self.symbols),
+            'total_bear': sum(s.bear for s in self.symbols),
+            'active_alerts': sum(1 for state in states if 'AKTIV' in state),
+            'approaching_alerts': sum(1 for state in states if 'NÆRMER' in state),
+        }
+
+
+def fvg_info(status: SymbolStatus) -> str:
+    info = f"{status.total} FVG"
+    if status.bull > 0 and status.bear > 0:
+        info += f" ({status.bull}🟢 {status.bear}🔴)"
+    elif status.bull > 0:
+        info += f" ({status.bull}🟢)"
+    elif status.bear > 0:
+        info += f" ({status.bear}🔴)"
+    return info
+
+
+class ReportRenderer:
+    """Renders a StatusSnapshot through page/section/row templates with cached fragments.
+
+    A row is re-rendered only when its state, detail, FVG counts or price bucket
+    change; a section only when one of its rows or its membership changes. The
+    price shown in a reused row is the one from when it was rendered, which is
+    within ``price_bucket_percent`` of the latest (0 renders on every price change).
+    """
+
+    def __init__(self, page: Template, section: Template, row: Template,
+                 summary: bool = False, price_bucket_percent: float = 0.01):
+        self.page = page
+        self.section = section
+        self.row = row
+        self.summary = summary  # Render the summary email states instead of the report states
+        self.price_bucket_percent = price_bucket_percent
+        self._rows: Dict[str, Tuple[tuple, str]] = {}
+        self._sections: Dict[str, Tuple[tuple, str]] = {}
+        self.rows_rendered = 0  # Rows rebuilt by the last render
+
+    def _bucket(self, price: float):
+        if self.price_bucket_percent <= 0 or price <= 0:
+            return price
+        return math.floor(math.log(price) / math.log1p(self.price_bucket_percent / 100))
+
+    def _row(self, status: SymbolStatus) -> Tuple[tuple, str]:
+        state, detail = status.view(self.summary)
+        key = (state, detail, status.bull, status.bear, self._bucket(status.price))
+        cached = self._rows.get(status.symbol)
+        if cached is not None and cached[0] == key:
+            return cached
+        html = self.row.substitute(
+            symbol=status.symbol,
+            status_class="status-" + state.lower().replace(' ', '-'),
+            state=state,
+            price=f"{status.price:.5f}",
+            detail=detail,
+            fvg_info=fvg_info(status),
+        )
+        self._rows[status.symbol] = (key, html)
+        self.rows_rendered += 1
+        return key, html
+
+    def render(self, snapshot: StatusSnapshot, **fields) -> str:
+        """Full document; ``fields`` fill the page placeholders besides sections and counts"""
+        self.rows_rendered = 0
+        sections = []
+        for state, icon, section_class, members in snapshot.grouped(self.summary):
+            if not members:
+                continue
+            rows = [(status.symbol, *self._row(status)) for status in members]
+            key = tuple((symbol, row_key) for symbol, row_key, _ in rows)
+            cached = self._sections.get(state)
+            if cached is None or cached[0] != key:
+                html = self.section.substitute(
+                    section_class=section_class,
+                    icon=icon,
+                    group=state,
+                    count=len(members),
+                    rows=''.join(html for _, _, html in rows),
+                )
+                cached = (key, html)
+                self._sections[state] = cached
+            sections.append(cached[1])
+
+        # Forget symbols that left the universe
+        if len(self._rows) > len(snapshot.symbols):
+            present = {status.symbol for status in snapshot.symbols}
+            self._rows = {symbol: row for symbol, row in self._rows.items() if symbol in present}
+
+        return self.page.substitute(fields, sections=''.join(sections), **snapshot.counts(self.summary))
+
+
+# === Templates (same markup as the original f-strings) ===
+HTML_PAGE = Template("""<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <meta http-equiv="refresh" content="300">
+    <title>📊 Live FVG Screener - ${current_time}</title>
+    <style>
+        body {
+            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, Arial, sans-serif;
+            margin: 0;
+            padding: 10px;
+            background-color: #f8f9fa;
+            font-size: 14px;
+        }
+        .container {
+            max-width: 1200px;
+            margin: 0 auto;
+            background-color: white;
+            border-radius: 10px;
+            box-shadow: 0 4px 6px rgba(0,0,0,0.1);
+            overflow: hidden;
+        }
+        .header {
+            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+            color: white;
+            padding: 15px;
+            text-align: center;
+        }
+        .header h1 {
+            margin: 0;
+            font-size: 24px;
+        }
+        .header p {
+            margin: 5px 0 0 0;
+            opacity: 0.9;
+            font-size: 14px;
+        }
+        .content {
+            padding: 15px;
+        }
+        .alert-section {
+            margin-bottom: 25px;
+        }
+        .alert-header {
+            display: flex;
+            align-items: center;
+            margin-bottom: 10px;
+            padding: 8px 12px;
+            border-radius: 5px;
+            font-weight: bold;
+            font-size: 16px;
+        }
+        .alert-active {
+            background-color: #d4edda;
+            color: #155724;
+        }
+        .alert-approaching {
+            background-color: #fff3cd;
+            color: #856404;
+        }
+        .alert-monitored {
+            background-color: #f8f9fa;
+            color: #6c757d;
+        }
+        .symbol-table {
+            width: 100%;
+            border-collapse: collapse;
+            margin-bottom: 15px;
+        }
+        .symbol-table th {
+            background-color: #f8f9fa;
+            padding: 8px 10px;
+            text-align: left;
+            border-bottom: 2px solid #dee2e6;
+            font-weight: 600;
+            font-size: 12px;
+        }
+        .symbol-table td {
+            padding: 6px 10px;
+            border-bottom: 1px solid #dee2e6;
+            font-size: 12px;
+        }
+        .symbol-table tr:hover {
+            background-color: #f8f9fa;
+        }
+        .status-badge {
+            padding: 3px 6px;
+            border-radius: 3px;
+            font-size: 10px;
+            font-weight: bold;
+            text-transform: uppercase;
+        }
+        .status-bull-aktiv {
+            background-color: #d4edda;
+            color: #155724;
+        }
+        .status-bear-aktiv {
+            background-color: #f8d7da;
+            color: #721c24;
+        }
+        .status-bull-nærmer {
+            background-color: #fff3cd;
+            color: #856404;
+        }
+        .status-bear-nærmer {
+            background-color: #fce4e0;
+            color: #975a16;
+        }
+        .status-overvåket {
+            background-color: #e2e3e5;
+            color: #383d41;
+        }
+        .summary-box {
+            background-color: #f8f9fa;
+            padding: 15px;
+            border-radius: 8px;
+            margin-top: 15px;
+        }
+        .summary-stats {
+            display: flex;
+            justify-content: space-between;
+            flex-wrap: wrap;
+            gap: 15px;
+        }
+        .stat-item {
+            text-align: center;
+            flex: 1;
+            min-width: 80px;
+        }
+        .stat-value {
+            font-size: 20px;
+            font-weight: bold;
+            color: #495057;
+        }
+        .stat-label {
+            font-size: 12px;
+            color: #6c757d;
+        }
+        .footer {
+            text-align: center;
+            padding: 15px;
+            background-color: #f8f9fa;
+            border-top: 1px solid #dee2e6;
+            font-size: 11px;
+            color: #6c757d;
+        }
+        .live-indicator {
+            display: inline-block;
+            width: 8px;
+            height: 8px;
+            background-color: #28a745;
+            border-radius: 50%;
+            margin-right: 5px;
+            animation: pulse 2s infinite;
+        }
+        @keyframes pulse {
+            0% { opacity: 1; }
+            50% { opacity: 0.5; }
+            100% { opacity: 1; }
+        }
+        
+        /* Mobile responsive */
+        @media (max-width: 768px) {
+            .container {
+                margin: 5px;
+                border-radius: 5px;
+            }
+            .header h1 {
+                font-size: 20px;
+            }
+            .content {
+                padding: 10px;
+            }
+            .summary-stats {
+                gap: 10px;
+            }
+            .stat-item {
+                min-width: 60px;
+            }
+            .symbol-table th,
+            .symbol-table td {
+                padding: 4px 6px;
+                font-size: 11px;
+            }
+        }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1><span class="live-indicator"></span>📊 LIVE FVG SCREENER</h1>
+            <p>Sist oppdatert: ${current_time} • Neste oppdatering: ${next_update}</p>
+        </div>
+        
+        <div class="content">
+${sections}
+            <div class="summary-box">
+                <h3 style="margin-top: 0;">📈 SAMMENDRAG</h3>
+                <div class="summary-stats">
+                    <div class="stat-item">
+                        <div class="stat-value">${symbol_count}</div>
+                        <div class="stat-label">Symboler</div>
+                    </div>
+                    <div class="stat-item">
+                        <div class="stat-value">${total_fvg}</div>
+                        <div class="stat-label">Totalt FVG</div>
+                    </div>
+                    <div class="stat-item">
+                        <div class="stat-value">${total_bull}</div>
+                        <div class="stat-label">Bull FVG</div>
+                    </div>
+                    <div class="stat-item">
+                        <div class="stat-value">${total_bear}</div>
+                        <div class="stat-label">Bear FVG</div>
+                    </div>
+                    <div class="stat-item">
+                        <div class="stat-value">${active_alerts}</div>
+                        <div class="stat-label">Aktive Alerts</div>
+                    </div>
+                    <div class="stat-item">
+                        <div class="stat-value">${approaching_alerts}</div>
+                        <div class="stat-label">Nærmer Seg</div>
+                    </div>
+                </div>
+                <div style="margin-top: 15px; padding-top: 15px; border-top: 1px solid #dee2e6; font-size: 12px; color: #6c757d;">
+                    📧 E-post: ${emails_sent}/${max_emails} • 🌐 HTML: Auto-oppdatering hver 5. minutt
+                </div>
+            </div>
+        </div>
+        
+        <div class="footer">
+            <p>🔄 Siden oppdateres automatisk hver 5. minutt • 📱 Mobilvennlig • 💾 Lagret i OneDrive</p>
+            <p>Generert av Live FVG Screener • © LuxAlgo</p>
+        </div>
+    </div>
+</body>
+</html>
+""")
+
+HTML_SECTION = Template("""
+            <div class="alert-section">
+                <div class="alert-header ${section_class}">
+                    ${icon} ${group} (${count} symboler)
+                </div>
+                <table class="symbol-table">
+                    <thead>
+                        <tr>
+                            <th>Symbol</th>
+                            <th>Status</th>
+                            <th>Pris</th>
+                            <th>Tid</th>
+                            <th>FVG Info</th>
+                        </tr>
+                    </thead>
+                    <tbody>
+${rows}
+                    </tbody>
+                </table>
+            </div>
+""")
+
+HTML_ROW = Template("""
+                        <tr>
+                            <td><strong>${symbol}</strong></td>
+                            <td><span class="status-badge ${status_class}">${state}</span></td>
+                            <td>${price}</td>
+                            <td>${detail}</td>
+                            <td>${fvg_info}</td>
+                        </tr>
+""")
+
+EMAIL_PAGE = Template("""
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <meta charset="UTF-8">
+            <style>
+                body {
+                    font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, Arial, sans-serif;
+                    margin: 0;
+                    padding: 20px;
+                    background-color: #f8f9fa;
+                }
+                .container {
+                    max-width: 800px;
+                    margin: 0 auto;
+                    background-color: white;
+                    border-radius: 10px;
+                    box-shadow: 0 4px 6px rgba(0,0,0,0.1);
+                    overflow: hidden;
+                }
+                .header {
+                    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+                    color: white;
+                    padding: 20px;
+                    text-align: center;
+                }
+                .header h1 {
+                    margin: 0;
+                    font-size: 28px;
+                }
+                .header p {
+                    margin: 10px 0 0 0;
+                    opacity: 0.9;
+                }
+                .content {
+                    padding: 20px;
+                }
+                .alert-section {
+                    margin-bottom: 30px;
+                }
+                .alert-header {
+                    display: flex;
+                    align-items: center;
+                    margin-bottom: 15px;
+                    padding: 10px;
+                    border-radius: 5px;
+                    font-weight: bold;
+                    font-size: 16px;
+                }
+                .alert-active {
+                    background-color: #d4edda;
+                    color: #155724;
+                }
+                .alert-approaching {
+                    background-color: #fff3cd;
+                    color: #856404;
+                }
+                .alert-monitored {
+                    background-color: #f8f9fa;
+                    color: #6c757d;
+                }
+                .symbol-table {
+                    width: 100%;
+                    border-collapse: collapse;
+                    margin-bottom: 20px;
+                }
+                .symbol-table th {
+                    background-color: #f8f9fa;
+                    padding: 12px;
+                    text-align: left;
+                    border-bottom: 2px solid #dee2e6;
+                    font-weight: 600;
+                }
+                .symbol-table td {
+                    padding: 10px 12px;
+                    border-bottom: 1px solid #dee2e6;
+                }
+                .symbol-table tr:hover {
+                    background-color: #f8f9fa;
+                }
+                .status-badge {
+                    padding: 4px 8px;
+                    border-radius: 4px;
+                    font-size: 12px;
+                    font-weight: bold;
+                    text-transform: uppercase;
+                }
+                .status-bull-aktiv {
+                    background-color: #d4edda;
+                    color: #155724;
+                }
+                .status-bear-aktiv {
+                    background-color: #f8d7da;
+                    color: #721c24;
+                }
+                .status-bull-nærmer {
+                    background-color: #fff3cd;
+                    color: #856404;
+                }
+                .status-bear-nærmer {
+                    background-color: #fce4e0;
+                    color: #975a16;
+                }
+                .status-overvåket {
+                    background-color: #e2e3e5;
+                    color: #383d41;
+                }
+                .summary-box {
+                    background-color: #f8f9fa;
+                    padding: 20px;
+                    border-radius: 8px;
+                    margin-top: 20px;
+                }
+                .summary-stats {
+                    display: flex;
+                    justify-content: space-between;
+                    flex-wrap: wrap;
+                }
+                .stat-item {
+                    text-align: center;
+                    margin: 10px;
+                }
+                .stat-value {
+                    font-size: 24px;
+                    font-weight: bold;
+                    color: #495057;
+                }
+                .stat-label {
+                    font-size: 14px;
+                    color: #6c757d;
+                }
+                .footer {
+                    text-align: center;
+                    padding: 20px;
+                    background-color: #f8f9fa;
+                    border-top: 1px solid #dee2e6;
+                    font-size: 12px;
+                    color: #6c757d;
+                }
+            </style>
+        </head>
+        <body>
+            <div class="container">
+                <div class="header">
+                    <h1>📊 FVG SCREENER RAPPORT</h1>
+                    <p>Generert: ${current_time}</p>
+                </div>
+                
+                <div class="content">
+        ${sections}
+                    <div class="summary-box">
+                        <h3 style="margin-top: 0;">📈 SAMMENDRAG</h3>
+                        <div class="summary-stats">
+                            <div class="stat-item">
+                                <div class="stat-value">${symbol_count}</div>
+                                <div class="stat-label">Symboler</div>
+                            </div>
+                            <div class="stat-item">
+                                <div class="stat-value">${total_fvg}</div>
+                                <div class="stat-label">Totalt FVG</div>
+                            </div>
+                            <div class="stat-item">
+                                <div class="stat-value">${total_bull}</div>
+                                <div class="stat-label">Bull FVG</div>
+                            </div>
+                            <div class="stat-item">
+                                <div class="stat-value">${total_bear}</div>
+                                <div class="stat-label">Bear FVG</div>
+                            </div>
+                            <div class="stat-item">
+                                <div class="stat-value">${active_alerts}</div>
+                                <div class="stat-label">Aktive Alerts</div>
+                            </div>
+                            <div class="stat-item">
+                                <div class="stat-value">${approaching_alerts}</div>
+                                <div class="stat-label">Nærmer Seg</div>
+                            </div>
+                        </div>
+                        <div style="margin-top: 15px; padding-top: 15px; border-top: 1px solid #dee2e6; font-size: 12px; color: #6c757d;">
+                            📧 E-post status: ${emails_sent}/${max_emails} sendt i dag
+                        </div>
+                    </div>
+                </div>
+                
+                <div class="footer">
+                    <p>Automatisk rapport fra din FVG Screener • Neste oppdatering om ${next_summary}</p>
+                </div>
+            </div>
+        </body>
+        </html>
+        """)
+
+EMAIL_SECTION = Template("""
+                    <div class="alert-section">
+                        <div class="alert-header ${section_class}">
+                            ${icon} ${group} (${count} symboler)
+                        </div>
+                        <table class="symbol-table">
+                            <thead>
+                                <tr>
+                                    <th>Symbol</th>
+                                    <th>Status</th>
+                                    <th>Pris</th>
+                                    <th>Tid</th>
+                                    <th>FVG Info</th>
+                                </tr>
+                            </thead>
+                            <tbody>
+                ${rows}
+                            </tbody>
+                        </table>
+                    </div>
+                """)
+
+EMAIL_ROW = Template("""
+                                <tr>
+                                    <td><strong>${symbol}</strong></td>
+                                    <td><span class="status-badge ${status_class}">${state}</span></td>
+                                    <td>${price}</td>
+                                    <td>${detail}</td>
+                                    <td>${fvg_info}</td>
+                                </tr>
+                    """)
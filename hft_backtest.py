@@ -0,0 +1,282 @@
+"""Tick-replay backtest of MT5FuturesStrategy on the fake terminal's simulated clock.
+
+The strategy script is loaded unchanged and runs its own ``run_market_trading``
+loop (``detect_algo_patterns`` -> ``execute_fixed_strategy`` -> exits on every
+tick and ``manage_positions``) against ``fake_mt5`` with a manual clock. Only
+the waiting differs: ``wait_for_market_event`` jumps the clock straight to the
+next recorded MT5 tick or Deribit book message instead of polling, so a day of
+ticks replays in under a minute. ``datetime.now()`` and ``time.perf_counter()`` inside
+the strategy read the simulated clock, so cooldowns, the time exit and the
+``trade_history`` times follow the replay.
+
+Fills come from the fake terminal: ``order_latency`` moves the clock before the
+fill price is taken, ``spread_points`` re-quotes every tick at bid + spread and
+``slippage_points`` is charged on every fill. Without a recording the feed is
+the fake terminal's synthetic random walk.
+
+Usage:
+    python hft_backtest.py --data recordings --book book.jsonl --order-latency 0.05 --out backtest
+    python hft_backtest.py --start 1717200000 --hours 24          # synthetic BTCUSD ticks
+"""
+
+import argparse
+import importlib.util
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from importlib.machinery import SourceFileLoader
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import fake_mt5
+from execution_journal import ExecutionJournal
+from order_book import ClockReplayTransport, OrderBookStream
+
+STRATEGY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'HFT-mini-MT5_tr_CCXT')
+
+# Replaces the ``time`` module inside the strategy: every clock reads the fake terminal's
+SIM_TIME = SimpleNamespace(perf_counter=fake_mt5.now, monotonic=fake_mt5.now, time=fake_mt5.now,
+                           sleep=fake_mt5.advance)
+
+
+def sim_clock_ns() -> int:
+    """Simulated epoch time in ns (the execution journal's clock during a backtest)"""
+    return int(fake_mt5.now() * 1e9)
+
+
+class SimDatetime(datetime):
+    """``datetime`` whose ``now()`` is the fake terminal's simulated time (local, like the real one)"""
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.fromtimestamp(fake_mt5.now(), tz)
+
+
+class _OfflineExchange:
+    """Stands in for the ccxt Deribit client: outside the book recording there is no order book"""
+
+    def fetch_order_book(self, symbol, limit=None):
+        return None
+
+
+class _NullJournal:
+    """Execution journal that keeps nothing (backtests without ``journal_path``)"""
+
+    records = 0
+    clock = staticmethod(sim_clock_ns)
+
+    def record(self, *args, **kwargs):
+        pass
+
+    def close(self):
+        pass
+
+
+@dataclass
+class BacktestConfig:
+    """Replay data, fill simulation and strategy overrides of one backtest"""
+    symbol: str = 'BTCUSD'
+    data_dir: Optional[str] = None      # fake_mt5 recordings ({symbol}.npy); None = synthetic ticks
+    book_path: Optional[str] = None     # Deribit book.* data payloads, one JSON object per line
+    ticks: Optional[np.ndarray] = None  # In-memory recording of ``symbol`` (instead of data_dir)
+    spec: Optional[Dict] = None         # Symbol specification of ``ticks``
+    book_messages: Optional[List[Dict]] = None  # In-memory book payloads (instead of book_path)
+    start: Optional[float] = None       # Epoch seconds; default: first recorded tick + warmup
+    hours: Optional[float] = None       # Replay length; default: to the end of the recording (1 h synthetic)
+    warmup: float = 1800.0              # Seconds of ticks before start that the strategy's buffers load
+    order_latency: float = 0.0          # Seconds from order_send to the fill price
+    spread_points: int = 0              # > 0: override the recorded/synthetic spread
+    slippage_points: int = 0            # Adverse slippage on every fill
+    fill_probability: float = 1.0
+    balance: float = 15_000.0
+    seed: int = 0
+    equity_interval: float = 60.0       # Seconds between equity curve points
+    journal_path: Optional[str] = None  # Execution journal of the simulated orders
+    params: Dict[str, object] = field(default_factory=dict)  # Strategy attributes to override
+    verbose: bool = False               # Show the strategy's console output
+
+
+@dataclass
+class BacktestResult:
+    trades: pd.DataFrame   # The strategy's trade_history records
+    equity: pd.DataFrame   # Strategy balance, terminal equity and position per equity_interval
+    ticks: int             # Tick events the strategy handled
+    sim_seconds: float
+    wall_seconds: float
+
+    def summary(self) -> Dict[str, float]:
+        trades = self.trades
+        pnl = trades['pnl'] if len(trades) else pd.Series(dtype=float)
+        equity = self.equity['equity']
+        drawdown = (equity.cummax() - equity).max() if len(equity) else 0.0
+        return {
+            'trades': len(trades),
+            'win_rate': float((pnl > 0).mean()) if len(pnl) else 0.0,
+            'total_pnl': float(pnl.sum()),
+            'terminal_pnl': float(equity.iloc[-1] - equity.iloc[0]) if len(equity) else 0.0,
+            'max_drawdown': float(drawdown),
+            'ticks': self.ticks,
+            'speedup': self.sim_seconds / self.wall_seconds if self.wall_seconds else 0.0,
+        }
+
+
+def load_strategy_module(path: str = STRATEGY_PATH):
+    """Load the strategy script as a module on the fake terminal (its file name is not importable)"""
+    os.environ['MT5_BACKEND'] = 'fake'
+    # Simulated latencies say nothing about the live hot path, and the live metrics file stays untouched
+    os.environ.setdefault('MT5_METRICS', '0')
+    loader = SourceFileLoader('hft_mini_strategy', path)
+    spec = importlib.util.spec_from_loader(loader.name, loader)
+    module = importlib.util.module_from_spec(spec)
+    loader.exec_module(module)
+    module.time = SIM_TIME
+    module.datetime = SimDatetime
+    return module
+
+
+def replay_window(config: BacktestConfig) -> Tuple[float, float]:
+    """(start, end) epoch seconds of the replay"""
+    if config.ticks is not None or config.data_dir:
+        times = config.ticks['time_msc'] if config.ticks is not None else \
+            np.load(os.path.join(config.data_dir, f"{config.symbol}.npy"), mmap_mode='r')['time_msc']
+        first, last = int(times[0]) / 1000, int(times[-1]) / 1000
+        start = config.start if config.start is not None else first + config.warmup
+        end = start + config.hours * 3600 if config.hours else last
+        if start >= end:
+            raise ValueError(f"Recording of {config.symbol} ends before the replay start (warmup {config.warmup:.0f} s)")
+        return start, end
+    start = config.start if config.start is not None else (time.time() // 86400 - 1) * 86400
+    return start, start + (config.hours or 1.0) * 3600
+
+
+def _strategy_class(module, config: BacktestConfig):
+    class BacktestStrategy(module.MT5FuturesStrategy):
+        """The live strategy whose waits jump the simulated clock to the next market event"""
+
+        def __init__(self, *args, **kwargs):
+            self.equity_curve: List[Tuple[float, float, float, int]] = []
+            self.tick_events = 0
+            self._next_equity = 0.0
+            super().__init__(*args, **kwargs)
+
+        def create_book_stream(self):
+            if config.book_messages is not None:
+                messages = ClockReplayTransport(config.book_messages, fake_mt5.now)
+            elif config.book_path:
+                messages = ClockReplayTransport.from_file(config.book_path, fake_mt5.now)
+            else:
+                messages = ClockReplayTransport([], fake_mt5.now)
+            book_stream = OrderBookStream(messages, 'BTC-PERPETUAL', clock=fake_mt5.now)
+            book_stream.start()
+            return book_stream
+
+        def setup_email(self):
+            self.email_enabled = False
+
+        def print_live(self, message, persist=False):
+            if config.verbose:
+                super().print_live(message, persist)
+
+        def record_equity(self, now: float):
+            account = fake_mt5.account_info()
+            self.equity_curve.append((now, self.balance, account.equity if account else np.nan,
+                                      int(np.sign(self.position))))
+
+        def wait_for_market_event(self, timeout=1.0):
+            now = fake_mt5.now()
+            after = self._last_tick_msc if self._last_tick_msc is not None else int(now * 1000) - 1
+            target = now + timeout
+            next_msc = fake_mt5.next_tick_msc(self.symbol, after)
+            if next_msc is not None:
+                target = min(target, next_msc / 1000)
+            next_book = self.book_stream.transport.next_time()
+            if next_book is not None:
+                target = min(target, next_book)
+            if target > now:
+                fake_mt5.set_time(target)
+            if target >= self._next_equity:
+                self._next_equity = target + config.equity_interval
+                self.record_equity(target)
+            tick, book_changed = super().wait_for_market_event(timeout=0)
+            if tick is not None:
+                self.tick_events += 1
+            return tick, book_changed
+
+    return BacktestStrategy
+
+
+def run_backtest(config: BacktestConfig, module=None) -> BacktestResult:
+    """Replay ``config``'s window through a fresh strategy instance on a reset fake terminal"""
+    module = module or load_strategy_module()
+    start, end = replay_window(config)
+    recordings = {config.symbol: (config.ticks, config.spec)} if config.ticks is not None else None
+    fake_mt5.configure(fake_mt5.FakeConfig(
+        data_dir=None if recordings else config.data_dir, seed=config.seed, start=start, speed=0.0,
+        history_days=max(1, int(np.ceil(config.warmup / 86400))), order_latency=config.order_latency,
+        fill_probability=config.fill_probability, slippage_points=config.slippage_points,
+        spread_points=config.spread_points, balance=config.balance, symbols=(config.symbol,)), recordings)
+
+    wall_start = time.perf_counter()
+    strategy = _strategy_class(module, config)(symbol=config.symbol, paper_mode=True)
+    strategy.deribit_exchange = _OfflineExchange()
+    strategy.journal = ExecutionJournal(config.journal_path, clock=sim_clock_ns) \
+        if config.journal_path else _NullJournal()
+    for name, value in config.params.items():
+        if not hasattr(strategy, name):
+            raise ValueError(f"MT5FuturesStrategy has no parameter {name!r}")
+        setattr(strategy, name, value)
+
+    strategy.run_market_trading(duration_minutes=(end - fake_mt5.now()) / 60)
+    strategy.record_equity(fake_mt5.now())
+    wall_seconds = time.perf_counter() - wall_start
+
+    equity = pd.DataFrame(strategy.equity_curve, columns=['time', 'balance', 'equity', 'position'])
+    equity['time'] = pd.to_datetime(equity['time'], unit='s')
+    return BacktestResult(trades=pd.DataFrame(strategy.trade_history), equity=equity.set_index('time'),
+                          ticks=strategy.tick_events, sim_seconds=end - start, wall_seconds=wall_seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tick-replay backtest of MT5FuturesStrategy')
+    parser.add_argument('--symbol', default='BTCUSD')
+    parser.add_argument('--data', help='fake_mt5 recordings directory (default: synthetic ticks)')
+    parser.add_argument('--book', help='Deribit book recording (JSON lines)')
+    parser.add_argument('--start', type=float, help='Replay start, epoch seconds')
+    parser.add_argument('--hours', type=float)
+    parser.add_argument('--order-latency', type=float, default=0.0, help='Seconds from order_send to fill')
+    parser.add_argument('--spread', type=int, default=0, help='Spread override in points')
+    parser.add_argument('--slippage', type=int, default=0, help='Adverse slippage per fill in points')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default='backtest', help='Directory for trades.csv, equity.csv and the journal')
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    # Before the strategy configures logging: its log file is for live sessions
+    logging.basicConfig(level=logging.WARNING, format='%(levelname)s %(name)s: %(message)s')
+    os.makedirs(args.out, exist_ok=True)
+    journal_path = os.path.join(args.out, 'executions.bin')
+    if os.path.exists(journal_path):
+        os.remove(journal_path)
+    config = BacktestConfig(symbol=args.symbol, data_dir=args.data, book_path=args.book, start=args.start,
+                            hours=args.hours, order_latency=args.order_latency, spread_points=args.spread,
+                            slippage_points=args.slippage, seed=args.seed, journal_path=journal_path,
+                            verbose=args.verbose)
+    result = run_backtest(config)
+    result.trades.to_csv(os.path.join(args.out, 'trades.csv'), index=False)
+    result.equity.to_csv(os.path.join(args.out, 'equity.csv'))
+
+    s = result.summary()
+    print(f"Replayed {result.sim_seconds / 3600:.1f} h ({s['ticks']} ticks) in {result.wall_seconds:.1f} s "
+          f"({s['speedup']:.0f}x real time)")
+    print(f"Trades: {s['trades']} | win rate {s['win_rate']:.1%} | strategy P&L ${s['total_pnl']:.2f} | "
+          f"terminal P&L ${s['terminal_pnl']:.2f} | max drawdown ${s['max_drawdown']:.2f}")
+    print(f"Results in {args.out}/ (trades.csv, equity.csv, executions.bin)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""Per-cycle feature store for the mini-HFT strategy.
+
+The adaptive threshold, the regime classifier, the pattern detectors and the
+validation checks all read the same handful of numbers (tick volume windows,
+candle ranges, closes, top-of-book depth). ``FeatureStore.update`` computes
+each of them once per cycle into one flat structured record (``FEATURE_DTYPE``)
+that every consumer reads by name.
+
+Candle statistics are kept in ``RollingWindow`` accumulators over the closed
+bars (Welford updates with removal, O(1) when a bar closes); the forming bar
+is folded in on read, the same split as ``bollinger_state.BandState``. Tick
+window sums come from one cumulative volume sum per cycle (``hft_kernels``).
+"""
+
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+import numpy as np
+
+import hft_kernels
+
+FEATURE_DTYPE = np.dtype([
+    # Ticks (window handed to the detectors)
+    ('tick_count', '<i8'),
+    ('last_price', '<f8'),
+    ('volume_total', '<f8'),
+    ('volume_acceleration', '<f8'),  # Second-half / first-half window volume
+    ('volume_ratio20', '<f8'),  # Last 20 ticks' volume / average tick volume
+    ('price_change20', '<f8'),  # Relative move over the last 20 ticks
+    ('mean_last20', '<f8'),
+    ('large_trades30', '<i8'),  # Ticks in the last 30 above 3x their average volume
+    ('sweep_move_pct', '<f8'),  # Signed % move over the last 30 ticks
+    ('iceberg_count', '<i8'),  # 0 = no iceberg level found
+    ('iceberg_price', '<f8'),
+    ('iceberg_mean_size', '<f8'),
+    ('iceberg_deviation', '<f8'),
+    # Candles (forming bar included)
+    ('candle_count', '<i8'),
+    ('range_std5', '<f8'),
+    ('range_std20', '<f8'),
+    ('volatility_ratio', '<f8'),  # range_std5 / range_std20 (1 if undefined)
+    ('stop_hunt_ratio', '<f8'),  # Forming bar's range/open over the mean of the previous 4
+    ('candle_direction', '<i8'),  # +1 if the forming bar closes above its open, else -1
+    ('ma_fast', '<f8'),  # Mean of the last 5 closes
+    ('ma_slow', '<f8'),  # Mean of the last 20 closes
+    ('return_volatility', '<f8'),  # Annualized std of the last 19 close-to-close returns
+    # Order book (top 5 levels)
+    ('has_book', '?'),
+    ('bid_levels', '<i8'),
+    ('ask_levels', '<i8'),
+    ('bid_depth5', '<f8'),
+    ('ask_depth5', '<f8'),
+    ('book_imbalance5', '<f8'),
+    ('spread', '<f8'),
+    ('imbalance_mean', '<f8'),  # Rolling over the last cycles
+    ('imbalance_std', '<f8'),
+])
+
+
+class RollingWindow:
+    """Mean and population variance of the last ``size`` values (Welford add/remove)"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.values: Deque[float] = deque()
+        self.mean = 0.0
+        self.m2 = 0.0  # Sum of squared deviations from the mean
+        self._pushes = 0
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def clear(self):
+        self.values.clear()
+        self.mean = self.m2 = 0.0
+        self._pushes = 0
+
+    def push(self, x: float):
+        """Add a value; the oldest one leaves once the window is full"""
+        self.values.append(x)
+        n = len(self.values)
+        delta = x - self.mean
+        self.mean += delta / n
+        self.m2 += delta * (x - self.mean)
+        if n > self.size:
+            old = self.values.popleft()
+            n -= 1
+            delta = old - self.mean
+            self.mean -= delta / n
+            self.m2 = max(0.0, self.m2 - delta * (old - self.mean))
+        self._pushes += 1
+        if self._pushes >= self.size:
+            self.resum()
+
+    def resum(self):
+        """Recompute mean and m2 from the window to stop drift from the removals"""
+        x = np.fromiter(self.values, dtype=np.float64)
+        self.mean = float(x.mean()) if len(x) else 0.0
+        self.m2 = float(((x - self.mean) ** 2).sum()) if len(x) else 0.0
+        self._pushes = 0
+
+    def stats(self, forming: Optional[float] = None) -> Tuple[int, float, float]:
+        """(count, mean, population std) with ``forming`` included as one more value"""
+        n, mean, m2 = len(self.values), self.mean, self.m2
+        if forming is not None:
+            n += 1
+            delta = forming - mean
+            mean += delta / n
+            m2 += delta * (forming - mean)
+        if n == 0:
+            return 0, 0.0, 0.0
+        return n, mean, max(0.0, m2 / n) ** 0.5
+
+
+class FeatureStore:
+    """Computes the shared market features once per cycle"""
+
+    def __init__(self, lookback: int = 20, fast: int = 5, imbalance_cycles: int = 20):
+        self.lookback = lookback  # Candles in the baseline windows (forming bar included)
+        self.fast = fast  # Candles in the short windows (forming bar included)
+        self.record = np.zeros(1, dtype=FEATURE_DTYPE).view(np.recarray)
+        self.values = self.record[0]  # Read by name: features.volume_acceleration, ...
+
+        # Closed-bar windows; the forming bar is the +1 on read
+        self._ranges_slow = RollingWindow(lookback - 1)
+        self._ranges_fast = RollingWindow(fast - 1)
+        self._moves = RollingWindow(fast - 1)
+        self._closes_slow = RollingWindow(lookback - 1)
+        self._closes_fast = RollingWindow(fast - 1)
+        self._returns = RollingWindow(lookback - 2)
+        self._last_closed_time: Optional[int] = None
+        self._last_closed_close: Optional[float] = None
+        self._imbalance = RollingWindow(imbalance_cycles)
+
+    def update(self, ticks, book, candles) -> np.record:
+        """Recompute every feature from this cycle's data; returns the record"""
+        self.record[0] = np.zeros((), dtype=FEATURE_DTYPE)
+        f = self.values
+        self._tick_features(f, ticks)
+        self._candle_features(f, candles)
+        self._book_features(f, book)
+        return f
+
+    # --- Ticks ---
+    def _tick_features(self, f, ticks):
+        n = 0 if ticks is None else len(ticks)
+        f.tick_count = n
+        if n == 0:
+            return
+        cum = hft_kernels.cumulative_volume(ticks)
+        last = ticks['last']
+        f.last_price = last[-1]
+        f.volume_total = cum[-1]
+        f.volume_acceleration = hft_kernels.volume_acceleration(cum)
+        f.volume_ratio20 = hft_kernels.recent_volume_ratio(cum, 20)
+        f.price_change20 = hft_kernels.price_change(last, 20)
+        f.mean_last20 = np.mean(last[-20:])
+        f.large_trades30 = hft_kernels.large_trade_count(cum, ticks['volume'], window=30, factor=3)
+        before = last[-30:][0]
+        f.sweep_move_pct = (last[-1] - before) / before * 100 if before != 0 else 0
+        level = hft_kernels.iceberg_level(ticks, window=100, min_count=5, max_deviation=0.3)
+        if level is not None:
+            f.iceberg_price, f.iceberg_count, f.iceberg_mean_size, f.iceberg_deviation = level
+
+    # --- Candles ---
+    def _reset_candles(self):
+        for window in (self._ranges_slow, self._ranges_fast, self._moves,
+                       self._closes_slow, self._closes_fast, self._returns):
+            window.clear()
+        self._last_closed_time = None
+        self._last_closed_close = None
+
+    def _push_closed(self, bar):
+        high, low, open_, close = float(bar['high']), float(bar['low']), float(bar['open']), float(bar['close'])
+        self._ranges_slow.push(high - low)
+        self._ranges_fast.push(high - low)
+        self._moves.push(abs(high - low) / open_ if open_ else 0.0)
+        self._closes_slow.push(close)
+        self._closes_fast.push(close)
+        if self._last_closed_close:
+            self._returns.push((close - self._last_closed_close) / self._last_closed_close)
+        self._last_closed_time = int(bar['time'])
+        self._last_closed_close = close
+
+    def _candle_features(self, f, candles):
+        n = 0 if candles is None else len(candles)
+        f.candle_count = n
+        if n == 0:
+            return
+        closed = candles[:-1]
+        times = closed['time'] if len(closed) else np.empty(0, dtype=np.int64)
+        last = self._last_closed_time
+        if last is None or (len(times) and last < times[-1] and not (times == last).any()):
+            # First cycle, or bars were missed since the last cycle: rebuild from the candles
+            self._reset_candles()
+            new = closed[-self.lookback:]
+        else:
+            new = closed[times > last]
+        for bar in new:
+            self._push_closed(bar)
+
+        forming = candles[-1]
+        high, low, open_, close = (float(forming['high']), float(forming['low']),
+                                   float(forming['open']), float(forming['close']))
+        _, _, f.range_std5 = self._ranges_fast.stats(high - low)
+        _, _, f.range_std20 = self._ranges_slow.stats(high - low)
+        f.volatility_ratio = f.range_std5 / f.range_std20 if f.range_std20 > 0 else 1
+        count, avg_move, _ = self._moves.stats()
+        latest_move = abs(high - low) / open_ if open_ else 0.0
+        f.stop_hunt_ratio = latest_move / avg_move if count and avg_move > 0 else 0
+        f.candle_direction = 1 if close > open_ else -1
+        _, f.ma_fast, _ = self._closes_fast.stats(close)
+        _, f.ma_slow, _ = self._closes_slow.stats(close)
+        forming_return = ((close - self._last_closed_close) / self._last_closed_close
+                          if self._last_closed_close else None)
+        _, _, std = self._returns.stats(forming_return)
+        f.return_volatility = std * np.sqrt(252)
+
+    # --- Order book ---
+    def _book_features(self, f, book):
+        if not book or 'bids' not in book or 'asks' not in book:
+            return
+        bids, asks = book['bids'], book['asks']
+        f.has_book = True
+        f.bid_levels, f.ask_levels = len(bids), len(asks)
+        top_bids = np.asarray(bids[:5], dtype=np.float64).reshape(-1, 2)
+        top_asks = np.asarray(asks[:5], dtype=np.float64).reshape(-1, 2)
+        f.bid_depth5 = top_bids[:, 1].sum()
+        f.ask_depth5 = top_asks[:, 1].sum()
+        total = f.bid_depth5 + f.ask_depth5
+        f.book_imbalance5 = (f.bid_depth5 - f.ask_depth5) / total if total != 0 else 0
+        if len(top_bids) and len(top_asks):
+            f.spread = top_asks[0, 0] - top_bids[0, 0]
+        self._imbalance.push(float(f.book_imbalance5))
+        _, f.imbalance_mean, f.imbalance_std = self._imbalance.stats()
@@ -0,0 +1,97 @@
+"""Vectorized pattern kernels for the mini-HFT strategy.
+
+The detectors in ``detect_algo_patterns`` / ``validate_pattern`` reduce to a
+few statistics over the structured tick window (``TICKS_DTYPE`` fields
+``last`` and ``volume``) and the top of the order book. These kernels compute
+them with NumPy instead of per-tick Python loops; the volume statistics share
+one cumulative sum so every window sum is O(1) after it is built.
+"""
+
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+
+class IcebergLevel(NamedTuple):
+    price: float  # Trade price rounded to 0.1
+    count: int  # Ticks at the level
+    mean_size: float
+    size_deviation: float  # Std / mean of the tick volumes at the level
+
+
+def cumulative_volume(ticks: np.ndarray) -> np.ndarray:
+    """Running sum of the tick volumes, shared by the window sums below"""
+    return np.cumsum(ticks['volume'])
+
+
+def window_volume(cum: np.ndarray, start: int, stop: Optional[int] = None):
+    """Sum of the volumes of ``ticks[start:stop]`` from the cumulative sums"""
+    n = len(cum)
+    start, stop, _ = slice(start, stop).indices(n)
+    if stop <= start:
+        return cum.dtype.type(0)
+    return cum[stop - 1] - (cum[start - 1] if start > 0 else 0)
+
+
+def volume_acceleration(cum: np.ndarray) -> float:
+    """Volume of the second half of the window over the first half (0 if the first is empty)"""
+    mid = len(cum) // 2
+    first = window_volume(cum, 0, mid)
+    second = window_volume(cum, mid)
+    return second / first if first > 0 else 0
+
+
+def recent_volume_ratio(cum: np.ndarray, recent: int = 20) -> float:
+    """Volume of the last ``recent`` ticks over the average tick volume of the window"""
+    average = cum[-1] / len(cum)
+    return window_volume(cum, -recent) / average if average > 0 else 0
+
+
+def price_change(last: np.ndarray, lookback: int = 20) -> float:
+    """Relative move from the first to the last of the newest ``lookback`` prices"""
+    start, end = last[-lookback:][0], last[-1]
+    return (end - start) / start if start != 0 else 0
+
+
+def iceberg_level(ticks: np.ndarray, window: int = 100, min_count: int = 5,
+                  max_deviation: float = 0.3) -> Optional[IcebergLevel]:
+    """First price level (in order of appearance) with at least ``min_count``
+    near-identical tick sizes in the last ``window`` ticks, or None.
+
+    Levels are grouped with ``np.unique``; per-level mean and (two-pass)
+    standard deviation come from ``np.bincount``.
+    """
+    recent = ticks[-window:]
+    prices = np.round(recent['last'], 1)
+    sizes = recent['volume'].astype(np.float64)
+    levels, first_seen, inverse, counts = np.unique(prices, return_index=True, return_inverse=True,
+                                                    return_counts=True)
+    mean = np.bincount(inverse, weights=sizes) / counts
+    deviation = sizes - mean[inverse]
+    std = np.sqrt(np.bincount(inverse, weights=deviation * deviation) / counts)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        relative = np.where(mean > 0, std / mean, 0.0)
+
+    candidates = np.flatnonzero((counts >= min_count) & (relative < max_deviation))
+    if len(candidates) == 0:
+        return None
+    best = candidates[np.argmin(first_seen[candidates])]
+    return IcebergLevel(float(levels[best]), int(counts[best]), float(mean[best]), float(relative[best]))
+
+
+def large_trade_count(cum: np.ndarray, volume: np.ndarray, window: int = 30, factor: float = 3.0) -> int:
+    """Ticks in the last ``window`` whose volume exceeds ``factor`` times the window's average"""
+    recent = volume[-window:]
+    average = window_volume(cum, -window) / len(recent) if len(recent) > 0 else 0
+    return int(np.count_nonzero(recent > average * factor))
+
+
+def book_imbalance(bids, asks, levels: int = 5) -> float:
+    """(bid - ask) / (bid + ask) amount over the best ``levels`` levels.
+
+    Works on the ``[price, amount]`` array views of ``L2Book`` and on ccxt's
+    lists of lists alike.
+    """
+    bid = np.asarray(bids[:levels], dtype=np.float64).reshape(-1, 2)[:, 1].sum()
+    ask = np.asarray(asks[:levels], dtype=np.float64).reshape(-1, 2)[:, 1].sum()
+    return (bid - ask) / (bid + ask) if (bid + ask) != 0 else 0
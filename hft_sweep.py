@@ -0,0 +1,236 @@
+"""Parallel parameter sweep of MT5FuturesStrategy over a recorded tick window.
+
+Every parameter set is one ``hft_backtest.run_backtest`` on a process pool.
+The recording is loaded once, into a shared-memory block that every worker
+maps read-only, so N workers hold one copy of the ticks instead of N. Each
+worker loads the strategy script and parses the book recording once, then
+runs backtests until the queue is empty; only the parameter dicts and the
+summary rows cross process boundaries. Runs are independent, so throughput
+grows with the worker count until the cores run out.
+
+Parameters are strategy attributes (``base_overreaction_threshold``,
+``take_profit_amount``, ``max_loss_amount``, ``max_hold_seconds``, ...):
+``NAME=v1,v2,...`` values form a grid, ``NAME=lo:hi`` ranges are sampled
+uniformly with ``--samples``. ``patience_window`` and ``detection_window``
+are accepted but not read by the current strategy. The results, ranked by
+``--rank-by``, are written as a ``column_store`` directory.
+
+Usage:
+    python hft_sweep.py --data recordings --book book.jsonl --hours 24 \\
+        --param take_profit_amount=0.5,1,2 --param max_loss_amount=10,30,60 --out sweep_results
+    python hft_sweep.py --data recordings --samples 200 --param base_overreaction_threshold=1.0:3.0 \\
+        --param max_hold_seconds=300:3600 --workers 8
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import replace
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+import hft_backtest
+from column_store import ColumnWriter, read_frame
+from hft_backtest import BacktestConfig
+from mt5_common import TICKS_DTYPE
+
+# Swept when no --param is given
+DEFAULT_GRID = {
+    'base_overreaction_threshold': [1.0, 1.5, 2.0, 3.0],
+    'take_profit_amount': [0.5, 1, 2, 5],
+    'max_loss_amount': [10, 30, 60],
+    'max_hold_seconds': [300, 900, 1800],
+}
+METRICS = ('trades', 'win_rate', 'total_pnl', 'terminal_pnl', 'max_drawdown', 'ticks', 'wall_seconds')
+
+Value = Union[int, float]
+ParamSpec = Union[List[Value], Tuple[Value, Value]]  # Grid values, or a (lo, hi) range
+
+# Per-process state of a pool worker (set by _init_worker)
+_worker: Dict[str, object] = {}
+
+
+def _number(text: str) -> Value:
+    return int(text) if text.strip().lstrip('+-').isdigit() else float(text)
+
+
+def parse_param(text: str) -> Tuple[str, ParamSpec]:
+    """``NAME=v1,v2,...`` (grid values) or ``NAME=lo:hi`` (range to sample)"""
+    name, sep, values = text.partition('=')
+    if not sep or not name or not values:
+        raise ValueError(f"Expected NAME=v1,v2,... or NAME=lo:hi, got {text!r}")
+    if ':' in values:
+        lo, hi = (_number(v) for v in values.split(':', 1))
+        return name.strip(), (lo, hi)
+    return name.strip(), [_number(v) for v in values.split(',')]
+
+
+def parameter_sets(space: Dict[str, ParamSpec], samples: int = 0, seed: int = 0) -> List[Dict[str, Value]]:
+    """Every grid combination, or ``samples`` random draws (ranges uniform, value lists by choice)"""
+    if samples <= 0:
+        ranges = [name for name, spec in space.items() if isinstance(spec, tuple)]
+        if ranges:
+            raise ValueError(f"Ranges need --samples: {ranges}")
+        names = list(space)
+        return [dict(zip(names, combo)) for combo in itertools.product(*space.values())]
+
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for name, spec in space.items():
+        if isinstance(spec, tuple):
+            lo, hi = spec
+            if isinstance(lo, int) and isinstance(hi, int):
+                columns[name] = rng.integers(lo, hi, samples, endpoint=True).tolist()
+            else:
+                columns[name] = rng.uniform(lo, hi, samples).tolist()
+        else:
+            columns[name] = [spec[i] for i in rng.integers(0, len(spec), samples)]
+    return [{name: columns[name][i] for name in space} for i in range(samples)]
+
+
+def load_recording(data_dir: str, symbol: str) -> Tuple[np.ndarray, Optional[Dict]]:
+    """Ticks of ``symbol`` as sorted ``TICKS_DTYPE`` (what the fake terminal replays without copying) and its spec"""
+    ticks = np.load(os.path.join(data_dir, f"{symbol}.npy"))
+    if ticks.dtype != TICKS_DTYPE:
+        ticks = ticks.astype(TICKS_DTYPE)
+    ticks = ticks[np.argsort(ticks['time_msc'], kind='stable')]
+    spec = None
+    meta = os.path.join(data_dir, f"{symbol}.json")
+    if os.path.exists(meta):
+        with open(meta) as f:
+            spec = json.load(f)
+    return ticks, spec
+
+
+def _init_worker(base: BacktestConfig, shm_name: Optional[str], n_ticks: int):
+    """Pool initializer: map the shared ticks, parse the book and load the strategy once per process"""
+    logging.basicConfig(level=logging.WARNING, format='%(levelname)s %(name)s: %(message)s')
+    config = base
+    if shm_name is not None:
+        shm = shared_memory.SharedMemory(name=shm_name)
+        ticks = np.ndarray((n_ticks,), dtype=TICKS_DTYPE, buffer=shm.buf)
+        ticks.flags.writeable = False
+        _worker['shm'] = shm  # The mapping lives as long as the worker
+        config = replace(config, ticks=ticks, data_dir=None)
+    if config.book_path:
+        with open(config.book_path, encoding='utf-8') as f:
+            messages = [json.loads(line) for line in f if line.strip()]
+        config = replace(config, book_messages=messages, book_path=None)
+    _worker['config'] = config
+    _worker['module'] = hft_backtest.load_strategy_module()
+
+
+def _run(params: Dict[str, Value]) -> Dict[str, object]:
+    config = replace(_worker['config'], params=dict(params))
+    result = hft_backtest.run_backtest(config, _worker['module'])
+    summary = result.summary()
+    row: Dict[str, object] = dict(params)
+    row.update({name: summary[name] for name in METRICS if name in summary})
+    row['wall_seconds'] = result.wall_seconds
+    return row
+
+
+def run_sweep(base: BacktestConfig, param_sets: Sequence[Dict[str, Value]], workers: Optional[int] = None,
+              progress: bool = True) -> pd.DataFrame:
+    """Backtest every parameter set of ``param_sets`` on ``base``'s data; one row per set, in input order"""
+    workers = workers or os.cpu_count() or 1
+    shm = None
+    try:
+        if base.data_dir:
+            ticks, spec = load_recording(base.data_dir, base.symbol)
+            shm = shared_memory.SharedMemory(create=True, size=max(1, ticks.nbytes))
+            np.ndarray(ticks.shape, dtype=TICKS_DTYPE, buffer=shm.buf)[:] = ticks
+            base = replace(base, spec=spec if base.spec is None else base.spec)
+            initargs = (base, shm.name, len(ticks))
+            del ticks
+        else:
+            initargs = (base, None, 0)
+
+        rows: List[Optional[Dict[str, object]]] = [None] * len(param_sets)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as pool:
+            futures = {pool.submit(_run, params): i for i, params in enumerate(param_sets)}
+            for done, future in enumerate(as_completed(futures), 1):
+                i = futures[future]
+                rows[i] = future.result()
+                if progress:
+                    r = rows[i]
+                    print(f"[{done}/{len(param_sets)}] {param_sets[i]} -> {r['trades']} trades, "
+                          f"terminal P&L ${r['terminal_pnl']:.2f} ({r['wall_seconds']:.1f} s)", flush=True)
+    finally:
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+    return pd.DataFrame(rows)
+
+
+def rank(results: pd.DataFrame, by: str = 'terminal_pnl') -> pd.DataFrame:
+    """Best first by ``by`` (max_drawdown and wall_seconds ascending), with a 1-based ``rank`` column"""
+    ascending = by in ('max_drawdown', 'wall_seconds')
+    ranked = results.sort_values(by, ascending=ascending, kind='stable').reset_index(drop=True)
+    ranked.insert(0, 'rank', np.arange(1, len(ranked) + 1))
+    return ranked
+
+
+def write_results(ranked: pd.DataFrame, root: str):
+    schema = {name: (np.int64 if pd.api.types.is_integer_dtype(dtype) else np.float64)
+              for name, dtype in ranked.dtypes.items()}
+    with ColumnWriter(root, schema) as writer:
+        writer.append({name: ranked[name].to_numpy() for name in schema})
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Parallel parameter sweep of MT5FuturesStrategy')
+    parser.add_argument('--symbol', default='BTCUSD')
+    parser.add_argument('--data', help='fake_mt5 recordings directory (default: synthetic ticks)')
+    parser.add_argument('--book', help='Deribit book recording (JSON lines)')
+    parser.add_argument('--start', type=float, help='Replay start, epoch seconds')
+    parser.add_argument('--hours', type=float)
+    parser.add_argument('--order-latency', type=float, default=0.0, help='Seconds from order_send to fill')
+    parser.add_argument('--spread', type=int, default=0, help='Spread override in points')
+    parser.add_argument('--slippage', type=int, default=0, help='Adverse slippage per fill in points')
+    parser.add_argument('--param', action='append', default=[], metavar='NAME=VALUES',
+                        help='Strategy attribute: v1,v2,... (grid) or lo:hi (sampled); repeatable')
+    parser.add_argument('--samples', type=int, default=0, help='Random parameter sets instead of the grid')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the random parameter sets')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: all cores)')
+    parser.add_argument('--rank-by', default='terminal_pnl', choices=METRICS)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--out', default='sweep_results', help='Column store directory for the ranked results')
+    args = parser.parse_args()
+
+    if os.path.exists(args.out):
+        parser.error(f"{args.out} exists; choose another --out")
+    try:
+        space = dict(parse_param(p) for p in args.param) if args.param else DEFAULT_GRID
+        param_sets = parameter_sets(space, args.samples, args.seed)
+    except ValueError as e:
+        parser.error(str(e))
+
+    logging.basicConfig(level=logging.WARNING, format='%(levelname)s %(name)s: %(message)s')
+    base = BacktestConfig(symbol=args.symbol, data_dir=args.data, book_path=args.book, start=args.start,
+                          hours=args.hours, order_latency=args.order_latency, spread_points=args.spread,
+                          slippage_points=args.slippage)
+    workers = args.workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    results = run_sweep(base, param_sets, workers)
+    elapsed = time.perf_counter() - start
+
+    ranked = rank(results, args.rank_by)
+    write_results(ranked, args.out)
+    # Share of the workers' time spent inside backtests (worker start-up and idle tails lower it)
+    efficiency = results['wall_seconds'].sum() / (elapsed * min(workers, len(param_sets)))
+    print(f"\n{len(results)} backtests on {workers} workers in {elapsed:.1f} s "
+          f"({len(results) / elapsed:.2f} per second, {efficiency:.0%} worker utilisation)")
+    print(read_frame(args.out).head(args.top).to_string(index=False))
+    print(f"Ranked results in {args.out}/ (column_store.py {args.out})")
+
+
+if __name__ == "__main__":
+    main()
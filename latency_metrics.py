@@ -0,0 +1,339 @@
+"""Hot-path latency spans recorded into HDR-style histograms.
+
+A step is timed with ``with metrics.span('tick_fetch'):`` or, where the extra
+object matters, with the ``t0 = metrics.start()`` / ``metrics.stop('tick_fetch', t0)``
+pair. Every thread records into its own histograms, so the hot path takes no
+lock; readers merge the per-thread shards when they take a snapshot.
+
+Histograms are log-linear like HdrHistogram: values below ``2 ** (b + 1)`` ns
+are counted exactly, above that every power of two is split into ``2 ** b``
+sub-buckets, so any recorded value is off by at most ``2 ** -b`` (3.1% with the
+default ``b = 5``) from its bucket's upper bound, from nanoseconds to minutes.
+
+``MetricsExporter`` writes a JSON snapshot to a file every ``interval`` seconds
+and/or serves it at ``http://127.0.0.1:<port>/metrics``. Configuration for the
+scripts comes from ``MT5_METRICS`` (``0`` disables recording),
+``MT5_METRICS_FILE``, ``MT5_METRICS_PORT`` and ``MT5_METRICS_INTERVAL``.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SUB_BUCKET_BITS = 5  # 32 sub-buckets per power of two
+MAX_VALUE_BITS = 40  # Values up to ~18 minutes in ns; longer ones land in the top bucket
+FOLD_BATCH = 1024  # Raw samples a thread collects per span before bucketing them in one NumPy pass
+PERCENTILES = (50, 90, 99, 99.9)
+
+_perf_counter_ns = time.perf_counter_ns
+
+
+class LatencyHistogram:
+    """Log-linear histogram of nanosecond latencies (HdrHistogram-style bucketing)"""
+
+    def __init__(self, sub_bucket_bits: int = SUB_BUCKET_BITS, max_value_bits: int = MAX_VALUE_BITS):
+        self.sub_bucket_bits = sub_bucket_bits
+        self._sub = 1 << sub_bucket_bits
+        self._shift = sub_bucket_bits + 1
+        self._top = (max_value_bits - sub_bucket_bits + 1) * self._sub - 1
+        # Replaced, never updated in place, so a reader's reference is always a consistent array
+        self.counts = np.zeros(self._top + 1, dtype=np.int64)
+        self.total_ns = 0
+        self.max_ns = 0
+
+    @property
+    def count(self) -> int:
+        return int(self.counts.sum())
+
+    def bucket_index(self, ns: np.ndarray) -> np.ndarray:
+        ns = np.asarray(ns, dtype=np.int64)
+        bits = np.frexp(ns.astype(np.float64))[1]  # bit_length(); exact below 2**53
+        e = np.maximum(bits - self._shift, 0)
+        return np.minimum(e * self._sub + (ns >> e), self._top)
+
+    def record_many(self, ns):
+        """Bucket a batch of latencies (ns) in one pass"""
+        ns = np.asarray(ns, dtype=np.int64)
+        if len(ns) == 0:
+            return
+        self.counts = self.counts + np.bincount(self.bucket_index(ns), minlength=len(self.counts))
+        self.total_ns += int(ns.sum())
+        self.max_ns = max(self.max_ns, int(ns.max()))
+
+    def record(self, ns: int):
+        self.record_many([ns])
+
+    def upper_bounds(self) -> np.ndarray:
+        """Highest value (ns) counted in each bucket"""
+        index = np.arange(len(self.counts), dtype=np.int64)
+        e = np.maximum(index // self._sub - 1, 0)
+        return ((index - e * self._sub + 1) << e) - 1
+
+    def copy(self) -> 'LatencyHistogram':
+        other = LatencyHistogram.__new__(LatencyHistogram)
+        other.__dict__.update(self.__dict__)
+        return other
+
+    def merge(self, other: 'LatencyHistogram'):
+        """Add another histogram's counts (same bucketing) into this one"""
+        self.counts = self.counts + other.counts
+        self.total_ns += other.total_ns
+        self.max_ns = max(self.max_ns, other.max_ns)
+
+    def percentile(self, q: float) -> int:
+        """Upper bound (ns) of the bucket holding the q-th percentile, capped at the max seen"""
+        cumulative = np.cumsum(self.counts)
+        if cumulative[-1] == 0:
+            return 0
+        index = int(np.searchsorted(cumulative, q / 100 * cumulative[-1], side='left'))
+        return int(min(self.upper_bounds()[index], self.max_ns))
+
+    def summary(self) -> Dict[str, object]:
+        """Count, mean, percentiles and max in microseconds, plus the non-empty buckets"""
+        count = self.count
+        out: Dict[str, object] = {'count': count}
+        if count == 0:
+            return out
+        out['mean_us'] = self.total_ns / count / 1000
+        for q in PERCENTILES:
+            out[f'p{q:g}_us'] = self.percentile(q) / 1000
+        out['max_us'] = self.max_ns / 1000
+        used = np.flatnonzero(self.counts)
+        out['buckets'] = [[int(bound), int(n)] for bound, n in zip(self.upper_bounds()[used], self.counts[used])]
+        return out
+
+
+class _Recorder:
+    """One thread's samples for one span name; also the span's context manager.
+
+    Raw samples collect in ``samples`` and are bucketed into ``histogram``
+    every ``FOLD_BATCH``. Start times are a stack, so nested spans with the
+    same name work without allocating a span object per call.
+    """
+
+    __slots__ = ('samples', 'histogram', '_starts')
+
+    def __init__(self, sub_bucket_bits: int):
+        self.samples: List[int] = []
+        self.histogram = LatencyHistogram(sub_bucket_bits)
+        self._starts: List[int] = []
+
+    def __enter__(self):
+        self._starts.append(_perf_counter_ns())
+
+    def __exit__(self, exc_type, exc, tb):
+        samples = self.samples
+        samples.append(_perf_counter_ns() - self._starts.pop())
+        if len(samples) >= FOLD_BATCH:
+            self.fold()
+
+    def fold(self):
+        batch = self.samples[:]
+        self.samples.clear()
+        self.histogram.record_many(batch)
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+class Metrics:
+    """Named latency spans with one histogram per span name and thread.
+
+    Recording only appends the raw sample to the calling thread's list; every
+    ``FOLD_BATCH`` samples the list is bucketed with NumPy and emptied. A fold
+    empties the list before it adds to the histogram and readers copy the
+    histogram before the list, so a concurrent snapshot may miss the batch
+    being folded but never counts it twice.
+    """
+
+    def __init__(self, enabled: bool = True, sub_bucket_bits: int = SUB_BUCKET_BITS):
+        self.enabled = enabled
+        self.sub_bucket_bits = sub_bucket_bits
+        self.started = time.time()
+        self._local = threading.local()
+        self._shards: List[Dict[str, _Recorder]] = []
+        self._lock = threading.Lock()  # Only taken the first time a thread records, and by readers
+
+    @classmethod
+    def from_env(cls) -> 'Metrics':
+        return cls(enabled=os.environ.get('MT5_METRICS', '1').strip().lower() not in ('0', 'false', 'off', 'no'))
+
+    def _recorder(self, name: str) -> _Recorder:
+        try:
+            return self._local.recorders[name]
+        except AttributeError:
+            recorders = self._local.recorders = {}
+            with self._lock:
+                self._shards.append(recorders)
+        except KeyError:
+            recorders = self._local.recorders
+        recorder = recorders[name] = _Recorder(self.sub_bucket_bits)
+        return recorder
+
+    # --- Recording (hot path) ---
+    def start(self) -> int:
+        """Start time for ``stop``; 0 when recording is disabled"""
+        return _perf_counter_ns() if self.enabled else 0
+
+    def stop(self, name: str, start: int) -> int:
+        """Record the time since ``start`` under ``name``; returns it in ns"""
+        if not start:
+            return 0
+        ns = _perf_counter_ns() - start
+        recorder = self._recorder(name)
+        recorder.samples.append(ns)
+        if len(recorder.samples) >= FOLD_BATCH:
+            recorder.fold()
+        return ns
+
+    def span(self, name: str):
+        """Context manager timing its block under ``name``"""
+        return self._recorder(name) if self.enabled else _NO_SPAN
+
+    def record(self, name: str, seconds: float):
+        """Record a latency measured elsewhere (e.g. from a tick's arrival to order_send)"""
+        if self.enabled:
+            recorder = self._recorder(name)
+            recorder.samples.append(max(0, int(seconds * 1e9)))
+            if len(recorder.samples) >= FOLD_BATCH:
+                recorder.fold()
+
+    # --- Reading ---
+    def merged(self) -> Dict[str, LatencyHistogram]:
+        """One histogram per span name, summed over all threads (unfolded samples included)"""
+        with self._lock:
+            shards = list(self._shards)
+        merged: Dict[str, LatencyHistogram] = {}
+        for recorders in shards:
+            for name, recorder in tuple(recorders.items()):
+                histogram = recorder.histogram.copy()  # Before the samples, see the class docstring
+                samples = list(recorder.samples)
+                total = merged.get(name)
+                if total is None:
+                    total = merged[name] = LatencyHistogram(self.sub_bucket_bits)
+                total.merge(histogram)
+                total.record_many(samples)
+        return merged
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            'time': time.time(),
+            'uptime_s': time.time() - self.started,
+            'pid': os.getpid(),
+            'spans': {name: histogram.summary() for name, histogram in sorted(self.merged().items())},
+        }
+
+    def report(self) -> str:
+        """Plain-text table of the span percentiles (microseconds)"""
+        lines = [f"{'span':<20} {'count':>8} {'p50':>10} {'p99':>10} {'max':>10}"]
+        for name, histogram in sorted(self.merged().items()):
+            lines.append(f"{name:<20} {histogram.count:>8} {histogram.percentile(50) / 1000:>10.1f} "
+                         f"{histogram.percentile(99) / 1000:>10.1f} {histogram.max_ns / 1000:>10.1f}")
+        return "\n".join(lines)
+
+
+class MetricsExporter:
+    """Periodic JSON dump of a ``Metrics`` snapshot to a file and/or a loopback HTTP endpoint"""
+
+    def __init__(self, metrics: Metrics, path: Optional[str] = None, interval: float = 60.0,
+                 port: Optional[int] = None, host: str = '127.0.0.1'):
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self.port = port  # 0 picks a free port; see ``address``
+        self.host = host
+        self.dumps = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @classmethod
+    def from_env(cls, metrics: Metrics, default_path: Optional[str] = None) -> 'MetricsExporter':
+        port = os.environ.get('MT5_METRICS_PORT')
+        return cls(metrics,
+                   path=os.environ.get('MT5_METRICS_FILE', default_path),
+                   interval=float(os.environ.get('MT5_METRICS_INTERVAL', 60)),
+                   port=int(port) if port else None)
+
+    @property
+    def address(self) -> Optional[Tuple[str, int]]:
+        return self._server.server_address[:2] if self._server is not None else None
+
+    def start(self) -> 'MetricsExporter':
+        if not self.metrics.enabled or self._thread is not None:
+            return self
+        if self.port is not None:
+            self._server = ThreadingHTTPServer((self.host, self.port), self._handler())
+            self._server.daemon_threads = True
+            threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+            logger.info(f"Metrics served on http://{self.address[0]}:{self.address[1]}/metrics")
+        if self.path:
+            self._thread = threading.Thread(target=self._run, name="metrics-dump", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Final dump, then stop the dump thread and the HTTP server"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self.path and self.metrics.enabled:
+            self.dump()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def dump(self):
+        """Write the snapshot atomically (temp file + rename), so readers never see half a file"""
+        tmp = f"{self.path}.tmp"
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self.metrics.snapshot(), f)
+            os.replace(tmp, self.path)
+            self.dumps += 1
+        except OSError as e:
+            logger.error(f"Failed to write metrics to {self.path}: {e}")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.dump()
+
+    def _handler(self):
+        metrics = self.metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip('/') not in ('', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = json.dumps(metrics.snapshot()).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Keep scrapes out of the strategy logs
+
+        return Handler
@@ -0,0 +1,844 @@
+"""Single-owner market-data bus: one terminal connection shared by the screener, the closer and the HFT bot.
+
+``python market_bus.py`` is the data owner and the only process that asks the
+terminal for market data. It polls quotes, tick streams (``TickBuffer``), bars
+(``BarCache`` delta fetches) and the positions/account state once per
+interval and publishes them in shared memory. Consumers run with
+``MT5_BACKEND=bus``; ``load_terminal`` then returns a ``BusTerminal``, a
+MetaTrader5-compatible object. Its market-data calls read the shared
+segments, and every other call (``order_send``, ``symbol_info``, ...) is
+forwarded to the owner over a local control connection. Terminal load grows
+with the watched symbols, not with the number of strategies.
+
+Ticks go into fixed-capacity rings with a sequence number (ticks ever
+written). A ``TickSubscription`` reads everything after its last sequence
+number and counts what it missed when it fell more than a ring behind. Bars,
+positions and the account are seqlock snapshots: the owner makes the version
+odd while writing, and readers retry until they copied a stable even version.
+
+Publishing starts on first use. The first ``symbol_info_tick`` of a symbol
+subscribes its quotes; the first ``copy_ticks_*`` upgrades it to the full
+tick stream; ``copy_rates_*`` subscribes the (symbol, timeframe) bars.
+Requests the rings do not cover (older ticks, more bars) are answered by the
+terminal through the owner.
+
+Usage:
+    python market_bus.py --symbols EURUSD GBPUSD --tick-symbols BTCUSD --timeframes M30 H4    # data owner
+    MT5_BACKEND=bus python FVG_screener_all_live.py                                              # consumers
+    MT5_BACKEND=bus MT5_BUS_QUOTE_INTERVAL=0.005 MT5_CLOSER_TICK_POLL=0.005 python mt5_bb_midline_closer.py
+"""
+
+import argparse
+import logging
+import os
+import signal
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, namedtuple
+from datetime import datetime
+from multiprocessing import connection, resource_tracker, shared_memory
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+import fake_mt5
+from bar_cache import DEFAULT_CACHE_DIR, BarCache
+from mt5_common import RATES_DTYPE, TICKS_DTYPE, load_terminal
+from tick_buffer import TickBuffer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_NAME = 'mt5bus'
+DEFAULT_AUTHKEY = b'mt5-market-bus'
+HEADER_SIZE = 64  # int64 header words in front of the records of every segment
+
+POSITION_DTYPE = np.dtype([
+    ('ticket', '<u8'), ('time', '<i8'), ('time_msc', '<i8'), ('time_update', '<i8'), ('time_update_msc', '<i8'),
+    ('type', '<i4'), ('magic', '<i8'), ('identifier', '<u8'), ('reason', '<i4'), ('volume', '<f8'),
+    ('price_open', '<f8'), ('sl', '<f8'), ('tp', '<f8'), ('price_current', '<f8'), ('swap', '<f8'),
+    ('profit', '<f8'), ('symbol', 'S32'), ('comment', 'S32'), ('external_id', 'S32'),
+])
+ACCOUNT_DTYPE = np.dtype([
+    ('login', '<i8'), ('trade_mode', '<i4'), ('leverage', '<i8'), ('trade_allowed', '?'), ('balance', '<f8'),
+    ('credit', '<f8'), ('profit', '<f8'), ('equity', '<f8'), ('margin', '<f8'), ('margin_free', '<f8'),
+    ('margin_level', '<f8'), ('name', 'S64'), ('server', 'S64'), ('currency', 'S8'), ('company', 'S64'),
+])
+
+# Terminal calls consumers may forward to the owner
+FORWARDED = frozenset({
+    'login', 'version', 'terminal_info', 'account_info', 'symbols_total', 'symbols_get', 'symbol_info',
+    'symbol_info_tick', 'symbol_select', 'market_book_add', 'market_book_get', 'market_book_release',
+    'copy_rates_from', 'copy_rates_from_pos', 'copy_rates_range', 'copy_ticks_from', 'copy_ticks_range',
+    'orders_total', 'orders_get', 'order_calc_margin', 'order_calc_profit', 'order_check', 'order_send',
+    'positions_total', 'positions_get', 'history_orders_total', 'history_orders_get', 'history_deals_total',
+    'history_deals_get',
+})
+
+
+def control_address(name: str) -> Tuple[str, str]:
+    """(address, family) of the owner's control connection: a named pipe on Windows, a Unix socket elsewhere"""
+    if sys.platform == 'win32':
+        return rf'\\.\pipe\{name}', 'AF_PIPE'
+    return os.path.join(tempfile.gettempdir(), f"{name}.sock"), 'AF_UNIX'
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Map an owner's segment without registering it with this process's resource tracker.
+
+    Before Python 3.13 every attach is registered, and the tracker unlinks the
+    segment when the consumer exits, which would pull it away from the owner.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    shm = shared_memory.SharedMemory(name=name)
+    if os.name == 'posix':
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    return shm
+
+
+def _epoch(value) -> float:
+    """Epoch seconds of a datetime (naive = local time, as the MetaTrader5 package treats it) or a number"""
+    return value.timestamp() if isinstance(value, datetime) else float(value)
+
+
+def _text(value) -> bytes:
+    return str(value or '').encode('utf-8')
+
+
+class _Segment:
+    """Named shared-memory block: an int64 header followed by ``capacity`` records"""
+
+    def __init__(self, name: str, dtype: np.dtype, capacity: int, create: bool):
+        self.name = name
+        self.dtype = np.dtype(dtype)
+        self.capacity = capacity
+        size = HEADER_SIZE + self.dtype.itemsize * capacity
+        if create:
+            try:
+                self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            except FileExistsError:
+                # Left behind by an owner that did not shut down cleanly
+                stale = shared_memory.SharedMemory(name=name)
+                stale.close()
+                stale.unlink()
+                self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        else:
+            self.shm = _attach(name)
+        self.header = np.ndarray(HEADER_SIZE // 8, dtype='<i8', buffer=self.shm.buf)
+        self.records = np.ndarray(capacity, dtype=self.dtype, buffer=self.shm.buf, offset=HEADER_SIZE)
+
+    def close(self, unlink: bool = False):
+        # The views hold exported pointers into the buffer; drop them before closing the mapping
+        self.header = self.records = None
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+class SharedTickRing:
+    """Tick ring in shared memory; the newest ticks are always one contiguous slice (double-written slots).
+
+    Header: [0] sequence number (ticks ever written), [1] capacity, [2] time_msc
+    from which the ring holds every tick (-1 while it only holds sampled quotes).
+    """
+
+    SEQ, CAPACITY, COVERED_FROM = 0, 1, 2
+
+    def __init__(self, name: str, capacity: int = 20_000, create: bool = False):
+        if create:
+            self.segment = _Segment(name, TICKS_DTYPE, 2 * capacity, create=True)
+            self.segment.header[:] = 0
+            self.segment.header[self.CAPACITY] = capacity
+            self.segment.header[self.COVERED_FROM] = -1
+        else:
+            probe = _attach(name)
+            capacity = int(np.ndarray(HEADER_SIZE // 8, dtype='<i8', buffer=probe.buf)[self.CAPACITY])
+            probe.close()
+            self.segment = _Segment(name, TICKS_DTYPE, 2 * capacity, create=False)
+        self.name = name
+        self.capacity = capacity
+
+    @property
+    def seq(self) -> int:
+        return int(self.segment.header[self.SEQ])
+
+    @property
+    def covered_from(self) -> int:
+        return int(self.segment.header[self.COVERED_FROM])
+
+    # --- Owner side ---
+    def publish(self, ticks: np.ndarray):
+        """Append ticks (oldest first): records first, then the sequence number"""
+        n = len(ticks)
+        if n == 0:
+            return
+        header, data, cap = self.segment.header, self.segment.records, self.capacity
+        seq = int(header[self.SEQ])
+        keep = ticks[-cap:]
+        start = (seq + n - len(keep)) % cap
+        first = min(len(keep), cap - start)
+        for offset in (0, cap):
+            data[start + offset:start + offset + first] = keep[:first]
+            data[offset:offset + len(keep) - first] = keep[first:]
+        if seq + n > cap and header[self.COVERED_FROM] >= 0:
+            # The oldest retained tick may share its millisecond with an overwritten one
+            oldest = data[(seq + n) % cap]['time_msc']
+            header[self.COVERED_FROM] = max(int(header[self.COVERED_FROM]), int(oldest) + 1)
+        header[self.SEQ] = seq + n
+
+    def set_covered_from(self, time_msc: int):
+        self.segment.header[self.COVERED_FROM] = time_msc
+
+    # --- Reader side ---
+    def read(self, after: int) -> Tuple[np.ndarray, int, int]:
+        """(ticks with sequence numbers >= after, next sequence number, ticks lost to overwrites)"""
+        seq = self.seq
+        lo = max(after, seq - self.capacity)
+        if lo >= seq:
+            return np.empty(0, dtype=TICKS_DTYPE), seq, max(0, lo - after)
+        end = seq % self.capacity + self.capacity
+        ticks = self.segment.records[end - (seq - lo):end].copy()
+        # The owner may have lapped part of what was copied while it was being copied
+        overwritten = self.seq - self.capacity - lo
+        if overwritten > 0:
+            ticks = ticks[overwritten:]
+            lo += overwritten
+        return ticks, seq, lo - after
+
+    def latest(self) -> Optional[np.void]:
+        for _ in range(3):
+            seq = self.seq
+            if seq == 0:
+                return None
+            tick = self.segment.records[(seq - 1) % self.capacity + self.capacity].copy()
+            if self.seq - seq < self.capacity:
+                return tick
+        return None
+
+    def close(self, unlink: bool = False):
+        self.segment.close(unlink)
+
+
+class SeqlockArray:
+    """Snapshot of up to ``capacity`` records in shared memory, replaced as a whole under a seqlock.
+
+    Header: [0] version (odd while the owner writes), [1] record count, [2] flags.
+    """
+
+    VERSION, COUNT, FLAGS = 0, 1, 2
+
+    def __init__(self, name: str, dtype: np.dtype, capacity: int, create: bool = False):
+        self.segment = _Segment(name, dtype, capacity, create)
+        self.name = name
+        self.capacity = capacity
+        if create:
+            self.segment.header[:] = 0
+
+    def write(self, records: np.ndarray, flags: int = 0):
+        header = self.segment.header
+        n = min(len(records), self.capacity)
+        header[self.VERSION] += 1
+        self.segment.records[:n] = records[len(records) - n:]
+        header[self.COUNT] = n
+        header[self.FLAGS] = flags
+        header[self.VERSION] += 1
+
+    def read(self, start: int = 0, stop: Optional[int] = None) -> Tuple[np.ndarray, int, int]:
+        """(copy of records[start:stop] of a stable version, record count, flags)"""
+        header = self.segment.header
+        while True:
+            version = int(header[self.VERSION])
+            if version & 1:
+                time.sleep(0)
+                continue
+            count = int(header[self.COUNT])
+            flags = int(header[self.FLAGS])
+            lo = max(0, min(start, count))
+            hi = count if stop is None else max(lo, min(stop, count))
+            records = self.segment.records[lo:hi].copy()
+            if int(header[self.VERSION]) == version:
+                return records, count, flags
+
+    def close(self, unlink: bool = False):
+        self.segment.close(unlink)
+
+
+class TickSubscription:
+    """Reads a symbol's tick ring in sequence order, counting ticks missed when more than a ring behind"""
+
+    def __init__(self, ring: SharedTickRing, from_start: bool = False):
+        self.ring = ring
+        self.next_seq = max(0, ring.seq - ring.capacity) if from_start else ring.seq
+        self.dropped = 0
+
+    def poll(self) -> np.ndarray:
+        """Ticks published since the last poll, oldest first"""
+        ticks, self.next_seq, lost = self.ring.read(self.next_seq)
+        self.dropped += lost
+        return ticks
+
+
+# === Owner ===
+class MarketBusOwner:
+    """Publishes quotes, ticks, bars and positions of the subscribed symbols; serves forwarded terminal calls"""
+
+    def __init__(self, terminal, name: str = DEFAULT_NAME, authkey: bytes = DEFAULT_AUTHKEY,
+                 tick_capacity: int = 20_000, bar_capacity: int = 1_000, max_positions: int = 1_024,
+                 quote_interval: float = 0.25, tick_interval: float = 0.02, bar_interval: float = 1.0,
+                 state_interval: float = 0.2, bar_cache_dir: Optional[str] = None):
+        self.terminal = terminal
+        self.name = name
+        self.authkey = authkey
+        self.tick_capacity = tick_capacity
+        self.bar_capacity = bar_capacity
+        self.default_intervals = {'quote': quote_interval, 'ticks': tick_interval}
+        self.bar_interval = bar_interval
+        self.state_interval = state_interval
+        self.calls: Counter = Counter()  # Terminal calls made, by function
+        self.forwarded: Counter = Counter()  # Of those, forwarded for consumers
+        self._lock = threading.RLock()  # Terminal calls and ring/snapshot writes (publisher and control threads)
+        self._stop = threading.Event()
+
+        self.rings: Dict[str, SharedTickRing] = {}
+        self.tick_mode: Dict[str, bool] = {}  # True: full tick stream, False: sampled quotes
+        self.intervals: Dict[str, float] = {}  # Poll interval per symbol (fastest subscriber)
+        self._due: Dict[str, float] = {}
+        self.ticks = TickBuffer(self._counted(), capacity=tick_capacity)
+        self.bars: Dict[Tuple[str, int], SeqlockArray] = {}
+        # Own directory: consumers keep their BarCache files next to it and must not share a writer
+        bar_cache_dir = (bar_cache_dir or os.environ.get('MT5_BUS_BAR_CACHE')
+                         or os.path.join(os.environ.get('MT5_BAR_CACHE') or DEFAULT_CACHE_DIR, 'bus'))
+        self.bar_cache = BarCache(self._counted(), bar_cache_dir)
+        self.max_positions = max_positions
+        self.positions: Optional[SeqlockArray] = None  # Created by start(), once no other owner is running
+        self.account: Optional[SeqlockArray] = None
+        self._listener: Optional[connection.Listener] = None
+
+    def _counted(self):
+        """The terminal as seen by TickBuffer/BarCache: every call locked and counted"""
+        owner = self
+
+        class Counted:
+            def __getattr__(self, attr):
+                value = getattr(owner.terminal, attr)
+                if not callable(value):
+                    return value
+
+                def call(*args, **kwargs):
+                    return owner._terminal_call(attr, *args, **kwargs)
+                return call
+        return Counted()
+
+    def _terminal_call(self, function: str, *args, **kwargs):
+        with self._lock:
+            self.calls[function] += 1
+            return getattr(self.terminal, function)(*args, **kwargs)
+
+    # --- Subscriptions (control threads) ---
+    def subscribe_ticks(self, symbol: str, full: bool = False, interval: Optional[float] = None) -> Tuple[str, int]:
+        """Publish ``symbol``'s quotes (or its full tick stream); returns the ring's segment name and capacity"""
+        with self._lock:
+            ring = self.rings.get(symbol)
+            if ring is None:
+                ring = SharedTickRing(f"{self.name}_t{len(self.rings)}", self.tick_capacity, create=True)
+                self.rings[symbol] = ring
+                self.tick_mode[symbol] = False
+            if full and not self.tick_mode[symbol]:
+                self._start_tick_stream(symbol, ring)
+            kind = 'ticks' if self.tick_mode[symbol] else 'quote'
+            wanted = interval or self.default_intervals[kind]
+            self.intervals[symbol] = min(self.intervals.get(symbol, wanted), wanted)
+            if ring.seq == 0:
+                self._poll_symbol(symbol)
+            return ring.name, ring.capacity
+
+    def _start_tick_stream(self, symbol: str, ring: SharedTickRing):
+        """Switch from sampled quotes to every tick; the ring covers the ticks from the next full second on"""
+        self.tick_mode[symbol] = True
+        self.ticks.update(symbol)  # Loads the TickBuffer lookback
+        held = self.ticks.last(symbol)
+        if ring.seq:
+            covered_from = (int(ring.latest()['time_msc']) // 1000 + 1) * 1000
+            fresh = held[held['time_msc'] >= covered_from]
+        else:
+            fresh = held
+            covered_from = int(held['time_msc'][0]) if len(held) else -1
+        ring.publish(fresh)
+        if covered_from < 0:
+            tick = self._terminal_call('symbol_info_tick', symbol)
+            covered_from = int(tick.time_msc) + 1 if tick is not None else 0
+        ring.set_covered_from(covered_from)
+
+    def subscribe_bars(self, symbol: str, timeframe: int) -> Tuple[str, int]:
+        with self._lock:
+            key = (symbol, timeframe)
+            snapshot = self.bars.get(key)
+            if snapshot is None:
+                snapshot = SeqlockArray(f"{self.name}_b{len(self.bars)}", RATES_DTYPE, self.bar_capacity, create=True)
+                self.bars[key] = snapshot
+                self._poll_bars(key)
+            return snapshot.name, snapshot.capacity
+
+    # --- Publishing ---
+    def _poll_symbol(self, symbol: str):
+        ring = self.rings[symbol]
+        if self.tick_mode[symbol]:
+            added = self.ticks.update(symbol)
+            if added:
+                ring.publish(self.ticks.last(symbol, added))
+            return
+        tick = self._terminal_call('symbol_info_tick', symbol)
+        if tick is None:
+            return
+        latest = ring.latest()
+        if latest is None or tick.time_msc != latest['time_msc'] or tick.bid != latest['bid'] or tick.ask != latest['ask']:
+            ring.publish(np.array([(tick.time, tick.bid, tick.ask, tick.last, tick.volume, tick.time_msc,
+                                    tick.flags, tick.volume_real)], dtype=TICKS_DTYPE))
+
+    def _poll_bars(self, key: Tuple[str, int]):
+        symbol, timeframe = key
+        snapshot = self.bars[key]
+        self.bar_cache.update(symbol, timeframe, self.bar_capacity)
+        cached = self.bar_cache.cached(symbol, timeframe)
+        tail = cached[-self.bar_capacity:]
+        current, count, _ = snapshot.read(max(0, snapshot.capacity - 2))
+        if count == len(tail) and len(current) and np.array_equal(current, tail[-len(current):]):
+            return
+        # Fewer bars than asked for: the terminal has no older history, so the snapshot is complete
+        snapshot.write(tail, flags=int(len(cached) < self.bar_capacity))
+
+    def _poll_state(self):
+        positions = self._terminal_call('positions_get') or ()
+        rows = np.zeros(len(positions), dtype=POSITION_DTYPE)
+        for i, p in enumerate(positions):
+            rows[i] = (p.ticket, p.time, p.time_msc, p.time_update, p.time_update_msc, p.type, p.magic,
+                       p.identifier, p.reason, p.volume, p.price_open, p.sl, p.tp, p.price_current, p.swap,
+                       p.profit, _text(p.symbol), _text(p.comment), _text(p.external_id))
+        self.positions.write(rows)
+        a = self._terminal_call('account_info')
+        if a is None:
+            self.account.write(np.zeros(0, dtype=ACCOUNT_DTYPE))
+            return
+        self.account.write(np.array([(a.login, a.trade_mode, a.leverage, a.trade_allowed, a.balance, a.credit,
+                                       a.profit, a.equity, a.margin, a.margin_free, a.margin_level, _text(a.name),
+                                       _text(a.server), _text(a.currency), _text(a.company))], dtype=ACCOUNT_DTYPE))
+
+    def poll_once(self, now: Optional[float] = None) -> float:
+        """Publish everything that is due; returns seconds until the next poll is due"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            due = dict(self._due)
+            symbols = list(self.rings)
+            bar_keys = list(self.bars)
+        # Each poll holds the lock for its whole read-and-publish, so a control thread upgrading a
+        # ring (subscribe_ticks) never writes to it at the same time; control calls wait one poll at most
+        for symbol in symbols:
+            if due.get(symbol, 0.0) <= now:
+                with self._lock:
+                    self._poll_symbol(symbol)
+                    self._due[symbol] = now + self.intervals[symbol]
+        if due.get('__bars__', 0.0) <= now:
+            for key in bar_keys:
+                with self._lock:
+                    self._poll_bars(key)
+            self._due['__bars__'] = now + self.bar_interval
+        if due.get('__state__', 0.0) <= now:
+            with self._lock:
+                self._poll_state()
+            self._due['__state__'] = now + self.state_interval
+        return max(0.0, min(self._due.values()) - time.monotonic())
+
+    # --- Control connection ---
+    def _handle(self, request) -> Tuple:
+        function, args, kwargs = request
+        if function == 'hello':
+            return ('ok', {'positions': self.positions.name, 'account': self.account.name,
+                           'max_positions': self.positions.capacity}, None)
+        if function == 'subscribe_ticks':
+            return ('ok', self.subscribe_ticks(*args, **kwargs), None)
+        if function == 'subscribe_bars':
+            return ('ok', self.subscribe_bars(*args, **kwargs), None)
+        if function == 'constant':
+            return ('ok', getattr(self.terminal, args[0], None), None)
+        if function not in FORWARDED:
+            return ('error', f"{function} is not forwarded by the market bus", None)
+        with self._lock:
+            self.forwarded[function] += 1
+            result = self._terminal_call(function, *args, **kwargs)
+            last_error = self.terminal.last_error()
+            if function == 'order_send':
+                # Consumers see their own fill in the next positions_get
+                self._poll_state()
+        return ('ok', _plain(result), last_error)
+
+    def _serve(self, conn: connection.Connection):
+        with conn:
+            while not self._stop.is_set():
+                try:
+                    request = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    reply = self._handle(request)
+                except Exception as e:
+                    logger.exception(f"Bus request {request[0]} failed")
+                    reply = ('error', f"{type(e).__name__}: {e}", None)
+                try:
+                    conn.send(reply)
+                except (EOFError, OSError):
+                    return
+
+    def _accept(self):
+        while not self._stop.is_set():
+            try:
+                conn = self._listener.accept()
+            except (OSError, EOFError, connection.AuthenticationError):
+                if self._stop.is_set():
+                    return
+                continue
+            threading.Thread(target=self._serve, args=(conn,), daemon=True, name='bus-consumer').start()
+
+    def start(self) -> 'MarketBusOwner':
+        address, family = control_address(self.name)
+        try:
+            connection.Client(address, family, authkey=self.authkey).close()
+        except (OSError, EOFError, connection.AuthenticationError):
+            pass
+        else:
+            raise RuntimeError(f"A market bus named {self.name!r} is already running")
+        if family == 'AF_UNIX' and os.path.exists(address):
+            os.remove(address)  # Socket of an owner that did not shut down cleanly
+        self._listener = connection.Listener(address, family, authkey=self.authkey)
+        self.positions = SeqlockArray(f"{self.name}_pos", POSITION_DTYPE, self.max_positions, create=True)
+        self.account = SeqlockArray(f"{self.name}_acct", ACCOUNT_DTYPE, 1, create=True)
+        self._poll_state()
+        threading.Thread(target=self._accept, daemon=True, name='bus-control').start()
+        return self
+
+    def run(self, stats_interval: float = 60.0):
+        """Publish until ``stop``; logs the terminal calls per second every ``stats_interval``"""
+        next_stats = time.monotonic() + stats_interval
+        last_calls = Counter(self.calls)
+        while not self._stop.is_set():
+            wait = self.poll_once()
+            if stats_interval and time.monotonic() >= next_stats:
+                window = self.calls - last_calls
+                rate = sum(window.values()) / stats_interval
+                logger.info(f"Terminal calls: {rate:.1f}/s ({dict(window)}), {len(self.rings)} symbols, "
+                            f"{len(self.bars)} bar series, forwarded {dict(self.forwarded)}")
+                last_calls = Counter(self.calls)
+                next_stats += stats_interval
+            self._stop.wait(wait)
+
+    def stop(self):
+        self._stop.set()
+        if self._listener is not None:
+            self._listener.close()
+            address, family = control_address(self.name)
+            if family == 'AF_UNIX' and os.path.exists(address):
+                os.remove(address)
+        for segment in [*self.rings.values(), *self.bars.values(), self.positions, self.account]:
+            if segment is not None:
+                segment.close(unlink=True)
+
+
+def _plain(value):
+    """Picklable form of a terminal result (its result types are C structs with ``_asdict``)"""
+    if hasattr(value, '_asdict'):
+        return ('__record__', type(value).__name__, {k: _plain(v) for k, v in value._asdict().items()})
+    if isinstance(value, (tuple, list)):
+        return type(value)(_plain(v) for v in value) if isinstance(value, list) else tuple(_plain(v) for v in value)
+    return value
+
+
+_record_types: Dict[Tuple[str, Tuple[str, ...]], type] = {}
+
+
+def _restore(value):
+    """Inverse of ``_plain``: records become namedtuples with the terminal's type and field names"""
+    if isinstance(value, tuple):
+        if len(value) == 3 and value[0] == '__record__':
+            _, type_name, fields = value
+            key = (type_name, tuple(fields))
+            record_type = _record_types.get(key)
+            if record_type is None:
+                record_type = _record_types[key] = namedtuple(type_name, fields)
+            return record_type(**{k: _restore(v) for k, v in fields.items()})
+        return tuple(_restore(v) for v in value)
+    if isinstance(value, list):
+        return [_restore(v) for v in value]
+    return value
+
+
+# === Consumer ===
+class BusTerminal:
+    """MetaTrader5 stand-in for consumer processes (``MT5_BACKEND=bus``).
+
+    Quotes, ticks, bars, positions and the account are read from the owner's
+    shared memory; other calls go to the owner, which makes them on its
+    terminal. Constants have the MetaTrader5 values.
+    """
+
+    def __init__(self, name: str = DEFAULT_NAME, authkey: bytes = DEFAULT_AUTHKEY,
+                 quote_interval: Optional[float] = None, tick_interval: Optional[float] = None):
+        self.name = name
+        self.authkey = authkey
+        self.quote_interval = quote_interval  # Freshness asked of the owner (None = its default)
+        self.tick_interval = tick_interval
+        self.stats: Counter = Counter()  # shm reads vs. forwarded calls, per function
+        self._conn: Optional[connection.Connection] = None
+        self._rpc_lock = threading.Lock()  # The closer sends from several threads
+        self._last_error = (fake_mt5.RES_S_OK, 'Success')
+        self._rings: Dict[str, SharedTickRing] = {}
+        self._full: Dict[str, bool] = {}
+        self._bars: Dict[Tuple[str, int], SeqlockArray] = {}
+        self._positions: Optional[SeqlockArray] = None
+        self._account: Optional[SeqlockArray] = None
+
+    @classmethod
+    def from_env(cls) -> 'BusTerminal':
+        """Bus from MT5_BUS_NAME, MT5_BUS_AUTHKEY, MT5_BUS_QUOTE_INTERVAL and MT5_BUS_TICK_INTERVAL"""
+        quote = os.environ.get('MT5_BUS_QUOTE_INTERVAL')
+        ticks = os.environ.get('MT5_BUS_TICK_INTERVAL')
+        return cls(os.environ.get('MT5_BUS_NAME') or DEFAULT_NAME,
+                   (os.environ.get('MT5_BUS_AUTHKEY') or DEFAULT_AUTHKEY.decode()).encode(),
+                   float(quote) if quote else None, float(ticks) if ticks else None)
+
+    def __getattr__(self, attr: str):
+        if attr in FORWARDED:
+            def forward(*args, **kwargs):
+                return self._call(attr, *args, **kwargs)
+            forward.__name__ = attr
+            return forward
+        if attr.isupper() and not attr.startswith('_') and self.__dict__.get('_conn') is not None:
+            # A constant the offline table lacks: ask the owner's terminal once
+            value = self._request('constant', attr)
+            if value is not None:
+                setattr(self, attr, value)
+                return value
+        raise AttributeError(attr)
+
+    def _request(self, function: str, *args, **kwargs):
+        if self._conn is None:
+            raise RuntimeError("Market bus not initialized (call initialize() first)")
+        with self._rpc_lock:
+            self._conn.send((function, args, kwargs))
+            status, result, last_error = self._conn.recv()
+        if status != 'ok':
+            raise RuntimeError(result)
+        if last_error is not None:
+            self._last_error = tuple(last_error)
+        return result
+
+    def _call(self, function: str, *args, **kwargs):
+        self.stats[f"forwarded:{function}"] += 1
+        return _restore(self._request(function, *args, **kwargs))
+
+    # --- Session ---
+    def initialize(self, path: Optional[str] = None, **kwargs) -> bool:
+        if self._conn is not None:
+            return True
+        address, family = control_address(self.name)
+        try:
+            self._conn = connection.Client(address, family, authkey=self.authkey)
+            info = self._request('hello')
+        except (OSError, EOFError, connection.AuthenticationError) as e:
+            self._conn = None
+            self._last_error = (fake_mt5.RES_E_INTERNAL_FAIL_INIT, f"No market bus {self.name!r} running: {e}")
+            return False
+        self._positions = SeqlockArray(info['positions'], POSITION_DTYPE, info['max_positions'])
+        self._account = SeqlockArray(info['account'], ACCOUNT_DTYPE, 1)
+        self._last_error = (fake_mt5.RES_S_OK, 'Success')
+        return True
+
+    def shutdown(self):
+        for segment in [*self._rings.values(), *self._bars.values(), self._positions, self._account]:
+            if segment is not None:
+                segment.close()
+        self._rings, self._bars = {}, {}
+        self._positions = self._account = None
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def last_error(self) -> Tuple[int, str]:
+        return self._last_error
+
+    # --- Shared segments ---
+    def ring(self, symbol: str, full: bool = False) -> SharedTickRing:
+        """The symbol's tick ring, subscribing on first use (``full``: every tick, not sampled quotes)"""
+        ring = self._rings.get(symbol)
+        if ring is None or (full and not self._full[symbol]):
+            interval = self.tick_interval if full else self.quote_interval
+            name, _ = self._request('subscribe_ticks', symbol, full=full, interval=interval)
+            if ring is None:
+                ring = self._rings[symbol] = SharedTickRing(name)
+            self._full[symbol] = self._full.get(symbol, False) or full
+        return ring
+
+    def subscribe(self, symbol: str) -> TickSubscription:
+        """Sequence-ordered reader of every tick of ``symbol`` published from now on"""
+        return TickSubscription(self.ring(symbol, full=True))
+
+    def _bar_snapshot(self, symbol: str, timeframe: int) -> SeqlockArray:
+        key = (symbol, timeframe)
+        snapshot = self._bars.get(key)
+        if snapshot is None:
+            name, capacity = self._request('subscribe_bars', symbol, timeframe)
+            snapshot = self._bars[key] = SeqlockArray(name, RATES_DTYPE, capacity)
+        return snapshot
+
+    # --- Market data from shared memory ---
+    def symbol_info_tick(self, symbol: str):
+        tick = self.ring(symbol).latest()
+        self.stats['shm:symbol_info_tick'] += 1
+        return None if tick is None else fake_mt5.Tick(*tick.tolist())
+
+    def _ticks_after(self, symbol: str, from_msc: int) -> Optional[np.ndarray]:
+        """Ring ticks from ``from_msc`` on, or None if the ring does not hold all of them"""
+        ring = self.ring(symbol, full=True)
+        covered = ring.covered_from
+        if covered < 0 or from_msc < covered:
+            return None
+        ticks, _, _ = ring.read(0)
+        if ring.covered_from > from_msc:
+            return None  # Overwritten while reading
+        return ticks[np.searchsorted(ticks['time_msc'], from_msc, side='left'):]
+
+    @staticmethod
+    def _filter(ticks: np.ndarray, flags: int) -> np.ndarray:
+        if flags == fake_mt5.COPY_TICKS_INFO:
+            return ticks[(ticks['flags'] & (fake_mt5.TICK_FLAG_BID | fake_mt5.TICK_FLAG_ASK)) != 0]
+        if flags == fake_mt5.COPY_TICKS_TRADE:
+            return ticks[(ticks['flags'] & (fake_mt5.TICK_FLAG_LAST | fake_mt5.TICK_FLAG_VOLUME)) != 0]
+        return ticks
+
+    def copy_ticks_from(self, symbol: str, date_from, count: int, flags: int) -> Optional[np.ndarray]:
+        ticks = self._ticks_after(symbol, int(_epoch(date_from) * 1000))
+        if ticks is None:
+            return self._call('copy_ticks_from', symbol, date_from, count, flags)
+        self.stats['shm:copy_ticks_from'] += 1
+        return self._filter(ticks, flags)[:count]
+
+    def copy_ticks_range(self, symbol: str, date_from, date_to, flags: int) -> Optional[np.ndarray]:
+        ticks = self._ticks_after(symbol, int(_epoch(date_from) * 1000))
+        if ticks is None:
+            return self._call('copy_ticks_range', symbol, date_from, date_to, flags)
+        self.stats['shm:copy_ticks_range'] += 1
+        ticks = ticks[:np.searchsorted(ticks['time_msc'], int(_epoch(date_to) * 1000), side='right')]
+        return self._filter(ticks, flags)
+
+    def copy_rates_from_pos(self, symbol: str, timeframe: int, start_pos: int, count: int) -> Optional[np.ndarray]:
+        snapshot = self._bar_snapshot(symbol, timeframe)
+        _, held, complete = snapshot.read(0, 0)
+        if start_pos + count > held and not complete:
+            return self._call('copy_rates_from_pos', symbol, timeframe, start_pos, count)
+        self.stats['shm:copy_rates_from_pos'] += 1
+        end = held - start_pos
+        if end <= 0:
+            return None
+        bars, _, _ = snapshot.read(max(0, end - count), end)
+        return bars if len(bars) else None
+
+    def copy_rates_from(self, symbol: str, timeframe: int, date_from, count: int) -> Optional[np.ndarray]:
+        bars, _, complete = self._bar_snapshot(symbol, timeframe).read()
+        end = int(np.searchsorted(bars['time'], _epoch(date_from), side='right'))
+        if end < count and not complete:
+            return self._call('copy_rates_from', symbol, timeframe, date_from, count)
+        self.stats['shm:copy_rates_from'] += 1
+        return bars[max(0, end - count):end]
+
+    def copy_rates_range(self, symbol: str, timeframe: int, date_from, date_to) -> Optional[np.ndarray]:
+        bars, _, complete = self._bar_snapshot(symbol, timeframe).read()
+        t0 = _epoch(date_from)
+        if (len(bars) == 0 or bars['time'][0] > t0) and not complete:
+            return self._call('copy_rates_range', symbol, timeframe, date_from, date_to)
+        self.stats['shm:copy_rates_range'] += 1
+        lo = int(np.searchsorted(bars['time'], t0, side='left'))
+        hi = int(np.searchsorted(bars['time'], _epoch(date_to), side='right'))
+        return bars[lo:hi]
+
+    # --- Trading state from shared memory ---
+    def positions_get(self, symbol: Optional[str] = None, group: Optional[str] = None,
+                      ticket: Optional[int] = None):
+        if group is not None:
+            return self._call('positions_get', symbol=symbol, group=group, ticket=ticket)
+        if self._positions is None:
+            return None
+        rows, _, _ = self._positions.read()
+        self.stats['shm:positions_get'] += 1
+        if symbol is not None:
+            rows = rows[rows['symbol'] == symbol.encode()]
+        if ticket is not None:
+            rows = rows[rows['ticket'] == ticket]
+        return tuple(fake_mt5.TradePosition(*(v.decode() if isinstance(v, bytes) else v for v in row.tolist()))
+                     for row in rows)
+
+    def positions_total(self) -> int:
+        return 0 if self._positions is None else self._positions.read(0, 0)[1]
+
+    def account_info(self):
+        if self._account is None:
+            return None
+        rows, _, _ = self._account.read()
+        self.stats['shm:account_info'] += 1
+        if len(rows) == 0:
+            return None
+        return fake_mt5.AccountInfo(*(v.decode() if isinstance(v, bytes) else v for v in rows[0].tolist()))
+
+
+# Constants with the MetaTrader5 package's values
+for _constant in dir(fake_mt5):
+    if _constant.isupper() and not _constant.startswith('_') and isinstance(getattr(fake_mt5, _constant), int):
+        setattr(BusTerminal, _constant, getattr(fake_mt5, _constant))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Market-data bus owner: one terminal connection for all strategies')
+    parser.add_argument('--name', default=os.environ.get('MT5_BUS_NAME') or DEFAULT_NAME)
+    parser.add_argument('--symbols', nargs='*', default=[], help='Symbols whose quotes are published from the start')
+    parser.add_argument('--tick-symbols', nargs='*', default=[], help='Symbols whose full tick stream is published')
+    parser.add_argument('--timeframes', nargs='*', default=[], help='Bar series published for every listed symbol')
+    parser.add_argument('--quote-interval', type=float, default=0.25)
+    parser.add_argument('--tick-interval', type=float, default=0.02)
+    parser.add_argument('--bar-interval', type=float, default=1.0)
+    parser.add_argument('--state-interval', type=float, default=0.2, help='positions_get/account_info interval')
+    parser.add_argument('--tick-capacity', type=int, default=20_000)
+    parser.add_argument('--bar-capacity', type=int, default=1_000)
+    parser.add_argument('--stats-interval', type=float, default=60.0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if os.environ.get('MT5_BACKEND', '').strip().lower() == 'bus':
+        parser.error('The bus owner needs a real terminal backend (MT5_BACKEND=mt5 or fake)')
+    terminal = load_terminal()
+    if not terminal.initialize():
+        raise SystemExit(f"MT5 initialization failed: {terminal.last_error()}")
+
+    owner = MarketBusOwner(terminal, args.name, (os.environ.get('MT5_BUS_AUTHKEY') or DEFAULT_AUTHKEY.decode()).encode(),
+                           tick_capacity=args.tick_capacity, bar_capacity=args.bar_capacity,
+                           quote_interval=args.quote_interval, tick_interval=args.tick_interval,
+                           bar_interval=args.bar_interval, state_interval=args.state_interval)
+    signal.signal(signal.SIGTERM, signal.default_int_handler)  # Clean up the segments when terminated too
+    try:
+        owner.start()
+        for symbol in args.symbols:
+            owner.subscribe_ticks(symbol)
+        for symbol in args.tick_symbols:
+            owner.subscribe_ticks(symbol, full=True)
+        for timeframe in args.timeframes:
+            for symbol in dict.fromkeys([*args.symbols, *args.tick_symbols]):
+                owner.subscribe_bars(symbol, getattr(terminal, f"TIMEFRAME_{timeframe.upper()}"))
+        logger.info(f"Market bus {args.name!r} running ({len(owner.rings)} symbols, {len(owner.bars)} bar series)")
+        owner.run(args.stats_interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        owner.stop()
+        terminal.shutdown()
+
+
+if __name__ == "__main__":
+    main()
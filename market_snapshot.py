@@ -0,0 +1,106 @@
+"""Per-cycle tick snapshot shared by the FVG screener, the BB midline closer and the HFT loop.
+
+One ``symbol_info_tick`` call per watched symbol per refresh; every consumer in
+the process reads bid/ask/last from the same structured array instead of asking
+the terminal again.
+"""
+
+import time
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+TICK_SNAPSHOT_DTYPE = np.dtype([
+    ('bid', '<f8'),
+    ('ask', '<f8'),
+    ('last', '<f8'),
+    ('time', '<i8'),       # Server time of the tick (seconds)
+    ('time_msc', '<i8'),   # Server time of the tick (milliseconds)
+    ('fetched', '<f8'),    # Local time.monotonic() of the fetch, 0 = never fetched
+    ('valid', '?'),
+])
+
+
+class MarketSnapshot:
+    """Latest tick of every watched symbol, stored in a NumPy record array keyed by symbol index"""
+
+    def __init__(self, terminal, symbols: Iterable[str] = ()):
+        self.terminal = terminal  # MetaTrader5 module (or a stand-in with symbol_info_tick)
+        self.symbols: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.ticks = np.recarray(0, dtype=TICK_SNAPSHOT_DTYPE)
+        self.last_refresh: Optional[float] = None
+        self.watch(symbols)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.index
+
+    def watch(self, symbols: Iterable[str]):
+        """Add symbols to the snapshot (already watched symbols are ignored)"""
+        new = [s for s in dict.fromkeys(symbols) if s not in self.index]
+        if not new:
+            return
+        for symbol in new:
+            self.index[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        grown = np.recarray(len(self.symbols), dtype=TICK_SNAPSHOT_DTYPE)
+        grown[:len(self.ticks)] = self.ticks
+        grown[len(self.ticks):] = np.zeros(len(new), dtype=TICK_SNAPSHOT_DTYPE)
+        self.ticks = grown
+
+    def refresh(self, symbols: Optional[Iterable[str]] = None) -> int:
+        """Fetch the tick of every watched symbol (or the given ones) once; returns how many succeeded"""
+        if symbols is None:
+            symbols = self.symbols
+        else:
+            symbols = list(symbols)
+            self.watch(symbols)
+
+        ok = 0
+        for symbol in symbols:
+            if self._fetch(symbol):
+                ok += 1
+        self.last_refresh = time.monotonic()
+        return ok
+
+    def _fetch(self, symbol: str) -> bool:
+        i = self.index[symbol]
+        tick = self.terminal.symbol_info_tick(symbol)
+        if tick is None:
+            row = self.ticks[i]
+            row.fetched = time.monotonic()
+            row.valid = False
+            return False
+        # One structured assignment; a record setattr per field costs ~25x more
+        self.ticks[i] = (tick.bid, tick.ask, tick.last, tick.time, tick.time_msc, time.monotonic(), True)
+        return True
+
+    def tick(self, symbol: str, max_age: Optional[float] = None) -> Optional[np.record]:
+        """Snapshot tick of a symbol (attribute access like an MT5 tick), or None if unavailable.
+
+        With ``max_age`` (seconds) the symbol is re-fetched when its snapshot is
+        older than that, so call sites outside the per-cycle refresh stay fresh.
+        The returned record is a view and changes on the next refresh.
+        """
+        if symbol not in self.index:
+            if max_age is None:
+                return None
+            self.watch([symbol])
+        row = self.ticks[self.index[symbol]]
+        if max_age is not None and (row.fetched == 0 or time.monotonic() - row.fetched > max_age):
+            self._fetch(symbol)
+        return row if row.valid else None
+
+    def mid(self, symbol: str) -> Optional[float]:
+        row = self.tick(symbol)
+        return None if row is None else (row.bid + row.ask) / 2
+
+    def close_price(self, symbol: str, is_buy_position: bool) -> Optional[float]:
+        """Price a position is closed at: bid for longs, ask for shorts"""
+        row = self.tick(symbol)
+        if row is None:
+            return None
+        return float(row.bid if is_buy_position else row.ask)
@@ -1,88 +1,198 @@
-import MetaTrader5 as mt5
-import pandas as pd
+import asyncio
+import os
 import time
 
+from bar_cache import BarCache
+from bollinger_state import BollingerCache
+from execution_journal import ExecutionJournal
+from latency_metrics import Metrics, MetricsExporter
+from market_snapshot import MarketSnapshot
+from symbol_meta import OrderTemplates, SymbolMetaCache
+from mt5_common import load_terminal
+
 # === PARAMETERE ===
-TIMEFRAME = mt5.TIMEFRAME_M30
+TIMEFRAME = "M30"            # Slås opp som TIMEFRAME_<verdi> på terminalen
 BB_PERIOD = 20
-SLEEP_INTERVAL = 0.5
-POST_CLOSE_DELAY = 2
+BB_DEVIATIONS = 2.0
+SLEEP_INTERVAL = 0.5         # Hvor ofte posisjonslista hentes på nytt (positions_get)
+# Hvor ofte tick-tiden per symbol sjekkes for endring (ett symbol_info_tick-kall per symbol per runde).
+# Med MT5_BACKEND=bus leses ticks fra delt minne og kan polles oftere uten å belaste terminalen.
+TICK_POLL_INTERVAL = float(os.environ.get('MT5_CLOSER_TICK_POLL', 0.25))
+POST_CLOSE_DELAY = 2         # Karantene per ticket etter lukking (ingen global pause lenger)
+MAX_LATENCY = 0.05           # Budsjett (sek) fra ny tick til order_send; overskridelser logges
+MAX_CONCURRENT_CLOSES = 8    # Maks samtidige order_send-kall
 
-# === INITIALISERING ===
-if not mt5.initialize():
-    print("MT5 init feil:", mt5.last_error())
-    quit()
+class MidlineCloser:
+    """Lukker posisjoner som krysser Bollinger-midtbåndet; all tilstand bygges her, ikke ved import"""
 
-def get_midband(symbol):
-    rates = mt5.copy_rates_from_pos(symbol, TIMEFRAME, 0, BB_PERIOD + 1)
-    if rates is None or len(rates) < BB_PERIOD:
-        return None
-    df = pd.DataFrame(rates)
-    sma_series = df['close'].rolling(BB_PERIOD).mean()
-    mid = sma_series.iloc[-1]  # <- Dette gir garantert én float-verdi
-    return float(mid) if pd.notnull(mid) else None
-
-
-def close_position_direct(pos):
-    symbol = pos.symbol
-    ticket = pos.ticket
-    volume = pos.volume
-    order_type = mt5.ORDER_TYPE_SELL if pos.type == mt5.ORDER_TYPE_BUY else mt5.ORDER_TYPE_BUY
-    price = mt5.symbol_info_tick(symbol).bid if order_type == mt5.ORDER_TYPE_SELL else mt5.symbol_info_tick(symbol).ask
-
-    request = {
-        "action": mt5.TRADE_ACTION_DEAL,
-        "symbol": symbol,
-        "volume": volume,
-        "type": order_type,
-        "position": ticket,  # <- kritisk: refererer til aktiv posisjon
-        "price": price,
-        "deviation": 10,
-        "magic": 0,
-        "comment": "Close via BB midband",
-        "type_time": mt5.ORDER_TIME_GTC,
-        "type_filling": mt5.ORDER_FILLING_IOC,
-    }
-
-    result = mt5.order_send(request)
-    if result.retcode == mt5.TRADE_RETCODE_DONE:
-        print(f"[OK] Lukket posisjon {ticket} ({symbol}) til pris {price}")
-        time.sleep(POST_CLOSE_DELAY)
-        return True
-    else:
-        print(f"[FEIL] Klarte ikke lukke {symbol} (ticket {ticket}): {result.retcode}")
-        return False
-
-def track_and_close_positions():
-    while True:
-        positions = mt5.positions_get()
-        if not positions:
-            print("Ingen åpne posisjoner.")
+    def __init__(self, terminal, journal_path="bb_closer_executions.bin"):
+        self.mt5 = terminal
+        # Én tick per symbol per runde, delt mellom evaluering og lukking
+        self.snapshot = MarketSnapshot(terminal)
+        # Bar-cache på disk: bare nye/formende barer hentes fra terminalen
+        self.bar_cache = BarCache(terminal)
+        # Løpende SMA/BB-tilstand per symbol: O(1) når en bar lukkes, ticks erstatter bare den formende baren
+        self.bands = BollingerCache(self.bar_cache, getattr(terminal, f"TIMEFRAME_{TIMEFRAME}"),
+                                    BB_PERIOD, BB_DEVIATIONS)
+        # Ferdigbygde lukkeordre per symbol/retning: bare volum, pris og ticket settes per ordre
+        self.orders = OrderTemplates(terminal, magic=0, deviation=10, close_comment="Close via BB midband")
+        # Latenstid per steg (tick-henting, bånd, order_send) som histogrammer, dumpes til fil (MT5_METRICS_*)
+        self.metrics = Metrics.from_env()
+        # Én binær post per lukkeordre (latens, slippage, retcode): python execution_journal.py bb_closer_executions.bin
+        self.journal = ExecutionJournal(journal_path)
+        self.symbol_meta = SymbolMetaCache(terminal)  # point per symbol til slippage i journalen
+
+    def get_midband(self, symbol):
+        tick = self.snapshot.tick(symbol)
+        if tick is None:
+            state = self.bands.update(symbol)
         else:
-            for pos in positions:
-                symbol = pos.symbol
-                tick = mt5.symbol_info_tick(symbol)
-                if not tick:
-                    print(f"[FEIL] Ingen tick-data for {symbol}")
-                    continue
-
-                price = tick.bid if pos.type == mt5.ORDER_TYPE_BUY else tick.ask
-                midband = get_midband(symbol)
-                if midband is None:
-                    print(f"[ADVARSEL] Mangler midtbånd for {symbol}")
-                    continue
-
-                # === Korrekt lukkelogikk ===
-                if pos.type == mt5.ORDER_TYPE_BUY and price >= midband:
-                    print(f"[LONG] Pris {price:.5f} ≥ midtbånd {midband:.5f} → LUKKER")
-                    close_position_direct(pos)
-                elif pos.type == mt5.ORDER_TYPE_SELL and price <= midband:
-                    print(f"[SHORT] Pris {price:.5f} ≤ midtbånd {midband:.5f} → LUKKER")
-                    close_position_direct(pos)
-                else:
-                    print(f"[{symbol}] Pris: {price:.5f} | Midtbånd: {midband:.5f} → Holder åpen")
-
-        time.sleep(SLEEP_INTERVAL)
+            # Formende bar lukker på bid, som MT5-barene
+            state = self.bands.update(symbol, tick.bid, tick.time)
+        return self.bands.midband(symbol) if state is not None else None
+
+    def close_position_direct(self, pos, price=None, detected=None):
+        symbol = pos.symbol
+        ticket = pos.ticket
+        is_buy = pos.type == self.mt5.ORDER_TYPE_BUY
+        if price is None:
+            # Bid for å lukke long, ask for å lukke short
+            self.snapshot.refresh([symbol])
+            price = self.snapshot.close_price(symbol, is_buy)
+            if price is None:
+                print(f"[FEIL] Ingen tick-data for {symbol}, kan ikke lukke (ticket {ticket})")
+                return False
+
+        # "position" refererer til den aktive posisjonen (kritisk)
+        request = self.orders.close(symbol, is_buy, pos.volume, price, ticket)
+
+        send_ns = self.journal.clock()
+        # Beslutning = ticken som utløste lukkingen (monotonic), regnet om til journalens klokke
+        decision_ns = send_ns - int((time.monotonic() - detected) * 1e9) if detected is not None else send_ns
+        with self.metrics.span('order_send'):
+            result = self.mt5.order_send(request)
+        fill_ns = self.journal.clock()
+        meta = self.symbol_meta.get(symbol)
+        self.journal.record(request, result, decision_ns, send_ns, fill_ns, meta.point if meta else 0.0)
+        if result is not None and result.retcode == self.mt5.TRADE_RETCODE_DONE:
+            print(f"[OK] Lukket posisjon {ticket} ({symbol}) til pris {price}")
+            return True
+        else:
+            retcode = result.retcode if result is not None else self.mt5.last_error()
+            print(f"[FEIL] Klarte ikke lukke {symbol} (ticket {ticket}): {retcode}")
+            return False
+
+    def should_close(self, pos, tick, midband):
+        """Lukkepris hvis posisjonen har krysset midtbåndet, ellers None"""
+        price = tick.bid if pos.type == self.mt5.ORDER_TYPE_BUY else tick.ask
+
+        # === Korrekt lukkelogikk ===
+        if pos.type == self.mt5.ORDER_TYPE_BUY and price >= midband:
+            print(f"[LONG] Pris {price:.5f} ≥ midtbånd {midband:.5f} → LUKKER")
+            return float(price)
+        elif pos.type == self.mt5.ORDER_TYPE_SELL and price <= midband:
+            print(f"[SHORT] Pris {price:.5f} ≤ midtbånd {midband:.5f} → LUKKER")
+            return float(price)
+        print(f"[{pos.symbol}] Pris: {price:.5f} | Midtbånd: {midband:.5f} → Holder åpen")
+        return None
+
+    async def close_position_async(self, pos, price, detected, slots, cooldown_until):
+        """Sender lukkeordren i en tråd, så flere lukkinger kan gå samtidig uten å stoppe tick-løkka"""
+        async with slots:
+            waited = time.monotonic() - detected
+            self.metrics.record('tick_to_order', waited)
+            if waited > MAX_LATENCY:
+                print(f"[LATENS] {pos.symbol} (ticket {pos.ticket}): {waited * 1000:.1f} ms fra tick til "
+                      f"order_send (budsjett {MAX_LATENCY * 1000:.0f} ms)")
+            ok = await asyncio.to_thread(self.close_position_direct, pos, price, detected)
+        # Lukket: hold ticketen i karantene til positions_get har fått det med seg.
+        # Feilet: nytt forsøk tidligst etter én posisjonsrunde.
+        cooldown_until[pos.ticket] = time.monotonic() + (POST_CLOSE_DELAY if ok else SLEEP_INTERVAL)
+
+    async def track_and_close_positions(self):
+        slots = asyncio.Semaphore(MAX_CONCURRENT_CLOSES)
+        tasks = set()
+        closing = set()        # Tickets med lukkeordre på vei
+        cooldown_until = {}    # ticket -> monotonic-tid før ticketen kan evalueres igjen
+        last_tick_msc = {}     # symbol -> time_msc for sist evaluerte tick
+        by_symbol = {}         # symbol -> åpne posisjoner
+        evaluated = set()      # Tickets som er evaluert minst én gang
+        next_positions = 0.0
+
+        def close_done(task, ticket):
+            tasks.discard(task)
+            closing.discard(ticket)
+
+        while True:
+            now = time.monotonic()
+            if now >= next_positions:
+                next_positions = now + SLEEP_INTERVAL
+                with self.metrics.span('positions_fetch'):
+                    positions = self.mt5.positions_get()
+                if not positions:
+                    print("Ingen åpne posisjoner.")
+                    positions = ()
+                by_symbol = {}
+                for pos in positions:
+                    by_symbol.setdefault(pos.symbol, []).append(pos)
+                tickets = {pos.ticket for pos in positions}
+                evaluated &= tickets
+                for ticket in [t for t, until in cooldown_until.items() if t not in tickets and until <= now]:
+                    del cooldown_until[ticket]
+
+            if by_symbol:
+                # Én tick per symbol; bare symboler med ny tick (eller nye posisjoner) evalueres
+                with self.metrics.span('tick_fetch'):
+                    self.snapshot.refresh(by_symbol)
+                detected = time.monotonic()
+                for symbol, symbol_positions in by_symbol.items():
+                    tick = self.snapshot.tick(symbol)
+                    if tick is None:
+                        print(f"[FEIL] Ingen tick-data for {symbol}")
+                        continue
+                    ticked = last_tick_msc.get(symbol) != tick.time_msc
+                    if not ticked and all(pos.ticket in evaluated for pos in symbol_positions):
+                        continue
+                    last_tick_msc[symbol] = int(tick.time_msc)
+
+                    with self.metrics.span('band_update'):
+                        midband = self.get_midband(symbol)
+                    if midband is None:
+                        print(f"[ADVARSEL] Mangler midtbånd for {symbol}")
+                        continue
+
+                    for pos in symbol_positions:
+                        if not ticked and pos.ticket in evaluated:
+                            continue
+                        evaluated.add(pos.ticket)
+                        if pos.ticket in closing or cooldown_until.get(pos.ticket, 0) > detected:
+                            continue
+                        price = self.should_close(pos, tick, midband)
+                        if price is not None:
+                            closing.add(pos.ticket)
+                            task = asyncio.create_task(
+                                self.close_position_async(pos, price, detected, slots, cooldown_until))
+                            tasks.add(task)
+                            task.add_done_callback(lambda t, ticket=pos.ticket: close_done(t, ticket))
+
+            await asyncio.sleep(TICK_POLL_INTERVAL)
+
 
 # === START ===
-track_and_close_positions()
+def main():
+    # MetaTrader5-pakken, eller offline-stand-in med MT5_BACKEND=fake
+    mt5 = load_terminal()
+    if not mt5.initialize():
+        print("MT5 init feil:", mt5.last_error())
+        quit()
+    closer = MidlineCloser(mt5)
+    exporter = MetricsExporter.from_env(closer.metrics, "bb_closer_metrics.json").start()
+    try:
+        asyncio.run(closer.track_and_close_positions())
+    finally:
+        exporter.stop()
+        closer.journal.close()
+
+
+if __name__ == "__main__":
+    main()
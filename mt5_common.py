@@ -0,0 +1,168 @@
+"""Shared helpers for the MT5 scripts that do not need the MetaTrader5 package itself."""
+
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+# MT5 encodes timeframes as: minutes for M1..M30, 0x4000 | hours for H1..D1,
+# 0x8000 | 1 for W1 and 0xC000 | 1 for MN1
+_HOUR_FLAG = 0x4000
+_WEEK_FLAG = 0x8000
+_MONTH_FLAG = 0xC000
+
+
+def timeframe_seconds(timeframe: int) -> int:
+    """Nominal length of one bar of an MT5 timeframe constant in seconds (MN1 = 30 days)"""
+    if timeframe & _MONTH_FLAG == _MONTH_FLAG:
+        return 30 * 86400 * (timeframe & 0xFF)
+    if timeframe & _WEEK_FLAG:
+        return 7 * 86400 * (timeframe & 0xFF)
+    if timeframe & _HOUR_FLAG:
+        return 3600 * (timeframe & 0xFF)
+    return 60 * timeframe
+
+
+def parse_timeframe(name: str) -> int:
+    """MT5 timeframe constant of a name like ``M15``, ``H4``, ``D1``, ``W1`` or ``MN1``"""
+    text = name.strip().upper()
+    try:
+        if text.startswith('MN'):
+            return _MONTH_FLAG | int(text[2:])
+        unit, count = text[0], int(text[1:])
+    except (IndexError, ValueError):
+        raise ValueError(f"Unknown timeframe {name!r}") from None
+    if unit == 'M' and 1 <= count <= 30:
+        return count
+    if unit == 'H' and 1 <= count <= 12:
+        return _HOUR_FLAG | count
+    if unit == 'D' and count == 1:
+        return _HOUR_FLAG | 24
+    if unit == 'W' and count == 1:
+        return _WEEK_FLAG | 1
+    raise ValueError(f"Unknown timeframe {name!r}")
+
+
+def timeframe_name(timeframe: int) -> str:
+    """Inverse of ``parse_timeframe`` (``H4`` for ``TIMEFRAME_H4``)"""
+    if timeframe & _MONTH_FLAG == _MONTH_FLAG:
+        return f"MN{timeframe & 0xFF}"
+    if timeframe & _WEEK_FLAG:
+        return f"W{timeframe & 0xFF}"
+    if timeframe & _HOUR_FLAG:
+        hours = timeframe & 0xFF
+        return 'D1' if hours == 24 else f"H{hours}"
+    return f"M{timeframe}"
+
+
+# Layout of the structured arrays returned by copy_rates_from_pos / copy_rates_from
+RATES_DTYPE = np.dtype([
+    ('time', '<i8'),
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+    ('tick_volume', '<u8'),
+    ('spread', '<i4'),
+    ('real_volume', '<u8'),
+])
+
+
+# Layout of the structured arrays returned by copy_ticks_from / copy_ticks_range
+TICKS_DTYPE = np.dtype([
+    ('time', '<i8'),
+    ('bid', '<f8'),
+    ('ask', '<f8'),
+    ('last', '<f8'),
+    ('volume', '<u8'),
+    ('time_msc', '<i8'),
+    ('flags', '<u4'),
+    ('volume_real', '<f8'),
+])
+
+
+def load_terminal():
+    """Terminal module selected by ``MT5_BACKEND``: the MetaTrader5 package (default), ``fake`` or ``bus``.
+
+    The fake backend (fake_mt5.py) replays recorded or synthetic data so the
+    scripts can be run and benchmarked without a Windows terminal. The bus
+    backend reads market data published by a running ``market_bus.py`` owner
+    and forwards everything else to it.
+    """
+    backend = os.environ.get('MT5_BACKEND', 'mt5').strip().lower()
+    if backend == 'fake':
+        import fake_mt5
+        return fake_mt5
+    if backend == 'bus':
+        from market_bus import BusTerminal
+        return BusTerminal.from_env()
+    if backend not in ('', 'mt5', 'metatrader5'):
+        raise ValueError(f"Unknown MT5_BACKEND {backend!r} (expected 'mt5', 'fake' or 'bus')")
+    import MetaTrader5
+    return MetaTrader5
+
+
+def rates_to_frame(rates: np.ndarray) -> pd.DataFrame:
+    """Time-indexed OHLC DataFrame from an MT5 rates array (as the scripts' get_data builds it)"""
+    df = pd.DataFrame(rates)
+    df['time'] = pd.to_datetime(df['time'], unit='s')
+    return df.set_index('time')
+
+
+class TokenBucket:
+    """Thread-safe token bucket: refills ``rate`` tokens per second up to ``capacity``"""
+
+    def __init__(self, rate: float, capacity: float, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = float(capacity)
+        self._stamp = clock()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def per_day(cls, count: float, burst: float = 1) -> 'TokenBucket':
+        """``count`` tokens per day on average, at most ``burst`` at once"""
+        return cls(count / 86400, burst)
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    @property
+    def available(self) -> float:
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        with self._lock:
+            self._refill()
+            if self._tokens < tokens:
+                return False
+            self._tokens -= tokens
+            return True
+
+    def wait_time(self, tokens: float = 1) -> float:
+        """Seconds until ``tokens`` can be acquired (0 if available now)"""
+        with self._lock:
+            self._refill()
+            missing = tokens - self._tokens
+            if missing <= 0:
+                return 0.0
+            return missing / self.rate if self.rate > 0 else float('inf')
+
+    def refund(self, tokens: float = 1):
+        """Give back tokens that were acquired but not used (capped at ``capacity``)"""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens + tokens)
+
+    def drain(self):
+        """Drop all tokens, e.g. after the server reported its own limit"""
+        with self._lock:
+            self._refill()
+            self._tokens = 0.0
@@ -0,0 +1,302 @@
+"""Background e-mail notifications for the screener and the HFT loop.
+
+``notify`` only puts the message on a queue, so scanning and order management
+never wait on mail I/O. One sender thread owns an authenticated SMTP session
+that is reused across messages and re-established when the server drops it.
+Sending is limited by a token bucket, charged only for messages the server
+accepted; messages that arrive while the sender waits for a token (or inside
+``digest_window``) are coalesced into one digest, and a message with the same
+``key`` as a pending one replaces it.
+"""
+
+import atexit
+import html
+import logging
+import queue
+import smtplib
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import Dict, List, Optional
+
+from latency_metrics import Metrics
+from mt5_common import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+@dataclass
+class SmtpSettings:
+    """Where and as whom to send; a local stand-in only needs host/port with starttls=False and no user"""
+    host: str = 'smtp.gmail.com'
+    port: int = 587
+    user: Optional[str] = None
+    password: Optional[str] = None
+    sender: Optional[str] = None  # Defaults to user
+    recipient: Optional[str] = None
+    starttls: bool = True
+    timeout: float = 30.0
+
+
+@dataclass
+class Notification:
+    subject: str
+    body: str
+    is_html: bool = False
+    key: Optional[str] = None  # Pending messages with the same key are replaced by the newest
+    created: datetime = field(default_factory=datetime.now)
+
+
+class EmailNotifier:
+    """Queue + background sender with a pooled SMTP session, digests and token-bucket rate limiting"""
+
+    def __init__(self,
+                 settings: SmtpSettings,
+                 limiter: Optional[TokenBucket] = None,
+                 digest_window: float = 2.0,
+                 idle_timeout: float = 240.0,
+                 max_pending: int = 50,
+                 metrics: Optional[Metrics] = None):
+        self.settings = settings
+        self.limiter = limiter or TokenBucket.per_day(80, burst=10)
+        self.digest_window = digest_window  # Seconds to wait for more messages before sending a burst
+        self.idle_timeout = idle_timeout  # Reconnect instead of reusing a session idle this long
+        self.max_pending = max_pending
+        self.metrics = metrics or Metrics(enabled=False)  # 'email_send' span per SMTP send
+
+        self.sent = 0
+        self.sent_today = 0
+        self.failed = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.paused_until = 0.0  # time.monotonic() before which nothing is sent
+        self.last_error: Optional[str] = None
+
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+        self._sent_date = datetime.now().date()
+        self._failures = 0
+        self._unfinished = 0  # Notifications queued or pending and not yet sent or dropped
+        self._unfinished_lock = threading.Lock()
+        self._idle = threading.Event()  # Set exactly when _unfinished is 0
+        self._idle.set()
+        self._atexit_registered = False
+
+    @property
+    def paused(self) -> bool:
+        return time.monotonic() < self.paused_until
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name='email-notifier', daemon=True)
+        self._thread.start()
+        if not self._atexit_registered:
+            atexit.register(self.stop)
+            self._atexit_registered = True
+
+    def stop(self, timeout: float = 10.0):
+        """Send what is pending (ignoring the rate limit) and stop the sender thread"""
+        thread = self._thread
+        if thread is None:
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+        if thread.is_alive():
+            # Still inside a send; it closes the session itself when it reaches the stop marker
+            logger.warning(f"Email sender still busy after {timeout}s; it stops after the current send")
+            return
+        self._thread = None
+
+    def notify(self, subject: str, body: str, is_html: bool = False, key: Optional[str] = None):
+        """Queue a message (starting the sender on first use); never blocks"""
+        if self._thread is None or not self._thread.is_alive():
+            self.start()
+        with self._unfinished_lock:
+            self._unfinished += 1
+            self._idle.clear()
+        self._queue.put(Notification(subject, body, is_html, key))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until everything queued so far has been handled; True if it was"""
+        return self._idle.wait(timeout)
+
+    # --- Sender thread ---
+    def _run(self):
+        pending: List[Notification] = []
+        while True:
+            timeout = self._wait_time() if pending else None
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                if pending:
+                    self._deliver(pending)
+                    self._finished(len(pending))
+                self._close()
+                return
+            if item is not None:
+                self._add(pending, item)
+                # Let a burst arrive so it goes out as one digest
+                deadline = time.monotonic() + self.digest_window
+                while (left := deadline - time.monotonic()) > 0:
+                    try:
+                        item = self._queue.get(timeout=left)
+                    except queue.Empty:
+                        break
+                    if item is _STOP:
+                        self._queue.put(_STOP)
+                        break
+                    self._add(pending, item)
+
+            if pending and not self.paused and self.limiter.try_acquire():
+                if self._deliver(pending, charged=True):
+                    self._finished(len(pending))
+                    pending = []
+
+    def _finished(self, count: int):
+        """``count`` notifications were sent, replaced or dropped"""
+        with self._unfinished_lock:
+            self._unfinished -= count
+            if self._unfinished == 0:
+                self._idle.set()
+
+    def _wait_time(self) -> float:
+        pause = self.paused_until - time.monotonic()
+        return max(0.05, pause, self.limiter.wait_time())
+
+    def _add(self, pending: List[Notification], item: Notification):
+        if item.key is not None:
+            for i, old in enumerate(pending):
+                if old.key == item.key:
+                    del pending[i]
+                    self.coalesced += 1
+                    self._finished(1)
+                    break
+        pending.append(item)
+        if len(pending) > self.max_pending:
+            del pending[0]
+            self.dropped += 1
+            self._finished(1)
+
+    def _build(self, batch: List[Notification]) -> MIMEMultipart:
+        if len(batch) == 1:
+            subject, body, is_html = batch[0].subject, batch[0].body, batch[0].is_html
+        else:
+            self.coalesced += len(batch) - 1
+            subject = f"{batch[-1].subject} (+{len(batch) - 1} more)"
+            is_html = any(n.is_html for n in batch)
+            if is_html:
+                body = ''.join(
+                    f"<h3>{html.escape(n.subject)} ({n.created:%H:%M:%S})</h3>"
+                    + (n.body if n.is_html else f"<pre>{html.escape(n.body)}</pre>")
+                    for n in batch)
+            else:
+                body = '\n\n'.join(f"=== {n.subject} ({n.created:%H:%M:%S}) ===\n{n.body}" for n in batch)
+
+        msg = MIMEMultipart()
+        msg['From'] = self.settings.sender or self.settings.user or ''
+        msg['To'] = self.settings.recipient or ''
+        msg['Subject'] = subject
+        msg.attach(MIMEText(body, 'html' if is_html else 'plain'))
+        return msg
+
+    def _deliver(self, batch: List[Notification], charged: bool = False) -> bool:
+        """Send ``batch`` as one email; ``charged`` if a limiter token was taken for it (returned on failure)"""
+        msg = self._build(batch)
+        try:
+            with self.metrics.span('email_send'):
+                self._send(msg)
+        except Exception as e:
+            self.failed += 1
+            self.last_error = str(e)
+            if charged:
+                self.limiter.refund()  # Before _on_error, which may drain the bucket
+            self._on_error(e)
+            return False
+
+        self._failures = 0
+        self.sent += 1
+        today = datetime.now().date()
+        if today != self._sent_date:
+            self._sent_date = today
+            self.sent_today = 0
+        self.sent_today += 1
+        logger.info(f"Email sent: {msg['Subject']} ({len(batch)} message(s), {self.sent_today} today)")
+        return True
+
+    def _on_error(self, error: Exception):
+        text = str(error)
+        if "Daily user sending limit exceeded" in text or "5.4.5" in text:
+            # The provider's own daily quota: hold everything until tomorrow
+            tomorrow = datetime.combine(datetime.now().date() + timedelta(days=1), datetime.min.time())
+            self.paused_until = time.monotonic() + (tomorrow - datetime.now()).total_seconds()
+            self.limiter.drain()
+            logger.error("Daily sending limit exceeded; emails paused until tomorrow")
+        elif "Message rate limit exceeded" in text:
+            self.paused_until = time.monotonic() + 60
+            logger.error("Rate limit exceeded; emails paused for 60s")
+        else:
+            # Back off 5s, 10s, 20s, ... up to 5 minutes; messages stay pending
+            self._failures += 1
+            self.paused_until = time.monotonic() + min(300, 5 * 2 ** (self._failures - 1))
+            logger.error(f"Failed to send email: {error}")
+
+    # --- SMTP session ---
+    def _session(self) -> smtplib.SMTP:
+        if self._smtp is not None and time.monotonic() - self._last_used > self.idle_timeout:
+            self._close()
+        if self._smtp is None:
+            s = self.settings
+            smtp = smtplib.SMTP(s.host, s.port, timeout=s.timeout)
+            if s.starttls:
+                smtp.starttls()
+            if s.user:
+                smtp.login(s.user, s.password)
+            self._smtp = smtp
+        return self._smtp
+
+    def _send(self, msg: MIMEMultipart):
+        """Send on the pooled session; reconnect once if the server dropped it"""
+        for attempt in range(2):
+            try:
+                self._session().send_message(msg)
+                self._last_used = time.monotonic()
+                return
+            except smtplib.SMTPResponseException:
+                raise
+            except OSError:
+                # Dropped or stale connection (SMTPServerDisconnected is an OSError too)
+                self._close()
+                if attempt == 1:
+                    raise
+
+    def _close(self):
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except Exception:
+            pass
+        self._smtp = None
+
+    def status(self) -> Dict[str, object]:
+        return {
+            'sent': self.sent,
+            'sent_today': self.sent_today,
+            'failed': self.failed,
+            'coalesced': self.coalesced,
+            'dropped': self.dropped,
+            'pending': self._queue.qsize(),
+            'paused': self.paused,
+            'last_error': self.last_error,
+        }
@@ -0,0 +1,529 @@
+"""Streaming L2 order book for the Deribit feed.
+
+``L2Book`` keeps each side as a sorted ``(capacity, 2)`` float array of
+``[price, amount]`` rows (bids descending, asks ascending), so the top N levels
+are a view of the first N rows and the best price is row 0. Deribit
+``book.<instrument>.<interval>`` messages are applied in place: a snapshot
+replaces the book, a change message inserts/updates/deletes single levels.
+
+``OrderBookStream`` reads messages from a pluggable transport and checks every
+change's ``prev_change_id`` against the last applied ``change_id``; on a gap
+the book is marked out of sync and the channel is re-subscribed, which makes
+Deribit send a fresh snapshot. Messages are applied by ``poll()`` on the
+caller's thread, so the views it hands out never change under the caller.
+A lost connection is re-established on a background thread; ``poll()`` only
+drains what has arrived and never waits on the network.
+
+Transports: ``DeribitWebSocketTransport`` (needs the ``websocket-client``
+package) for live data, ``TcpJsonTransport`` for newline-delimited JSON over
+TCP, which ``ReplayServer`` serves from recorded messages for offline runs,
+and ``ClockReplayTransport``, which hands recorded messages out by a simulated
+clock for backtests.
+"""
+
+import json
+import logging
+import queue
+import socket
+import socketserver
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DERIBIT_WS_URL = 'wss://www.deribit.com/ws/api/v2'
+
+
+class L2Book:
+    """Sorted array-backed price levels of one instrument"""
+
+    def __init__(self, capacity: int = 2_000):
+        self.capacity = capacity
+        self.bids = np.zeros((capacity, 2), dtype=np.float64)  # [price, amount], best (highest) first
+        self.asks = np.zeros((capacity, 2), dtype=np.float64)  # [price, amount], best (lowest) first
+        self.bid_count = 0
+        self.ask_count = 0
+        self.change_id: Optional[int] = None
+        self.timestamp: Optional[int] = None  # Exchange time of the last applied message (ms)
+        self.truncated = 0  # Levels dropped because a side was full
+
+    def clear(self):
+        self.bid_count = self.ask_count = 0
+        self.change_id = None
+        self.timestamp = None
+
+    @staticmethod
+    def _find(side: np.ndarray, count: int, price: float, descending: bool) -> int:
+        """Index of ``price`` in the side, or where it would be inserted (binary search, no copy)"""
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            p = side[mid, 0]
+            if (p > price) if descending else (p < price):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _set(self, is_bid: bool, price: float, amount: float):
+        side = self.bids if is_bid else self.asks
+        count = self.bid_count if is_bid else self.ask_count
+        i = self._find(side, count, price, descending=is_bid)
+        found = i < count and side[i, 0] == price
+        if amount <= 0:
+            if found:
+                side[i:count - 1] = side[i + 1:count]
+                count -= 1
+        elif found:
+            side[i, 1] = amount
+        else:
+            if count == self.capacity:
+                # Keep the levels nearest the top; the worst one falls off
+                self.truncated += 1
+                if i == count:
+                    return
+                count -= 1
+            side[i + 1:count + 1] = side[i:count]
+            side[i] = (price, amount)
+            count += 1
+        if is_bid:
+            self.bid_count = count
+        else:
+            self.ask_count = count
+
+    def apply(self, data: Dict):
+        """Apply one Deribit book message (``type`` snapshot or change)"""
+        if data.get('type') == 'snapshot':
+            self.bid_count = self.ask_count = 0
+        for action, price, amount in data.get('bids', ()):
+            self._set(True, float(price), 0.0 if action == 'delete' else float(amount))
+        for action, price, amount in data.get('asks', ()):
+            self._set(False, float(price), 0.0 if action == 'delete' else float(amount))
+        self.change_id = data.get('change_id')
+        self.timestamp = data.get('timestamp')
+
+    # --- Read side (views, valid until the next apply) ---
+    def best_bid(self) -> Optional[float]:
+        return float(self.bids[0, 0]) if self.bid_count else None
+
+    def best_ask(self) -> Optional[float]:
+        return float(self.asks[0, 0]) if self.ask_count else None
+
+    def spread(self) -> Optional[float]:
+        if not (self.bid_count and self.ask_count):
+            return None
+        return float(self.asks[0, 0] - self.bids[0, 0])
+
+    def top(self, depth: int):
+        """(bids, asks) views of the best ``depth`` levels"""
+        return self.bids[:min(depth, self.bid_count)], self.asks[:min(depth, self.ask_count)]
+
+    def depth(self, levels: int):
+        """Total amount on (bid side, ask side) over the best ``levels`` levels"""
+        bids, asks = self.top(levels)
+        return float(bids[:, 1].sum()), float(asks[:, 1].sum())
+
+    def imbalance(self, levels: int = 5) -> float:
+        """(bid - ask) / (bid + ask) amount over the best ``levels`` levels, 0 if empty"""
+        bid, ask = self.depth(levels)
+        return (bid - ask) / (bid + ask) if bid + ask else 0.0
+
+    def view(self, limit: int = 50) -> Dict:
+        """ccxt ``fetch_order_book``-shaped dict whose sides are array views"""
+        bids, asks = self.top(limit)
+        return {'bids': bids, 'asks': asks, 'timestamp': self.timestamp, 'nonce': self.change_id}
+
+
+# --- Transports ---
+class _QueueTransport:
+    """Shared part of the transports: a reader thread puts decoded messages on a queue"""
+
+    def __init__(self):
+        self._messages: queue.Queue = queue.Queue()
+        self._reader: Optional[threading.Thread] = None
+        self._next_id = 1
+        self.connected = False
+
+    def recv(self, timeout: Optional[float] = 0.0) -> Optional[Dict]:
+        """Next message, or None if none arrived within ``timeout`` (0 = don't wait)"""
+        try:
+            if timeout == 0:
+                return self._messages.get_nowait()
+            return self._messages.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def _request(self, method: str, params: Dict):
+        msg = {'jsonrpc': '2.0', 'id': self._next_id, 'method': method, 'params': params}
+        self._next_id += 1
+        self._send_text(json.dumps(msg))
+
+    def subscribe(self, channels: List[str]):
+        self._request('public/subscribe', {'channels': channels})
+
+    def unsubscribe(self, channels: List[str]):
+        self._request('public/unsubscribe', {'channels': channels})
+
+    def _start_reader(self, read_line):
+        def run():
+            while self.connected:
+                try:
+                    text = read_line()
+                except Exception as e:
+                    if self.connected:
+                        logger.warning(f"Order book transport read failed: {e}")
+                    break
+                if not text:
+                    break
+                try:
+                    self._messages.put(json.loads(text))
+                except ValueError:
+                    logger.warning(f"Ignoring malformed order book message: {text[:80]!r}")
+            self.connected = False
+            self._messages.put({'method': 'disconnected'})
+
+        self._reader = threading.Thread(target=run, name='order-book-reader', daemon=True)
+        self._reader.start()
+
+    def _send_text(self, text: str):
+        raise NotImplementedError
+
+
+class DeribitWebSocketTransport(_QueueTransport):
+    """Deribit JSON-RPC over WebSocket (``pip install websocket-client``)"""
+
+    def __init__(self, url: str = DERIBIT_WS_URL, timeout: float = 10.0):
+        super().__init__()
+        self.url = url
+        self.timeout = timeout
+        self._ws = None
+
+    def connect(self):
+        try:
+            import websocket
+        except ImportError as e:
+            raise ImportError("DeribitWebSocketTransport needs the websocket-client package") from e
+        self._ws = websocket.create_connection(self.url, timeout=self.timeout)
+        self._ws.settimeout(None)
+        self.connected = True
+        self._start_reader(self._ws.recv)
+
+    def _send_text(self, text: str):
+        self._ws.send(text)
+
+    def close(self):
+        self.connected = False
+        if self._ws is not None:
+            try:
+                self._ws.close()
+            except Exception:
+                pass
+            self._ws = None
+
+
+class TcpJsonTransport(_QueueTransport):
+    """The same JSON-RPC messages as newline-delimited JSON over plain TCP (e.g. a ``ReplayServer``)"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 9009, timeout: float = 10.0):
+        super().__init__()
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._file = None
+
+    def connect(self):
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._sock.settimeout(None)
+        self._file = self._sock.makefile('r', encoding='utf-8', newline='\n')
+        self.connected = True
+        self._start_reader(self._file.readline)
+
+    def _send_text(self, text: str):
+        self._sock.sendall((text + '\n').encode('utf-8'))
+
+    def close(self):
+        self.connected = False
+        if self._sock is not None:
+            try:
+                self._sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._sock.close()
+            self._sock = None
+
+
+class ReplayServer:
+    """Serves recorded Deribit book data over ``TcpJsonTransport`` for tests and offline runs.
+
+    ``messages`` are the ``data`` payloads of ``book.*`` notifications (one per
+    line in a recording), streamed ``interval`` seconds apart after the first
+    subscribe. Like the exchange, a re-subscribe is answered with a snapshot of
+    the book as replayed so far, and the changes continue after it.
+    """
+
+    def __init__(self, messages: Iterable[Dict], host: str = '127.0.0.1', port: int = 0, interval: float = 0.0):
+        self.messages = list(messages)
+        self.interval = interval
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                server._serve(self)
+
+        self._server = socketserver.ThreadingTCPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self.address = self._server.server_address
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> 'ReplayServer':
+        with open(path, encoding='utf-8') as f:
+            return cls((json.loads(line) for line in f if line.strip()), **kwargs)
+
+    def start(self) -> 'ReplayServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, name='book-replay', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _serve(self, handler):
+        lock = threading.Lock()
+        replayed = L2Book()
+        state = {'position': 0, 'active': False, 'streaming': False, 'channel': ''}
+
+        def write(data):
+            # Caller holds the lock
+            notification = {'jsonrpc': '2.0', 'method': 'subscription',
+                            'params': {'channel': state['channel'], 'data': data}}
+            handler.wfile.write((json.dumps(notification) + '\n').encode('utf-8'))
+            handler.wfile.flush()
+
+        def stream():
+            while True:
+                with lock:
+                    if not state['active'] or state['position'] >= len(self.messages):
+                        state['streaming'] = False
+                        return
+                    data = self.messages[state['position']]
+                    state['position'] += 1
+                    replayed.apply(data)
+                    write(data)
+                if self.interval:
+                    time.sleep(self.interval)
+
+        for line in handler.rfile:
+            try:
+                request = json.loads(line)
+            except ValueError:
+                continue
+            method = request.get('method')
+            channels = request.get('params', {}).get('channels', [])
+            with lock:
+                handler.wfile.write((json.dumps({'jsonrpc': '2.0', 'id': request.get('id'), 'result': channels})
+                                     + '\n').encode('utf-8'))
+                if method == 'public/subscribe' and channels:
+                    state['channel'] = channels[0]
+                    state['active'] = True
+                    if state['position'] > 0:
+                        bids, asks = replayed.top(replayed.capacity)
+                        write({'type': 'snapshot', 'timestamp': replayed.timestamp,
+                               'instrument_name': state['channel'].split('.')[1],
+                               'change_id': replayed.change_id,
+                               'bids': [['new', p, a] for p, a in bids.tolist()],
+                               'asks': [['new', p, a] for p, a in asks.tolist()]})
+                    if not state['streaming']:
+                        state['streaming'] = True
+                        threading.Thread(target=stream, daemon=True).start()
+                elif method == 'public/unsubscribe':
+                    state['active'] = False
+                handler.wfile.flush()
+
+
+class ClockReplayTransport:
+    """Recorded book data released by a clock instead of a socket, for backtests.
+
+    ``messages`` are ``book.*`` data payloads as for ``ReplayServer``; each is
+    delivered once ``clock()`` (epoch seconds) reaches its exchange
+    ``timestamp``. A re-subscribe is answered with a snapshot of the book as
+    replayed so far.
+    """
+
+    def __init__(self, messages: Iterable[Dict], clock: Callable[[], float]):
+        self.messages = sorted(messages, key=lambda data: data.get('timestamp') or 0)
+        self.times = np.array([(data.get('timestamp') or 0) / 1000 for data in self.messages])
+        self.clock = clock
+        self.position = 0
+        self.connected = False
+        self._channel = ''
+        self._active = False
+        self._replayed = L2Book()
+        self._pending: deque = deque()
+
+    @classmethod
+    def from_file(cls, path: str, clock: Callable[[], float]) -> 'ClockReplayTransport':
+        with open(path, encoding='utf-8') as f:
+            return cls((json.loads(line) for line in f if line.strip()), clock)
+
+    def next_time(self) -> Optional[float]:
+        """Exchange time (epoch seconds) of the next undelivered message, None when all are out"""
+        return float(self.times[self.position]) if self.position < len(self.messages) else None
+
+    def _notification(self, data: Dict) -> Dict:
+        return {'jsonrpc': '2.0', 'method': 'subscription', 'params': {'channel': self._channel, 'data': data}}
+
+    def connect(self):
+        self.connected = True
+
+    def close(self):
+        self.connected = False
+        self._active = False
+
+    def subscribe(self, channels: List[str]):
+        self._channel = channels[0]
+        self._active = True
+        if self.position > 0:
+            bids, asks = self._replayed.top(self._replayed.capacity)
+            self._pending.append(self._notification({
+                'type': 'snapshot', 'timestamp': self._replayed.timestamp,
+                'instrument_name': self._channel.split('.')[1], 'change_id': self._replayed.change_id,
+                'bids': [['new', p, a] for p, a in bids.tolist()],
+                'asks': [['new', p, a] for p, a in asks.tolist()]}))
+
+    def unsubscribe(self, channels: List[str]):
+        self._active = False
+
+    def recv(self, timeout: Optional[float] = 0.0) -> Optional[Dict]:
+        """Next message that is due by the clock (never waits)"""
+        if self._pending:
+            return self._pending.popleft()
+        if not self._active or self.position >= len(self.messages) or self.times[self.position] > self.clock():
+            return None
+        data = self.messages[self.position]
+        self.position += 1
+        self._replayed.apply(data)
+        return self._notification(data)
+
+
+class OrderBookStream:
+    """Keeps an ``L2Book`` in sync with a transport; call ``poll()`` to apply what has arrived"""
+
+    def __init__(self, transport, instrument: str = 'BTC-PERPETUAL', interval: str = '100ms',
+                 capacity: int = 2_000, max_age: float = 5.0, reconnect_interval: float = 5.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.transport = transport
+        self.instrument = instrument
+        self.channel = f"book.{instrument}.{interval}"
+        self.book = L2Book(capacity)
+        self.max_age = max_age  # Seconds without a message before the book counts as stale
+        self.reconnect_interval = reconnect_interval  # Seconds between reconnect attempts
+        self.synced = False  # True between a snapshot and the next detected gap
+        self.messages = 0
+        self.gaps = 0
+        self.resyncs = 0
+        self.last_message: Optional[float] = None  # clock() of the last applied message
+        self._clock = clock
+        self._last_connect = 0.0
+        self._reconnecting: Optional[threading.Thread] = None
+        self._stopped = False
+
+    def start(self):
+        self._stopped = False
+        self._last_connect = self._clock()
+        self.transport.connect()
+        self.transport.subscribe([self.channel])
+
+    def stop(self):
+        self._stopped = True
+        self.transport.close()
+        self.synced = False
+
+    @property
+    def fresh(self) -> bool:
+        """In sync and updated within ``max_age`` seconds"""
+        return (self.synced and self.last_message is not None
+                and self._clock() - self.last_message <= self.max_age)
+
+    def resync(self):
+        """Drop the book and ask for a new snapshot; a transport that cannot take the request is reconnected"""
+        self.synced = False
+        self.book.clear()
+        self.resyncs += 1
+        if self._reconnecting is not None and self._reconnecting.is_alive():
+            return  # The reconnect subscribes afresh
+        try:
+            self.transport.unsubscribe([self.channel])
+            self.transport.subscribe([self.channel])
+        except Exception as e:
+            # Dead socket (e.g. a gap in the messages queued before a disconnect): poll() reconnects
+            logger.warning(f"Order book resync for {self.instrument} failed: {e}; reconnecting")
+            self.transport.close()
+
+    def _reconnect(self):
+        """Reconnect on a background thread (connecting can block for the transport's timeout)"""
+        if self._stopped or (self._reconnecting is not None and self._reconnecting.is_alive()):
+            return
+        if self._clock() - self._last_connect < self.reconnect_interval:
+            return
+        self._last_connect = self._clock()
+        self._reconnecting = threading.Thread(target=self._run_reconnect, name='order-book-reconnect', daemon=True)
+        self._reconnecting.start()
+
+    def _run_reconnect(self):
+        self.transport.close()
+        try:
+            self.transport.connect()
+            self.transport.subscribe([self.channel])
+        except Exception as e:
+            logger.warning(f"Order book reconnect for {self.instrument} failed: {e}")
+            return
+        if self._stopped:
+            self.transport.close()  # stop() was called while connecting
+
+    def handle(self, message: Dict) -> bool:
+        """Apply one transport message; returns True if the book changed"""
+        if message.get('method') == 'disconnected':
+            logger.warning(f"Order book feed for {self.instrument} disconnected")
+            self.synced = False
+            self.book.clear()
+            return False
+        params = message.get('params')
+        if message.get('method') != 'subscription' or not params or params.get('channel') != self.channel:
+            return False
+        data = params['data']
+        if data.get('type') == 'snapshot':
+            self.book.apply(data)
+            self.synced = True
+        elif not self.synced:
+            return False  # Changes before the (re)sync snapshot are useless
+        elif data.get('prev_change_id') != self.book.change_id:
+            self.gaps += 1
+            logger.warning(f"Order book gap on {self.instrument}: expected prev_change_id "
+                           f"{self.book.change_id}, got {data.get('prev_change_id')}; resyncing")
+            self.resync()
+            return False
+        else:
+            self.book.apply(data)
+        self.messages += 1
+        self.last_message = self._clock()
+        return True
+
+    def poll(self, timeout: float = 0.0, max_messages: int = 10_000) -> int:
+        """Apply every message that has arrived (waiting up to ``timeout`` for the first); returns how many changed the book"""
+        if not self.transport.connected:
+            self._reconnect()
+        applied = 0
+        message = self.transport.recv(timeout)
+        while message is not None:
+            applied += self.handle(message)
+            if applied >= max_messages:
+                break
+            message = self.transport.recv(0)
+        return applied
@@ -0,0 +1,136 @@
+"""Priority-tiered scan scheduling for the FVG screener's symbol universe.
+
+Every symbol sits in one tier, set from where its price is relative to its
+open gaps after each scan:
+
+    active       price inside an FVG                       every 5 s
+    approaching  price within proximity_percent of an FVG  every 10 s
+    monitored    open FVGs, price away from them           every 60 s
+    idle         no open FVG (or no price yet)             every 600 s
+
+Symbols wait in one heap keyed by due time. ``next_batch`` takes due symbols
+earliest deadline first (the more urgent tier on ties) and charges one token
+per symbol to a ``TokenBucket``, so total scans per second (one tick request
+each, plus a bar request when a bar has closed) never exceed the budget
+however large the universe. The short intervals of the active and approaching
+tiers are what make those symbols scanned more often; when the budget is too
+small, every tier falls behind by about the same lag instead of the idle tier
+starving. The lag is reported per tier.
+"""
+
+import heapq
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from fvg_engine import FVGIndex
+from mt5_common import TokenBucket
+
+# Most urgent first
+TIERS = ('active', 'approaching', 'monitored', 'idle')
+DEFAULT_INTERVALS = {'active': 5.0, 'approaching': 10.0, 'monitored': 60.0, 'idle': 600.0}
+
+
+def tier_for(index: Optional[FVGIndex], price: Optional[float], proximity_percent: float) -> str:
+    """Scan tier of a symbol from its gap index and last price"""
+    if index is None or price is None or len(index) == 0:
+        return 'idle'
+    state, _ = index.classify(price, proximity_percent)
+    if state is None:
+        return 'monitored'
+    return 'active' if 'AKTIV' in state else 'approaching'
+
+
+class ScanScheduler:
+    """Decides which symbols to scan next under a per-second scan budget"""
+
+    def __init__(self, symbols: Iterable[str] = (), budget: float = 20.0, burst: Optional[float] = None,
+                 intervals: Optional[Mapping[str, float]] = None, clock=time.monotonic):
+        self.intervals = dict(DEFAULT_INTERVALS)
+        self.intervals.update(intervals or {})
+        self.bucket = TokenBucket(budget, burst or max(1.0, budget), clock=clock)
+        self._clock = clock
+        self._heap: List[Tuple[float, int, int, str]] = []  # (due, tier rank, entry id, symbol)
+        self.tiers: Dict[str, str] = {}  # Current tier per symbol
+        self._entries: Dict[str, int] = {}  # Live heap entry per symbol; older entries are skipped
+        self.unscanned = set()  # Symbols not scanned yet
+        self._seq = 0  # Entry id and heap tie-breaker: equal due times keep insertion order
+        self.scans: Counter = Counter()  # Scans per tier since the last report
+        self.max_lag: Dict[str, float] = {}  # Worst seconds past due per tier since the last report
+        self.add(symbols)
+
+    @property
+    def budget(self) -> float:
+        return self.bucket.rate
+
+    def __len__(self) -> int:
+        return len(self.tiers)
+
+    def _push(self, symbol: str, tier: str, due: float):
+        self._seq += 1
+        self._entries[symbol] = self._seq
+        heapq.heappush(self._heap, (due, TIERS.index(tier), self._seq, symbol))
+
+    def add(self, symbols: Iterable[str]):
+        """Schedule new symbols for an immediate first scan (idle until then)"""
+        now = self._clock()
+        for symbol in symbols:
+            if symbol in self.tiers:
+                continue
+            self.tiers[symbol] = 'idle'
+            self.unscanned.add(symbol)
+            self._push(symbol, 'idle', now)
+
+    def remove(self, symbol: str):
+        """Stop scanning a symbol (its heap entry is dropped when it comes due)"""
+        self.tiers.pop(symbol, None)
+        self._entries.pop(symbol, None)
+        self.unscanned.discard(symbol)
+
+    def next_batch(self, limit: Optional[int] = None) -> List[str]:
+        """Due symbols, earliest deadline first, as many as the budget allows now (each leaves the queue)"""
+        now = self._clock()
+        heap = self._heap
+        batch = []
+        while heap and heap[0][0] <= now and (limit is None or len(batch) < limit):
+            due, rank, seq, symbol = heap[0]
+            if self._entries.get(symbol) != seq:
+                heapq.heappop(heap)  # Removed (or re-added) since it was scheduled
+                continue
+            if not self.bucket.try_acquire():
+                break
+            heapq.heappop(heap)
+            batch.append(symbol)
+            tier = TIERS[rank]
+            self.scans[tier] += 1
+            self.max_lag[tier] = max(self.max_lag.get(tier, 0.0), now - due)
+        return batch
+
+    def reschedule(self, symbol: str, tier: str):
+        """Queue a scanned symbol again, ``tier``'s interval from now"""
+        if symbol not in self.tiers:
+            return
+        self.tiers[symbol] = tier
+        self.unscanned.discard(symbol)
+        self._push(symbol, tier, self._clock() + self.intervals[tier])
+
+    def wait_time(self) -> float:
+        """Seconds until ``next_batch`` can return a symbol"""
+        if not self._heap:
+            return float('inf')
+        return max(self._heap[0][0] - self._clock(), self.bucket.wait_time(), 0.0)
+
+    def counts(self) -> Dict[str, int]:
+        """Symbols per tier"""
+        counts = Counter(self.tiers.values())
+        return {tier: counts.get(tier, 0) for tier in TIERS}
+
+    def report(self, elapsed: float) -> str:
+        """Tier sizes, scan rate and worst lag over the last ``elapsed`` seconds; resets the counters"""
+        counts = self.counts()
+        parts = [f"{tier} {counts[tier]} ({self.scans.get(tier, 0)} scans, lag {self.max_lag.get(tier, 0.0):.1f}s)"
+                 for tier in TIERS]
+        total = sum(self.scans.values())
+        self.scans.clear()
+        self.max_lag.clear()
+        return f"{total / max(elapsed, 1e-9):.1f} scans/s of {self.budget:g} budget: " + ", ".join(parts)
@@ -0,0 +1,138 @@
+"""Cached symbol metadata and prebuilt MT5 order requests.
+
+``symbol_info`` is a full terminal round trip, yet the fields an order needs
+from it (digits, volume step and limits) practically never change during a
+session. ``SymbolMetaCache`` fetches them once per symbol (``refresh`` re-reads
+them on demand, e.g. after the broker rejects a volume or price), and each
+``SymbolMeta`` carries the lot and price rounding for its symbol.
+
+``OrderTemplates`` keeps one request dict per symbol, side and kind (open or
+close) with the strategy's constant fields filled in. An order is a copy of the
+template plus volume, price and sl/tp or the position ticket.
+"""
+
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+@dataclass
+class SymbolMeta:
+    """Trading metadata of one symbol, with its lot and price rounding"""
+    symbol: str
+    digits: int
+    point: float
+    volume_step: float
+    volume_min: float
+    volume_max: float
+    contract_size: float
+    _lot_decimals: int = field(init=False, repr=False)
+
+    def __post_init__(self):
+        step = Decimal(repr(self.volume_step)).normalize()
+        self._lot_decimals = max(0, -step.as_tuple().exponent)
+
+    @classmethod
+    def from_info(cls, info) -> 'SymbolMeta':
+        return cls(info.name, int(info.digits), float(info.point), float(info.volume_step),
+                   float(info.volume_min), float(info.volume_max), float(info.trade_contract_size))
+
+    def round_lots(self, lots: float) -> float:
+        """Nearest ``volume_step`` multiple, clamped to [volume_min, volume_max]"""
+        lots = round(round(lots / self.volume_step) * self.volume_step, self._lot_decimals)
+        return max(self.volume_min, min(self.volume_max, lots))
+
+    def round_price(self, price: float) -> float:
+        return round(price, self.digits)
+
+
+class SymbolMetaCache:
+    """``SymbolMeta`` per symbol, read from the terminal on first use and on ``refresh``"""
+
+    def __init__(self, terminal, symbols: Iterable[str] = ()):
+        self.terminal = terminal  # MetaTrader5 module (or a stand-in with symbol_info)
+        self.meta: Dict[str, SymbolMeta] = {}
+        self.fetches = 0  # symbol_info calls made
+        self.refresh(symbols)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.meta
+
+    def get(self, symbol: str) -> Optional[SymbolMeta]:
+        """Cached metadata; fetched on a miss, None if the terminal does not know the symbol"""
+        meta = self.meta.get(symbol)
+        if meta is None:
+            meta = self._fetch(symbol)
+        return meta
+
+    def refresh(self, symbols: Optional[Iterable[str]] = None) -> List[str]:
+        """Re-read the given symbols (all cached ones if None); returns those the terminal answered for"""
+        symbols = list(self.meta) if symbols is None else list(symbols)
+        return [symbol for symbol in symbols if self._fetch(symbol) is not None]
+
+    def _fetch(self, symbol: str) -> Optional[SymbolMeta]:
+        self.fetches += 1
+        info = self.terminal.symbol_info(symbol)
+        if info is None:
+            self.meta.pop(symbol, None)
+            return None
+        meta = self.meta[symbol] = SymbolMeta.from_info(info)
+        return meta
+
+
+class OrderTemplates:
+    """Prebuilt market-order request dicts per symbol, side and kind (open/close)"""
+
+    def __init__(self, terminal, magic: int = 0, deviation: int = 20, comment: str = "",
+                 close_comment: Optional[str] = None, type_time: Optional[int] = None,
+                 type_filling: Optional[int] = None):
+        self.terminal = terminal
+        self.magic = magic
+        self.deviation = deviation  # Max slippage in points
+        self.comment = comment
+        self.close_comment = comment if close_comment is None else close_comment
+        self.type_time = terminal.ORDER_TIME_GTC if type_time is None else type_time
+        self.type_filling = terminal.ORDER_FILLING_IOC if type_filling is None else type_filling
+        self._templates: Dict[Tuple[str, bool, bool], Dict] = {}
+
+    def _template(self, symbol: str, is_buy: bool, closing: bool) -> Dict:
+        key = (symbol, is_buy, closing)
+        template = self._templates.get(key)
+        if template is None:
+            t = self.terminal
+            template = self._templates[key] = {
+                "action": t.TRADE_ACTION_DEAL,
+                "symbol": symbol,
+                "volume": 0.0,
+                "type": t.ORDER_TYPE_BUY if is_buy else t.ORDER_TYPE_SELL,
+                "price": 0.0,
+                "deviation": self.deviation,
+                "magic": self.magic,
+                "comment": self.close_comment if closing else self.comment,
+                "type_time": self.type_time,
+                "type_filling": self.type_filling,
+            }
+            if closing:
+                template["position"] = 0
+            else:
+                template["sl"] = 0.0
+                template["tp"] = 0.0
+        return template
+
+    def open(self, symbol: str, is_buy: bool, volume: float, price: float,
+             sl: float = 0.0, tp: float = 0.0) -> Dict:
+        """Request opening a position (0.0 sl/tp = none)"""
+        request = self._template(symbol, is_buy, False).copy()
+        request["volume"] = volume
+        request["price"] = price
+        request["sl"] = sl
+        request["tp"] = tp
+        return request
+
+    def close(self, symbol: str, position_is_buy: bool, volume: float, price: float, position: int) -> Dict:
+        """Request closing ``position`` with the opposite deal"""
+        request = self._template(symbol, not position_is_buy, True).copy()
+        request["volume"] = volume
+        request["price"] = price
+        request["position"] = position
+        return request
@@ -0,0 +1,141 @@
+"""Per-symbol tick history kept in fixed-capacity NumPy ring buffers.
+
+Every tick is written twice, at slot ``i`` and ``i + capacity`` of a buffer of
+``2 * capacity`` records, so the newest ``n`` ticks are always one contiguous
+slice. Window lookups (last N ticks, last T seconds) therefore return views
+without copying. Updates only ask the terminal for ticks newer than the last
+stored ``time_msc``, so per-cycle transfer is proportional to the new ticks.
+"""
+
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+from mt5_common import TICKS_DTYPE
+
+# Ticks requested per copy_ticks_from call; a full batch means more are waiting
+FETCH_BATCH = 5_000
+
+
+class TickRing:
+    """Fixed-capacity tick ring with contiguous (double-written) storage"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.count = 0  # Ticks currently held (<= capacity)
+        self.total = 0  # Ticks ever appended
+        self._data = np.zeros(2 * capacity, dtype=TICKS_DTYPE)
+        self._end = 0  # Slot the next tick goes to, in [0, capacity)
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def last_time_msc(self) -> Optional[int]:
+        if self.count == 0:
+            return None
+        return int(self._data['time_msc'][self._end + self.capacity - 1])
+
+    def extend(self, ticks: np.ndarray):
+        """Append ticks (oldest first); only the newest ``capacity`` are kept"""
+        n = len(ticks)
+        if n == 0:
+            return
+        self.total += n
+        if n > self.capacity:
+            ticks = ticks[n - self.capacity:]
+            n = self.capacity
+        ticks = np.asarray(ticks).astype(TICKS_DTYPE, copy=False)
+        first = min(n, self.capacity - self._end)
+        for offset in (0, self.capacity):
+            self._data[self._end + offset:self._end + offset + first] = ticks[:first]
+            self._data[offset:offset + n - first] = ticks[first:]
+        self._end = (self._end + n) % self.capacity
+        self.count = min(self.capacity, self.count + n)
+
+    def last(self, n: Optional[int] = None) -> np.ndarray:
+        """Read-only view of the newest ``n`` ticks (all held ticks if None), oldest first"""
+        n = self.count if n is None else max(0, min(n, self.count))
+        end = self._end + self.capacity
+        view = self._data[end - n:end]
+        view.flags.writeable = False
+        return view
+
+    def since(self, seconds: float) -> np.ndarray:
+        """Read-only view of the ticks within ``seconds`` of the newest tick"""
+        window = self.last()
+        if len(window) == 0:
+            return window
+        cutoff = window['time_msc'][-1] - int(seconds * 1000)
+        return window[np.searchsorted(window['time_msc'], cutoff, side='left'):]
+
+
+class TickBuffer:
+    """Tick rings per symbol, topped up from the terminal with only the unseen ticks"""
+
+    def __init__(self, terminal, capacity: int = 20_000, lookback: float = 1800.0, flags: Optional[int] = None):
+        self.terminal = terminal  # MetaTrader5 module (or a stand-in with copy_ticks_from)
+        self.capacity = capacity
+        self.lookback = lookback  # Seconds of history loaded on the first update of a symbol
+        self.flags = terminal.COPY_TICKS_ALL if flags is None else flags
+        self.rings: Dict[str, TickRing] = {}
+        self.fetched = 0  # Ticks transferred from the terminal (after de-duplication)
+
+    def ring(self, symbol: str) -> TickRing:
+        ring = self.rings.get(symbol)
+        if ring is None:
+            ring = self.rings[symbol] = TickRing(self.capacity)
+        return ring
+
+    def _start_time(self, symbol: str) -> int:
+        # Server time of the latest tick, so the lookback is measured on the broker clock
+        tick = self.terminal.symbol_info_tick(symbol)
+        now = int(tick.time) if tick is not None and tick.time else int(time.time())
+        return now - int(self.lookback)
+
+    @staticmethod
+    def _held_at(ring: TickRing, time_msc: int) -> int:
+        """How many stored ticks share ``time_msc`` (the newest millisecond)"""
+        held = ring.last(min(ring.count, FETCH_BATCH))['time_msc']
+        return len(held) - int(np.searchsorted(held, time_msc, side='left'))
+
+    def update(self, symbol: str) -> int:
+        """Append the ticks after the last stored one; returns how many were new"""
+        ring = self.ring(symbol)
+        last_msc = ring.last_time_msc
+        start = self._start_time(symbol) if last_msc is None else last_msc // 1000
+
+        added = 0
+        count = FETCH_BATCH
+        while True:
+            ticks = self.terminal.copy_ticks_from(symbol, start, count, self.flags)
+            if ticks is None or len(ticks) == 0:
+                break
+            fresh = ticks
+            if last_msc is not None:
+                # copy_ticks_from has second resolution: the last second is requested
+                # again and what is already stored (same time_msc included) is dropped
+                times = ticks['time_msc']
+                begin = int(np.searchsorted(times, last_msc, side='left'))
+                at_last = int(np.searchsorted(times, last_msc, side='right')) - begin
+                fresh = ticks[begin + min(self._held_at(ring, last_msc), at_last):]
+            ring.extend(fresh)
+            added += len(fresh)
+            if len(ticks) < count:
+                break  # Caught up
+            if ring.last_time_msc == last_msc:
+                # The batch ended inside the re-requested second; ask for a larger one
+                count *= 2
+                continue
+            last_msc = ring.last_time_msc
+            start = last_msc // 1000
+            count = FETCH_BATCH
+        self.fetched += added
+        return added
+
+    def last(self, symbol: str, n: Optional[int] = None) -> np.ndarray:
+        return self.ring(symbol).last(n)
+
+    def since(self, symbol: str, seconds: float) -> np.ndarray:
+        return self.ring(symbol).since(seconds)